@@ -1,14 +1,115 @@
 import tkinter as tk
-from tkinter import filedialog, messagebox
-from PIL import Image, ImageTk
-import numpy as np
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from tkinter import filedialog, messagebox, ttk
+from PIL import Image, ImageDraw, ImageTk
 import os
-from utils.segmentation import segmentation
+import queue
+import threading
+import numpy as np
+from utils.segmentation import segmentation_candidats
 from utils.extraction import extract_signature
 from utils.rays import lancer_aleatoire
 from utils.decoder import decode_ean13_signature
+from utils.consensus import decoder_par_consensus
+from utils.image import charger_image
+from utils.produits import ouvrir_index
+
+# Taille de l'image affichée (largeur, hauteur)
+TAILLE_AFFICHAGE = (800, 500)
+
+# Intervalle de relève des messages du thread de calcul, en millisecondes
+INTERVALLE_SONDAGE = 50
+
+# Paramètres du mode automatique (mêmes valeurs que main.py)
+BUDGET_AUTO = 20
+TAILLE_LOT_AUTO = 4
+
+# Couleurs des annotations
+COULEUR_REGION = "#00c853"
+COULEUR_RAYON = "#ff5252"
+COULEUR_RAYON_LU = "#ffd600"
+COULEUR_RAYON_GAGNANT = "#2979ff"
+
+
+class TacheAnnulee(Exception):
+    """Levée dans le thread de calcul quand l'utilisateur a annulé la tâche."""
+
+
+class Tache:
+    """
+    Calcul exécuté dans un thread ; la boucle Tk relève ses messages par after().
+
+    La fonction reçoit la tâche en argument : elle signale son avancement avec
+    progression() et appelle verifier() entre deux étapes, ce qui lève
+    TacheAnnulee si l'annulation a été demandée. Elle ne modifie jamais
+    l'interface elle-même (Tk n'est pas utilisable hors du thread principal) :
+    son résultat est transmis par la file `messages`.
+    """
+
+    def __init__(self, fonction):
+        self.messages = queue.Queue()
+        self.annulation = threading.Event()
+        self.fil = threading.Thread(target=self._executer, args=(fonction,), daemon=True)
+
+    def _executer(self, fonction):
+        try:
+            self.messages.put(('fin', fonction(self)))
+        except TacheAnnulee:
+            self.messages.put(('annulee', None))
+        except Exception as e:
+            self.messages.put(('erreur', e))
+
+    def progression(self, etape, fraction, **details):
+        """Signale une étape (texte) et l'avancement global (entre 0 et 1)."""
+        self.messages.put(('progression', (etape, fraction, details)))
+
+    def verifier(self):
+        """Lève TacheAnnulee si l'utilisateur a annulé la tâche."""
+        if self.annulation.is_set():
+            raise TacheAnnulee()
+
+
+def dessiner_annotations(image, region=None, rayons=(), rayon_gagnant=None, points=(), signature=None):
+    """
+    Image d'affichage annotée : région détectée, rayons lancés et signature.
+
+    Paramètres:
+        image (PIL.Image): Image d'origine
+        region (list, optionnel): Coins (x, y) de la région candidate
+        rayons (list): Rayons ((x1, y1), (x2, y2)) et code lu (None si échec)
+        rayon_gagnant (tuple, optionnel): Rayon ayant donné le code retenu
+        points (list): Points cliqués en mode manuel
+        signature (list, optionnel): Signature binaire, dessinée en bandeau en bas
+
+    Retourne:
+        PIL.Image: Image RGB de taille TAILLE_AFFICHAGE
+    """
+    largeur, hauteur = TAILLE_AFFICHAGE
+    sx, sy = largeur / image.width, hauteur / image.height
+    affichage = image.convert("RGB").resize(TAILLE_AFFICHAGE)
+    dessin = ImageDraw.Draw(affichage)
+
+    def ecran(point):
+        return (point[0] * sx, point[1] * sy)
+
+    if region is not None:
+        dessin.polygon([ecran(coin) for coin in region], outline=COULEUR_REGION, width=3)
+    for (p1, p2), code in rayons:
+        dessin.line([ecran(p1), ecran(p2)], fill=COULEUR_RAYON_LU if code else COULEUR_RAYON, width=2)
+    if rayon_gagnant is not None:
+        dessin.line([ecran(rayon_gagnant[0]), ecran(rayon_gagnant[1])], fill=COULEUR_RAYON_GAGNANT, width=3)
+    for point in points:
+        x, y = ecran(point)
+        dessin.ellipse([x - 4, y - 4, x + 4, y + 4], fill=COULEUR_RAYON_GAGNANT)
+    if signature is not None:
+        # Bandeau de la signature binaire : une barre noire par bit à 1
+        haut = hauteur - 40
+        dessin.rectangle([0, haut, largeur, hauteur], fill="white")
+        pas = largeur / len(signature)
+        for i, bit in enumerate(signature):
+            if bit:
+                dessin.rectangle([i * pas, haut + 5, (i + 1) * pas, hauteur - 5], fill="black")
+    return affichage
+
 
 class BarcodeApp(tk.Tk):
     def __init__(self):
@@ -17,89 +118,118 @@ class BarcodeApp(tk.Tk):
         self.geometry("1200x800")
         self.minsize(800, 600)
         self.resizable(True, True)
-        
+
         # Dégradé de fond
         self.canvas = tk.Canvas(self, width=1200, height=800)
         self.canvas.pack(fill="both", expand=True)
         self.create_gradient()
-        
+
         # Variables
         self.image = None
         self.image_path = ""
+        self.image_grise = None
         self.binary_signature = None
         self.decoded_barcode = None
-        
+        self.index_produits = None
+        self.detected_region = None
+        self.points = []
+        self.rayons_traces = []
+        self.rayon_gagnant = None
+
+        # Tâche de calcul en cours (voir run_task)
+        self.tache = None
+        self.tache_fin = None
+        self.tache_erreur = ""
+
         # Créer l'interface
         self.setup_ui()
-    
+
     def create_gradient(self):
         """Créer un dégradé de fond."""
         for i in range(100):
             color = f"#{i:02x}{i:02x}{255-i:02x}"
             self.canvas.create_rectangle(0, i * 9, 1200, (i + 1) * 3, fill=color, outline="")
-    
+
     def setup_ui(self):
         """Créer les widgets de l'interface."""
         self.frame = tk.Frame(self.canvas)
         self.frame.place(relx=0.5, rely=0.05, anchor="n")
-        
+
         # Bouton pour charger une image
-        self.load_button = tk.Button(self.frame, text="Charger une image", 
+        self.load_button = tk.Button(self.frame, text="Charger une image",
                                     command=self.load_image, fg="black", font=("Arial", 12))
         self.load_button.grid(row=0, column=0, padx=10, pady=5)
-        
+
         # Boutons pour sélectionner le mode
         self.mode_var = tk.StringVar(value="manuel")
-        tk.Radiobutton(self.frame, text="Rayon Manuel", variable=self.mode_var, 
+        tk.Radiobutton(self.frame, text="Rayon Manuel", variable=self.mode_var,
                       value="manuel", font=("Arial", 12)).grid(row=0, column=1, padx=10)
-        tk.Radiobutton(self.frame, text="Rayons Aléatoires", variable=self.mode_var, 
+        tk.Radiobutton(self.frame, text="Rayons Aléatoires", variable=self.mode_var,
                       value="aleatoire", font=("Arial", 12)).grid(row=0, column=2, padx=10)
-        
+
         # Boutons pour les actions
-        self.segment_button = tk.Button(self.frame, text="Segmentation", 
+        self.segment_button = tk.Button(self.frame, text="Segmentation",
                                       command=self.segment_image, fg="black", font=("Arial", 12))
         self.segment_button.grid(row=0, column=3, padx=10, pady=5)
-        
-        self.extract_button = tk.Button(self.frame, text="Extraction", 
+
+        self.extract_button = tk.Button(self.frame, text="Extraction",
                                       command=self.extract_signature, fg="black", font=("Arial", 12))
         self.extract_button.grid(row=0, column=4, padx=10, pady=5)
-        
-        self.decode_button = tk.Button(self.frame, text="Decoder", 
+
+        self.decode_button = tk.Button(self.frame, text="Decoder",
                                      command=self.decode_barcode, fg="black", font=("Arial", 12))
         self.decode_button.grid(row=0, column=5, padx=10, pady=5)
-        
-        self.verify_button = tk.Button(self.frame, text="Vérifier dans la base", 
+
+        self.verify_button = tk.Button(self.frame, text="Vérifier dans la base",
                                      command=self.verify_database, fg="black", font=("Arial", 12))
         self.verify_button.grid(row=0, column=6, padx=10, pady=5)
-        
+
         # Bouton de réinitialisation
-        self.reset_button = tk.Button(self.frame, text="Réinitialiser", 
+        self.reset_button = tk.Button(self.frame, text="Réinitialiser",
                                     command=self.reset_app, fg="black", font=("Arial", 12))
         self.reset_button.grid(row=0, column=7, padx=10, pady=5)
-        
-        # Zone d'affichage d'image
+
+        # Mode automatique : segmentation, budget de rayons et décodage en un clic
+        self.auto_button = tk.Button(self.frame, text="Auto",
+                                   command=self.auto_decode, fg="black", font=("Arial", 12, "bold"))
+        self.auto_button.grid(row=1, column=0, padx=10, pady=5)
+
+        # Avancement de la tâche en cours et annulation
+        self.progress = ttk.Progressbar(self.frame, orient="horizontal", mode="determinate", maximum=1.0)
+        self.progress.grid(row=1, column=1, columnspan=5, sticky="ew", padx=10, pady=5)
+
+        self.cancel_button = tk.Button(self.frame, text="Annuler", state="disabled",
+                                     command=self.cancel_task, fg="black", font=("Arial", 12))
+        self.cancel_button.grid(row=1, column=6, padx=10, pady=5)
+
+        # Boutons désactivés pendant une tâche
+        self.action_buttons = (self.load_button, self.segment_button, self.extract_button,
+                               self.decode_button, self.verify_button, self.reset_button,
+                               self.auto_button)
+
+        # Zone d'affichage d'image (les clics du mode manuel y sont relevés)
         self.image_label = tk.Label(self.canvas, bg="#ffffff", bd=2, relief="sunken")
         self.image_label.place(relx=0.5, rely=0.6, anchor="center", width=800, height=500)
-        
+
         # Zone de feedback
         self.feedback = tk.Label(self, text="Prêt", font=("Arial", 12), bg="#e9ecef", fg="black")
         self.feedback.place(relx=0.5, rely=0.95, anchor="s")
-        
+
         # Ajouter un label en bas à droite
         footer_label = tk.Label(self, text="Projet Image TS225 2024/2025", font=("Arial", 14), fg="white")
         footer_label.place(relx=1.0, rely=1.0, anchor="se", x=0, y=0)
-        
-        footer_label2 = tk.Label(self, text="Développé par: Mehdi, Salma, Arif et Louriz", 
+
+        footer_label2 = tk.Label(self, text="Développé par: Mehdi, Salma, Arif et Louriz",
                               font=("Arial", 14), fg="white")
         footer_label2.place(relx=0.0, rely=1.0, anchor="sw", x=0, y=0)
-        
+
         # Bouton pour quitter l'application
         self.quit_button = tk.Button(
             self,
             text="Quitter",
             command=self.quit_app,
             fg="red",
-            bg="red", 
+            bg="red",
             font=("Arial", 12, "bold"),
             relief="raised",
             bd=2,
@@ -107,251 +237,350 @@ class BarcodeApp(tk.Tk):
             pady=5
         )
         self.quit_button.place(relx=0.5, rely=0.975, anchor="center")
-    
+
+    def run_task(self, nom, fonction, on_done, erreur):
+        """
+        Lance un calcul dans un thread sans bloquer l'interface.
+
+        Paramètres:
+            nom (str): Étape affichée au lancement
+            fonction (callable): Calcul, appelé avec la Tache (voir Tache)
+            on_done (callable): Appelée dans le thread Tk avec le résultat
+            erreur (str): Début du message affiché si le calcul échoue
+        """
+        if self.tache is not None:
+            self.feedback.config(text="Une tâche est déjà en cours.")
+            return
+        self.tache = Tache(fonction)
+        self.tache_fin = on_done
+        self.tache_erreur = erreur
+        self.set_busy(True)
+        self.show_progress(f"{nom}...", 0.0, {})
+        self.tache.fil.start()
+        self.after(INTERVALLE_SONDAGE, self.poll_task)
+
+    def poll_task(self):
+        """Relève les messages de la tâche en cours (appelée par after())."""
+        tache = self.tache
+        if tache is None:
+            return
+        while True:
+            try:
+                genre, contenu = tache.messages.get_nowait()
+            except queue.Empty:
+                break
+            if genre == 'progression':
+                if not tache.annulation.is_set():
+                    self.show_progress(*contenu)
+                continue
+            on_done, erreur = self.tache_fin, self.tache_erreur
+            self.end_task()
+            if tache.annulation.is_set():
+                # Le thread annulé est terminé : son résultat éventuel est ignoré
+                self.feedback.config(text="Tâche annulée.")
+            elif genre == 'fin':
+                on_done(contenu)
+            elif genre == 'erreur':
+                messagebox.showerror("Erreur", f"{erreur} : {contenu}")
+                self.feedback.config(text=f"{erreur}.")
+            return
+        self.after(INTERVALLE_SONDAGE, self.poll_task)
+
+    def show_progress(self, etape, fraction, details):
+        """Affiche l'étape en cours et les annotations qu'elle transmet."""
+        self.feedback.config(text=etape)
+        if fraction is not None:
+            self.progress['value'] = fraction
+        if 'region' in details:
+            self.detected_region = list(details['region'])
+        self.rayons_traces.extend(details.get('rayons', ()))
+        if details:
+            self.refresh_display()
+
+    def cancel_task(self):
+        """
+        Annule la tâche en cours.
+
+        Le thread s'arrête à la prochaine étape ou au prochain lot de rayons
+        (une segmentation en cours va jusqu'à son terme) et son résultat est
+        ignoré. Les boutons ne sont réactivés que lorsque poll_task constate
+        sa fin : une nouvelle tâche ne peut pas s'exécuter en même temps.
+        """
+        if self.tache is None or self.tache.annulation.is_set():
+            return
+        self.tache.annulation.set()
+        self.cancel_button.config(state="disabled")
+        self.feedback.config(text="Annulation en cours...")
+
+    def end_task(self):
+        """Oublie la tâche en cours et réactive les boutons."""
+        self.tache = None
+        self.tache_fin = None
+        self.progress['value'] = 0.0
+        self.set_busy(False)
+
+    def set_busy(self, occupe):
+        """Désactive les actions (et active l'annulation) pendant une tâche."""
+        for bouton in self.action_buttons:
+            bouton.config(state="disabled" if occupe else "normal")
+        self.cancel_button.config(state="normal" if occupe else "disabled")
+
     def load_image(self):
         """Charger une image depuis le fichier."""
-        try:
-            file_path = filedialog.askopenfilename(
-                title="Sélectionner une image",
-                filetypes=[("Images", "*.png;*.jpg;*.jpeg")]
-            )
-            if not file_path:
-                self.feedback.config(text="Aucune image sélectionnée.")
-                return
-            
+        file_path = filedialog.askopenfilename(
+            title="Sélectionner une image",
+            filetypes=[("Images", "*.png;*.jpg;*.jpeg")]
+        )
+        if not file_path:
+            self.feedback.config(text="Aucune image sélectionnée.")
+            return
+
+        def calcul(tache):
+            image = Image.open(file_path)
+            image.load()
+            tache.progression("Conversion en niveaux de gris...", 0.5)
+            # Le fichier n'est décodé qu'une fois : les niveaux de gris,
+            # réutilisés par chaque étape, sont tirés de l'image affichée
+            if image.mode not in ('L', 'RGB', 'RGBA'):
+                image = image.convert('RGB')
+            return image, charger_image(np.asarray(image))
+
+        def fin(resultat):
+            self.reset_state()
             self.image_path = file_path
-            self.image = Image.open(file_path)
-            self.display_image(self.image)
+            self.image, self.image_grise = resultat
+            self.refresh_display()
             self.feedback.config(text="Image chargée avec succès.")
-        except Exception as e:
-            messagebox.showerror("Erreur", f"Impossible de charger l'image : {str(e)}")
-            self.feedback.config(text="Erreur lors du chargement.")
-    
+
+        self.run_task("Chargement de l'image", calcul, fin, "Impossible de charger l'image")
+
     def display_image(self, img):
         """Afficher une image redimensionnée."""
-        img = img.resize((800, 500))
+        img = img.resize(TAILLE_AFFICHAGE)
         img = ImageTk.PhotoImage(img)
         self.image_label.config(image=img)
         self.image_label.image = img
-    
+
+    def refresh_display(self):
+        """Réaffiche l'image avec la région, les rayons et la signature courants."""
+        if self.image is None:
+            return
+        self.display_image(dessiner_annotations(self.image, self.detected_region, self.rayons_traces,
+                                                self.rayon_gagnant, self.points, self.binary_signature))
+
     def segment_image(self):
         """Segmentation réelle avec extraction depuis le fichier segmentation."""
-        try:
-            # Mise à jour du feedback pour informer l'utilisateur
-            self.feedback.config(text="Segmentation en cours...")
-            self.update_idletasks()
-            
-            # Vérifier si une image est chargée
-            if not self.image_path:
-                messagebox.showerror("Erreur", "Aucune image chargée !")
-                self.feedback.config(text="Erreur : Chargez une image.")
-                return
-                
-            # Appel de la fonction de segmentation
-            min_row, min_col, max_row, max_col = segmentation(self.image_path)
-            
-            # Stocker les coins détectés
-            self.detected_region = [
-                (min_col, min_row),  # C1
-                (max_col, min_row),  # C2
-                (max_col, max_row),  # C3
-                (min_col, max_row)   # C4
-            ]
-            
-            # Mise à jour du feedback
+        # Vérifier si une image est chargée
+        if not self.image_path:
+            messagebox.showerror("Erreur", "Aucune image chargée !")
+            self.feedback.config(text="Erreur : Chargez une image.")
+            return
+        image = self.image_grise
+
+        def fin(candidats):
+            # Stocker les coins détectés (C1 -> C2 suit l'axe du code-barres)
+            self.detected_region = list(candidats[0].coins)
+            self.rayons_traces, self.rayon_gagnant, self.points = [], None, []
+            self.refresh_display()
             self.feedback.config(text="Segmentation terminée.")
-            
-            # Afficher le rectangle détecté sur l'image
-            img = Image.open(self.image_path)
-            img_display = img.copy()
-            # Implémenter l'affichage du rectangle ici
-            
-            self.display_image(img_display)
-            
-        except Exception as e:
-            # Gestion des erreurs avec message d'alerte
-            messagebox.showerror("Erreur", f"Erreur lors de la segmentation : {str(e)}")
-            self.feedback.config(text="Erreur lors de la segmentation.")
+
+        # Appel de la fonction de segmentation (meilleur candidat orienté)
+        self.run_task("Segmentation en cours", lambda tache: segmentation_candidats(image), fin,
+                      "Erreur lors de la segmentation")
+
     def extract_signature(self):
         """Extraction des signatures avec un rayon manuel ou aléatoire."""
-        try:
-            # Feedback initial
-            self.feedback.config(text="Extraction en cours...")
-            self.update_idletasks()
-            
-            # Vérifier si une image est chargée
-            if not self.image_path:
-                messagebox.showerror("Erreur", "Aucune image chargée !")
-                self.feedback.config(text="Erreur : Chargez une image.")
-                return
-                
-            # Vérifier si la segmentation a été réalisée (avec des coins détectés)
-            if not hasattr(self, 'detected_region') or self.detected_region is None:
-                messagebox.showerror("Erreur", "Aucune région détectée. Lancez la segmentation d'abord.")
-                self.feedback.config(text="Erreur : Pas de région détectée.")
-                return
-                
-            # Récupérer les coins détectés pour la zone d'intérêt
-            C1, C2, C3, C4 = self.detected_region  # Coins détectés après segmentation
-            
-            # Vérifier le mode choisi (manuel ou aléatoire)
-            if self.mode_var.get() == "manuel":
-                messagebox.showinfo("Instruction", "Cliquez sur deux points pour définir un rayon.")
-                self.feedback.config(text="Attente de la sélection manuelle...")
-                self.points = []  # Réinitialiser les points pour la sélection manuelle
-                self.canvas.bind("<Button-1>", self.on_click_manual)
-                return
-            elif self.mode_var.get() == "aleatoire":
-                # Générer un rayon aléatoire avec la fonction lancer_aleatoire
-                p1, p2 = lancer_aleatoire(C1, C2, C3, C4)
-                points = (p1, p2)
-                
-                # Appeler la fonction d'extraction pour obtenir la signature binaire
-                self.binary_signature = extract_signature(self.image_path, points[0], points[1])
-                
-                # Vérifier si l'extraction a réussi
-                if self.binary_signature is None:
-                    raise ValueError("Signature non extraite ou invalide.")
-                    
-                # Afficher la signature binaire extraite
-                plt.figure()
-                plt.step(range(len(self.binary_signature)), self.binary_signature, where='mid')
-                plt.title("Signature binaire extraite")
-                plt.xlabel("Position")
-                plt.ylabel("Valeur (0 ou 1)")
-                plt.grid(True)
-                plt.show()
-                
-                # Mise à jour du feedback
-                self.feedback.config(text="Extraction terminée avec succès.")
-        except Exception as e:
-            # Gestion des erreurs
-            messagebox.showerror("Erreur", f"Erreur lors de l'extraction : {str(e)}")
-            self.feedback.config(text="Erreur lors de l'extraction.")
-            
+        # Vérifier si une image est chargée
+        if not self.image_path:
+            messagebox.showerror("Erreur", "Aucune image chargée !")
+            self.feedback.config(text="Erreur : Chargez une image.")
+            return
+
+        # Vérifier si la segmentation a été réalisée (avec des coins détectés)
+        if self.detected_region is None:
+            messagebox.showerror("Erreur", "Aucune région détectée. Lancez la segmentation d'abord.")
+            self.feedback.config(text="Erreur : Pas de région détectée.")
+            return
+
+        # Récupérer les coins détectés pour la zone d'intérêt
+        C1, C2, C3, C4 = self.detected_region  # Coins détectés après segmentation
+
+        # Vérifier le mode choisi (manuel ou aléatoire)
+        if self.mode_var.get() == "manuel":
+            self.feedback.config(text="Cliquez sur deux points de l'image pour définir un rayon.")
+            self.points = []  # Réinitialiser les points pour la sélection manuelle
+            self.refresh_display()
+            self.image_label.bind("<Button-1>", self.on_click_manual)
+        elif self.mode_var.get() == "aleatoire":
+            # Générer un rayon aléatoire avec la fonction lancer_aleatoire
+            p1, p2 = lancer_aleatoire(C1, C2, C3, C4)
+            self.run_extraction(p1, p2)
+
     def on_click_manual(self, event):
         """Gestion des clics pour le rayon manuel."""
         # Convertir les coordonnées du clic en coordonnées de l'image
-        x, y = event.x, event.y
+        largeur, hauteur = TAILLE_AFFICHAGE
+        x = (event.x - (self.image_label.winfo_width() - largeur) / 2) * self.image.width / largeur
+        y = (event.y - (self.image_label.winfo_height() - hauteur) / 2) * self.image.height / hauteur
         self.points.append((x, y))
-        
+
         # Afficher le point sur l'image
-        img_display = self.image.copy()
-        # Implémenter l'affichage des points et du rayon ici
-        
-        self.display_image(img_display)
-        
+        self.refresh_display()
+
         if len(self.points) == 1:
             self.feedback.config(text="Premier point sélectionné. Sélectionnez le second point.")
         elif len(self.points) == 2:
-            self.feedback.config(text="Deux points sélectionnés. Traitement en cours...")
-            self.canvas.unbind("<Button-1>")
-            self.after(100, self.process_manual_extraction)
-    
-    def process_manual_extraction(self):
-        """Traite l'extraction manuelle après sélection des points."""
-        try:
-            p1, p2 = self.points
-            
+            self.image_label.unbind("<Button-1>")
+            self.run_extraction(*self.points)
+
+    def run_extraction(self, p1, p2):
+        """Extrait la signature le long du rayon (p1, p2) dans le thread de calcul."""
+        image = self.image_grise
+
+        def calcul(tache):
             # Extraire la signature le long du rayon défini par les points
-            self.binary_signature = extract_signature(self.image_path, p1, p2)
-            
+            signature = extract_signature(image, p1, p2)
+
             # Vérifier si l'extraction a réussi
-            if self.binary_signature is None:
+            if signature is None:
                 raise ValueError("Signature non extraite ou invalide.")
-                
-            # Afficher la signature binaire extraite
-            plt.figure()
-            plt.step(range(len(self.binary_signature)), self.binary_signature, where='mid')
-            plt.title("Signature binaire extraite")
-            plt.xlabel("Position")
-            plt.ylabel("Valeur (0 ou 1)")
-            plt.grid(True)
-            plt.show()
-            
-            self.feedback.config(text="Extraction manuelle terminée avec succès.")
-        except Exception as e:
-            messagebox.showerror("Erreur", f"Erreur lors de l'extraction manuelle : {str(e)}")
-            self.feedback.config(text="Erreur lors de l'extraction manuelle.")
-    
+            return signature
+
+        def fin(signature):
+            # Afficher le rayon et la signature binaire extraite sur l'image
+            self.binary_signature = signature
+            self.rayons_traces.append(((p1, p2), None))
+            self.refresh_display()
+            self.feedback.config(text="Extraction terminée avec succès.")
+
+        self.run_task("Extraction en cours", calcul, fin, "Erreur lors de l'extraction")
+
     def decode_barcode(self):
-        """Décodage en utilisant la fonction du fichier fonctions.py."""
-        try:
-            # Feedback pour l'utilisateur
-            self.feedback.config(text="Décodage en cours...")
-            self.update_idletasks()
-            
-            # Vérifier si une signature a été extraite
-            if self.binary_signature is None:
-                messagebox.showerror("Erreur", "Aucune signature disponible pour le décodage.")
-                self.feedback.config(text="Erreur : Aucune signature détectée.")
-                return
-                
-            # Appeler la fonction de décodage
-            self.decoded_barcode = decode_ean13_signature(self.binary_signature)
-            
+        """Décodage de la signature binaire extraite."""
+        # Vérifier si une signature a été extraite
+        if self.binary_signature is None:
+            messagebox.showerror("Erreur", "Aucune signature disponible pour le décodage.")
+            self.feedback.config(text="Erreur : Aucune signature détectée.")
+            return
+        signature = self.binary_signature
+
+        def fin(code):
             # Mise à jour du feedback avec le code-barres détecté
+            self.decoded_barcode = code
             self.feedback.config(text=f"Code-barres détecté : {self.decoded_barcode}")
             messagebox.showinfo("Décodage Réussi", f"Code-barres : {self.decoded_barcode}")
-        except Exception as e:
-            # Gestion des erreurs
-            messagebox.showerror("Erreur", f"Erreur lors du décodage : {str(e)}")
-            self.feedback.config(text="Erreur lors du décodage.")
-    
+
+        # Appeler la fonction de décodage
+        self.run_task("Décodage en cours", lambda tache: decode_ean13_signature(signature), fin,
+                      "Erreur lors du décodage")
+
+    def auto_decode(self):
+        """Mode automatique : segmentation, lots de rayons et décodage par consensus."""
+        if not self.image_path:
+            messagebox.showerror("Erreur", "Aucune image chargée !")
+            self.feedback.config(text="Erreur : Chargez une image.")
+            return
+        image = self.image_grise
+        self.detected_region, self.rayons_traces, self.rayon_gagnant, self.points = None, [], None, []
+        self.binary_signature = None
+        self.refresh_display()
+
+        def calcul(tache):
+            candidats = segmentation_candidats(image)
+            tache.verifier()
+            tache.progression(f"{len(candidats)} région(s) candidate(s). Lancer des rayons...", 0.3,
+                              region=candidats[0].coins)
+
+            def suivre(rayons, confiance, lot, codes):
+                tache.progression(f"Rayons : {rayons}/{BUDGET_AUTO} (confiance {confiance:.2f})",
+                                  0.3 + 0.7 * rayons / BUDGET_AUTO,
+                                  rayons=[(tuple(map(tuple, rayon)), code) for rayon, code in zip(lot, codes)])
+                return tache.annulation.is_set()
+
+            resultat = decoder_par_consensus(image, candidats, budget=BUDGET_AUTO,
+                                             taille_lot=TAILLE_LOT_AUTO, progression=suivre)
+            tache.verifier()
+            return resultat
+
+        def fin(resultat):
+            if resultat.rayon is not None:
+                self.detected_region = list(resultat.candidat.coins)
+                self.rayon_gagnant = tuple(map(tuple, resultat.rayon))
+                self.refresh_display()
+            if resultat.code:
+                self.decoded_barcode = resultat.code
+                self.feedback.config(text=f"Code-barres détecté : {resultat.code} "
+                                          f"(confiance {resultat.confiance:.2f}, {resultat.rayons} rayon(s))")
+                messagebox.showinfo("Décodage Réussi", f"Code-barres : {resultat.code}")
+            else:
+                self.feedback.config(text=f"Échec de la détection après {resultat.rayons} rayons.")
+
+        self.run_task("Segmentation en cours", calcul, fin, "Erreur lors du décodage automatique")
+
     def verify_database(self):
         """Vérifier dans la base de données."""
-        try:
-            self.feedback.config(text="Vérification dans la base...")
-            self.update_idletasks()
-            
-            # Vérifier si un code-barres a été décodé
-            if not self.decoded_barcode:
-                messagebox.showwarning("Attention", "Aucun code-barres décodé. Veuillez lancer le décodage d'abord.")
-                self.feedback.config(text="Erreur : Pas de code-barres décodé.")
-                return
-                
-            # Charger la base de données (fichier texte contenant une liste de codes-barres valides)
-            database_path = filedialog.askopenfilename(
-                title="Charger la base de données",
-                filetypes=[("Fichiers texte", "*.txt")]
-            )
-            
-            if not database_path:
-                self.feedback.config(text="Erreur : Aucune base de données sélectionnée.")
-                return
-                
-            # Lire la base de données
-            with open(database_path, 'r') as file:
-                database = [line.strip() for line in file.readlines()]
-                
-            # Vérifier si le code-barres est dans la base
-            if self.decoded_barcode in database:
-                messagebox.showinfo("Résultat", f"Produit trouvé : {self.decoded_barcode}")
-                self.feedback.config(text="Produit trouvé dans la base.")
-            else:
-                messagebox.showwarning("Résultat", f"Produit non trouvé : {self.decoded_barcode}")
-                self.feedback.config(text="Produit non trouvé dans la base.")
-        except Exception as e:
-            # Gestion des erreurs
-            messagebox.showerror("Erreur", f"Erreur lors de la vérification : {str(e)}")
-            self.feedback.config(text="Erreur lors de la vérification.")
-    
-    def reset_app(self):
-        """Réinitialiser l'application."""
+        # Vérifier si un code-barres a été décodé
+        if not self.decoded_barcode:
+            messagebox.showwarning("Attention", "Aucun code-barres décodé. Veuillez lancer le décodage d'abord.")
+            self.feedback.config(text="Erreur : Pas de code-barres décodé.")
+            return
+
+        if self.index_produits is not None:
+            self.show_database_result()
+            return
+
+        # Charger la base de données une seule fois par session (fichier texte
+        # contenant une liste de codes-barres valides, indexé au premier chargement)
+        database_path = filedialog.askopenfilename(
+            title="Charger la base de données",
+            filetypes=[("Base de produits", "*.txt *.npy"), ("Fichiers texte", "*.txt")]
+        )
+
+        if not database_path:
+            self.feedback.config(text="Erreur : Aucune base de données sélectionnée.")
+            return
+
+        def fin(index):
+            self.index_produits = index
+            self.show_database_result()
+
+        self.run_task("Indexation de la base", lambda tache: ouvrir_index(database_path), fin,
+                      "Erreur lors de la vérification")
+
+    def show_database_result(self):
+        """Affiche si le code-barres décodé figure dans la base."""
+        if self.index_produits.contient(self.decoded_barcode):
+            messagebox.showinfo("Résultat", f"Produit trouvé : {self.decoded_barcode}")
+            self.feedback.config(text="Produit trouvé dans la base.")
+        else:
+            messagebox.showwarning("Résultat", f"Produit non trouvé : {self.decoded_barcode}")
+            self.feedback.config(text="Produit non trouvé dans la base.")
+
+    def reset_state(self):
+        """Oublie l'image et les résultats des étapes."""
         self.image = None
         self.image_path = ""
+        self.image_grise = None
         self.binary_signature = None
         self.decoded_barcode = None
-        if hasattr(self, 'detected_region'):
-            del self.detected_region
+        self.detected_region = None
+        self.points = []
+        self.rayons_traces = []
+        self.rayon_gagnant = None
+        self.image_label.unbind("<Button-1>")
+
+    def reset_app(self):
+        """Réinitialiser l'application."""
+        self.cancel_task()
+        self.reset_state()
         self.image_label.config(image="")
         self.feedback.config(text="Réinitialisé.")
-    
+
     def quit_app(self):
-        """Quitter l'application."""
-        plt.close('all')
+        """Quitter l'application (une tâche en cours est abandonnée)."""
+        self.cancel_task()
         self.destroy()
 
 if __name__ == "__main__":
     app = BarcodeApp()
-    app.mainloop()
\ No newline at end of file
+    app.mainloop()
@@ -0,0 +1,274 @@
+"""
+Lecture non interactive de codes-barres sur un grand nombre d'images.
+
+Les images (dossiers, motifs glob, fichiers ou listes de fichiers) sont
+réparties sur un pool de processus ; chaque image produit une ligne JSON
+contenant le code, le statut, le nombre de rayons et la durée de chaque étape.
+Une image en échec n'interrompt pas le traitement.
+
+Utilisation:
+    python batch.py photos/ "scans/*.jpg" -j 8 -o resultats.jsonl
+    python batch.py --liste fichiers.txt --metriques metriques.prom
+    python batch.py captures/*.raw --forme 1080 1920
+    python batch.py entrants/ --cache ~/.cache/codes-barres
+    python batch.py photos/ --produits catalogue.txt
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.npy', '.raw', '.gray')
+
+# Résultats regroupés pour une recherche vectorisée dans le catalogue (--produits)
+TAILLE_LOT_PRODUITS = 64
+
+
+def lister_images(entrees, listes=()):
+    """
+    Développe les entrées de la ligne de commande en une liste de fichiers.
+
+    Paramètres:
+        entrees (list): Dossiers (parcourus récursivement), motifs glob ou fichiers
+        listes (list): Fichiers texte contenant un chemin d'image par ligne
+
+    Retourne:
+        list: Chemins des images, sans doublon, dans l'ordre de découverte
+    """
+    chemins = []
+    for entree in entrees:
+        if os.path.isdir(entree):
+            for racine, _, fichiers in os.walk(entree):
+                chemins.extend(os.path.join(racine, f) for f in sorted(fichiers)
+                               if f.lower().endswith(EXTENSIONS))
+        elif glob.has_magic(entree):
+            chemins.extend(sorted(glob.glob(entree, recursive=True)))
+        else:
+            chemins.append(entree)
+    for liste in listes:
+        with open(liste, 'r') as fichier:
+            chemins.extend(ligne.strip() for ligne in fichier if ligne.strip())
+    return list(dict.fromkeys(chemins))
+
+
+def traiter_image(chemin, dossier_cache=None, taille_cache=None, **options):
+    """
+    Traite une image dans un processus du pool (import local, coût payé une fois par processus).
+
+    Si dossier_cache est donné, chaque processus ouvre une fois le cache de
+    résultats partagé (voir utils.cache), limité à taille_cache octets.
+    """
+    from utils.pipeline import lire_code_barres
+    if dossier_cache is not None:
+        from utils.cache import TAILLE_MAX_DEFAUT, ouvrir_cache
+        options['cache'] = ouvrir_cache(dossier_cache, taille_cache or TAILLE_MAX_DEFAUT)
+    return lire_code_barres(chemin, **options)
+
+
+def traiter_image_mesuree(chemin, **options):
+    """
+    Comme traiter_image, en collectant les métriques de l'image.
+
+    Retourne:
+        tuple: (résultat, instantané des métriques) ; l'instantané est fusionné
+            par le processus principal (voir Instrumentation.fusionner)
+    """
+    from utils import instrumentation
+    mesures = instrumentation.activer()
+    try:
+        return traiter_image(chemin, **options), mesures.instantane()
+    finally:
+        instrumentation.desactiver()
+
+
+def exporter_metriques(mesures, chemin):
+    """Écrit les métriques au format Prometheus (extension .prom) ou JSON."""
+    if chemin.endswith('.prom'):
+        mesures.exporter_prometheus(chemin)
+    else:
+        mesures.exporter_json(chemin)
+
+
+def executer_images(traiter, chemins, nb_processus):
+    """
+    Applique traiter à chaque image sur un pool de processus, résultats dans l'ordre.
+
+    Au plus 2 * nb_processus images sont soumises à la fois. Un processus qui
+    meurt (mémoire épuisée, signal) casse tout le pool : celui-ci est alors
+    recréé et les images qui étaient en cours sont relancées une à une, si
+    bien que seule l'image fautive est en échec. Une exception levée pour une
+    image (cache inaccessible, résultat non sérialisable...) n'interrompt pas
+    non plus les autres.
+
+    Paramètres:
+        traiter (callable): Fonction d'une image (importable par les processus)
+        chemins (list): Images à traiter
+        nb_processus (int): Taille du pool
+
+    Retourne:
+        générateur: Couples (chemin, résultat) ; pour une image en échec, le
+            résultat est l'exception levée (BrokenProcessPool si son
+            processus est mort)
+    """
+    suivants = iter(chemins)
+    en_cours = deque()
+    executor = ProcessPoolExecutor(max_workers=nb_processus)
+    try:
+        while True:
+            for chemin in suivants:
+                en_cours.append((chemin, _soumettre(executor, traiter, chemin)))
+                if len(en_cours) >= 2 * nb_processus:
+                    break
+            if not en_cours:
+                return
+            chemin, future = en_cours.popleft()
+            if not isinstance(future.exception(), BrokenProcessPool):
+                yield chemin, _issue(future)
+                continue
+            # Pool cassé : les images en cours sont relancées isolément
+            suspects = [(chemin, future)] + list(en_cours)
+            en_cours.clear()
+            executor.shutdown(wait=False, cancel_futures=True)
+            executor = ProcessPoolExecutor(max_workers=nb_processus)
+            for chemin, future in suspects:
+                if future.done() and not future.cancelled() and not isinstance(future.exception(),
+                                                                               BrokenProcessPool):
+                    yield chemin, _issue(future)
+                    continue
+                future = executor.submit(traiter, chemin)
+                if isinstance(future.exception(), BrokenProcessPool):
+                    executor.shutdown(wait=False)
+                    executor = ProcessPoolExecutor(max_workers=nb_processus)
+                yield chemin, _issue(future)
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _issue(future):
+    """Résultat d'une future terminée, ou l'exception qu'elle a levée."""
+    erreur = future.exception()
+    return erreur if erreur is not None else future.result()
+
+
+def _soumettre(executor, traiter, chemin):
+    """Soumet une image ; si le pool est déjà cassé, la future porte l'erreur (traitée à sa lecture)."""
+    try:
+        return executor.submit(traiter, chemin)
+    except BrokenProcessPool as e:
+        future = Future()
+        future.set_exception(e)
+        return future
+
+
+def _paquets(iterable, taille):
+    """Regroupe les éléments d'un itérable en listes d'au plus `taille` éléments."""
+    paquet = []
+    for element in iterable:
+        paquet.append(element)
+        if len(paquet) == taille:
+            yield paquet
+            paquet = []
+    if paquet:
+        yield paquet
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lecture de codes-barres EAN-13 par lots.")
+    parser.add_argument('entrees', nargs='*', help="Dossiers, motifs glob ou fichiers image")
+    parser.add_argument('--liste', action='append', default=[],
+                        help="Fichier texte listant une image par ligne (répétable)")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count(),
+                        help="Nombre de processus (défaut : nombre de cœurs)")
+    parser.add_argument('-o', '--sortie', default='-',
+                        help="Fichier JSONL de sortie (défaut : sortie standard)")
+    parser.add_argument('--budget', type=int, default=20, help="Nombre maximal de rayons par image")
+    parser.add_argument('--taille-lot', type=int, default=4, help="Nombre de rayons par lot")
+    parser.add_argument('--confiance', type=float, default=0.75, help="Confiance d'arrêt")
+    parser.add_argument('--mode', choices=('plages', 'modules'), default='plages')
+    parser.add_argument('--seed', type=int, default=0, help="Graine du générateur de rayons")
+    parser.add_argument('--reduction', type=int, choices=(1, 2, 4, 8), default=1,
+                        help="Segmentation sur l'image réduite d'autant (JPEG décodé à résolution réduite)")
+    parser.add_argument('--pyramide', type=int, default=1, metavar='FACTEUR',
+                        help="Segmentation grossière-à-fine : recherche sur l'image réduite d'autant, "
+                             "affinage à pleine résolution")
+    parser.add_argument('--econome', action='store_true',
+                        help="Segmentation en float32, en place (moins de mémoire, voir segmentation)")
+    parser.add_argument('--tuiles', type=int, metavar='TAILLE',
+                        help="Segmentation par tuiles de TAILLE pixels de côté (très grandes images, "
+                             ".npy ou brutes projetées en mémoire)")
+    parser.add_argument('--forme', type=int, nargs=2, metavar=('HAUTEUR', 'LARGEUR'),
+                        help="Dimensions des images brutes 8 bits (.raw, .gray)")
+    parser.add_argument('--cache', metavar='DOSSIER',
+                        help="Cache persistant des résultats (images identiques servies sans décodage)")
+    parser.add_argument('--cache-taille', type=float, default=64,
+                        help="Taille maximale du cache, en Mo (défaut : 64)")
+    parser.add_argument('--produits', metavar='CATALOGUE',
+                        help="Catalogue des codes connus (.txt, indexé au premier usage, ou .npy) : "
+                             "ajoute 'en_base' à chaque résultat")
+    parser.add_argument('--metriques', metavar='FICHIER',
+                        help="Écrit les compteurs et durées par étape (Prometheus si .prom, sinon JSON)")
+    args = parser.parse_args(argv)
+
+    chemins = lister_images(args.entrees, args.liste)
+    if not chemins:
+        parser.error("aucune image à traiter")
+
+    if args.metriques:
+        from utils.instrumentation import Instrumentation
+        mesures = Instrumentation()
+    traiter = partial(traiter_image_mesuree if args.metriques else traiter_image,
+                      budget=args.budget, taille_lot=args.taille_lot,
+                      seuil_confiance=args.confiance, mode=args.mode, seed=args.seed, forme=args.forme,
+                      reduction=args.reduction, facteur_pyramide=args.pyramide, econome=args.econome,
+                      taille_tuile=args.tuiles, dossier_cache=args.cache,
+                      taille_cache=int(args.cache_taille * 1024 * 1024))
+    index_produits = None
+    if args.produits:
+        from utils.produits import ouvrir_index
+        index_produits = ouvrir_index(args.produits)
+    sortie = sys.stdout if args.sortie == '-' else open(args.sortie, 'w')
+    nb_ok = 0
+    try:
+        # Chaque résultat est écrit dès son arrivée ; avec --produits, seuls
+        # TAILLE_LOT_PRODUITS résultats attendent la recherche vectorisée
+        taille_paquet = TAILLE_LOT_PRODUITS if index_produits is not None else 1
+        for paquet in _paquets(executer_images(traiter, chemins, args.workers), taille_paquet):
+            resultats = []
+            for chemin, resultat in paquet:
+                if isinstance(resultat, Exception):
+                    # Échec sur cette image (processus mort, exception) : les autres continuent
+                    from utils.pipeline import resultat_erreur
+                    if isinstance(resultat, BrokenProcessPool):
+                        erreur = "Processus de traitement interrompu (mémoire épuisée ou signal)."
+                    else:
+                        erreur = f"{type(resultat).__name__}: {resultat}"
+                    resultat = resultat_erreur(chemin, erreur)
+                elif args.metriques:
+                    resultat, instantane = resultat
+                    mesures.fusionner(instantane)
+                resultats.append(resultat)
+            if index_produits is not None:
+                # Une seule recherche vectorisée par lot de résultats
+                presents = index_produits.verifier_lot([resultat['code'] for resultat in resultats])
+                for resultat, present in zip(resultats, presents):
+                    resultat['en_base'] = bool(present)
+            for resultat in resultats:
+                nb_ok += resultat['statut'] == 'ok'
+                sortie.write(json.dumps(resultat, ensure_ascii=False) + '\n')
+            sortie.flush()
+    finally:
+        if sortie is not sys.stdout:
+            sortie.close()
+    print(f"{nb_ok}/{len(chemins)} code(s)-barres décodé(s).", file=sys.stderr)
+    if args.metriques:
+        exporter_metriques(mesures, args.metriques)
+
+
+if __name__ == "__main__":
+    main()
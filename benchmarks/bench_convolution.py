@@ -0,0 +1,92 @@
+"""
+Benchmark du moteur de convolution de la segmentation.
+
+Compare, pour plusieurs tailles d'image, la convolution 2D directe
+(convolve2d, l'implémentation d'origine) aux passes séparables et à la FFT,
+vérifie que les résultats coïncident et affiche l'accélération obtenue.
+
+Avec --croisement, mesure pour chaque taille la longueur de noyau à partir de
+laquelle la FFT devient plus rapide que les passes séparables, et la
+constante du modèle de coût de choisir_methode qui s'en déduit.
+
+Utilisation:
+    python -m benchmarks.bench_convolution [--tailles 256 512 1024 2048] [--repetitions 3]
+    python -m benchmarks.bench_convolution --croisement [--tailles 512 1024 2048]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from utils.convolution import choisir_methode, convoluer, noyaux_segmentation
+from utils.segmentation import carte_coherence
+
+
+def chronometrer(fonction, repetitions):
+    """Retourne le meilleur temps (en secondes) sur plusieurs exécutions."""
+    meilleur = float('inf')
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction()
+        meilleur = min(meilleur, time.perf_counter() - debut)
+    return meilleur
+
+
+def croisement(tailles, repetitions, longueurs=(11, 21, 41, 61, 81, 101, 151, 201, 301)):
+    """
+    Longueur de noyau (carré, séparable) à partir de laquelle la FFT l'emporte.
+
+    Affiche, pour chaque taille, le premier noyau pour lequel la FFT est plus
+    rapide, la constante c telle que 2 * longueur = c * log2(nb_pixels) (modèle
+    de choisir_methode) et le choix actuel de choisir_methode pour ce noyau.
+    """
+    rng = np.random.default_rng(0)
+    print(f"{'taille':>8} {'noyau':>6} {'sép. (s)':>10} {'FFT (s)':>10} {'constante':>10} {'choix':>10}")
+    for taille in tailles:
+        image = rng.random((taille, taille))
+        for longueur in longueurs:
+            noyau = np.ones(longueur) / longueur
+            t_sep = chronometrer(lambda: convoluer(image, noyau, noyau, 'separable'), repetitions)
+            t_fft = chronometrer(lambda: convoluer(image, noyau, noyau, 'fft'), repetitions)
+            if t_fft < t_sep:
+                constante = 2 * longueur / np.log2((taille + longueur) ** 2)
+                choix = choisir_methode(image.shape, longueur, longueur)
+                print(f"{taille:>8} {longueur:>6} {t_sep:>10.4f} {t_fft:>10.4f} {constante:>10.1f} {choix:>10}")
+                break
+        else:
+            print(f"{taille:>8} {'> ' + str(longueurs[-1]):>6} (séparable toujours plus rapide)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark des méthodes de convolution.")
+    parser.add_argument('--tailles', type=int, nargs='+', default=[256, 512, 1024, 2048],
+                        help="Côtés des images carrées testées")
+    parser.add_argument('--repetitions', type=int, default=3)
+    parser.add_argument('--croisement', action='store_true',
+                        help="Mesure le seuil de bascule séparable / FFT (constante de choisir_methode)")
+    args = parser.parse_args()
+    if args.croisement:
+        croisement(args.tailles, args.repetitions)
+        return
+
+    rng = np.random.default_rng(0)
+    noyau_v, noyau_h = noyaux_segmentation()['G_x']
+
+    print(f"{'taille':>8} {'méthode':>10} {'noyau (s)':>10} {'D1 (s)':>10} {'accél.':>8} {'écart max':>10}")
+    for taille in args.tailles:
+        image = rng.random((taille, taille))
+        reference = carte_coherence(image, methode='directe')
+        temps_reference = None
+        for methode in ('directe', 'separable', 'fft', 'auto'):
+            t_noyau = chronometrer(lambda: convoluer(image, noyau_v, noyau_h, methode), args.repetitions)
+            t_d1 = chronometrer(lambda: carte_coherence(image, methode=methode), args.repetitions)
+            if temps_reference is None:
+                temps_reference = t_d1
+            ecart = np.abs(carte_coherence(image, methode=methode) - reference).max()
+            print(f"{taille:>8} {methode:>10} {t_noyau:>10.4f} {t_d1:>10.4f} "
+                  f"{temps_reference / t_d1:>7.1f}x {ecart:>10.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""
+Micro-benchmarks par étape : segmentation (normale, économe en mémoire et
+par tuiles), génération de rayons, extraction et décodage, ainsi que le
+temps de démarrage de chaque point d'entrée (voir benchmarks.bench_imports).
+
+Chaque étape est chronométrée séparément pour plusieurs tailles d'image ;
+le rapport JSON donne la latence médiane et au 95e centile, le débit et le
+pic mémoire (tracemalloc, qui suit aussi les allocations NumPy), et le
+temps de démarrage sous les clés 'demarrage@<point d'entrée>'. La commande
+`comparer` confronte deux rapports et signale les régressions au-delà d'un
+seuil, avec un code de retour non nul pour l'intégration continue.
+
+Utilisation:
+    python -m benchmarks.bench_etapes executer -o resultats.json [--tailles 512 1024 2048]
+    python -m benchmarks.bench_etapes comparer reference.json resultats.json [--seuil 0.10]
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from benchmarks.bench_imports import mesurer_points_entree
+from utils.decoder import decode_ean13_signature
+from utils.extraction import extract_signature
+from utils.image import charger_image
+from utils.rays import lancer_aleatoire
+from utils.segmentation import segmentation
+from utils.tuiles import segmentation_tuiles
+
+# Signature EAN-13 valide (5901234123457) pour le décodage
+SIGNATURE_VALIDE = np.array(list(
+    '10100010110100111011001100100110111101001110101010110011011011001000010101110010011101000100101'
+), dtype=int)
+
+
+def image_test(taille, seed=0):
+    """
+    Image synthétique carrée : fond bruité et bloc de barres verticales au centre.
+
+    Retourne:
+        tuple: (ImageGrise, coins) où coins sont les 4 coins (x, y) du bloc
+    """
+    rng = np.random.default_rng(seed)
+    image = np.clip(0.8 + rng.normal(0, 0.05, (taille, taille)), 0, 1)
+    r0, r1 = taille // 3, 2 * taille // 3
+    c0, c1 = taille // 4, 3 * taille // 4
+    largeurs = rng.integers(2, 8, size=taille)
+    x = c0
+    for i, largeur in enumerate(largeurs):
+        if x >= c1:
+            break
+        if i % 2 == 0:
+            image[r0:r1, x:min(x + largeur, c1)] = 0.1
+        x += largeur
+    coins = ((c0, r0), (c1, r0), (c1, r1), (c0, r1))
+    return charger_image(image), coins
+
+
+def mesurer(fonction, repetitions):
+    """
+    Chronomètre une fonction et mesure son pic mémoire.
+
+    Retourne:
+        dict: {'mediane_s', 'p95_s', 'debit_par_s', 'pic_memoire_octets', 'repetitions'}
+    """
+    durees = []
+    fonction()  # Échauffement (caches, noyaux)
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        fonction()
+        durees.append(time.perf_counter() - debut)
+
+    tracemalloc.start()
+    try:
+        fonction()
+        _, pic = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    mediane = float(np.median(durees))
+    return {
+        'mediane_s': mediane,
+        'p95_s': float(np.percentile(durees, 95)),
+        'debit_par_s': 1.0 / mediane if mediane > 0 else float('inf'),
+        'pic_memoire_octets': int(pic),
+        'repetitions': repetitions,
+    }
+
+
+def executer(tailles, repetitions, repetitions_demarrage=5):
+    """
+    Exécute tous les benchmarks.
+
+    Paramètres:
+        tailles (list): Côtés des images synthétiques
+        repetitions (int): Nombre de mesures par étape
+        repetitions_demarrage (int): Lancements de chaque point d'entrée
+            (0 : temps de démarrage non mesuré)
+
+    Retourne:
+        dict: Rapport {'environnement': ..., 'resultats': {'etape@taille': mesures}}
+    """
+    resultats = {}
+    for taille in tailles:
+        image, coins = image_test(taille)
+        # Rayon horizontal au milieu du bloc de barres
+        milieu = (coins[0][1] + coins[3][1]) / 2
+        p1, p2 = (coins[0][0], milieu), (coins[1][0], milieu)
+        etapes = {
+            'segmentation': (lambda: segmentation(image), max(3, repetitions // 10)),
+            'segmentation_econome': (lambda: segmentation(image, econome=True), max(3, repetitions // 10)),
+            'segmentation_tuiles': (lambda: segmentation_tuiles(image, taille_tuile=512),
+                                    max(3, repetitions // 10)),
+            'lancer_aleatoire': (lambda: lancer_aleatoire(*coins), repetitions),
+            'extract_signature': (lambda: extract_signature(image, p1, p2), repetitions),
+        }
+        for nom, (fonction, nb) in etapes.items():
+            resultats[f'{nom}@{taille}'] = mesurer(fonction, nb)
+            print(f"{nom:>24} @ {taille:<5} : {resultats[f'{nom}@{taille}']['mediane_s'] * 1000:9.3f} ms",
+                  file=sys.stderr)
+
+    # Le décodage ne dépend pas de la taille de l'image
+    resultats['decode_ean13_signature'] = mesurer(lambda: decode_ean13_signature(SIGNATURE_VALIDE),
+                                                  repetitions)
+    print(f"{'decode_ean13_signature':>24}         : "
+          f"{resultats['decode_ean13_signature']['mediane_s'] * 1000:9.3f} ms", file=sys.stderr)
+
+    environnement = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'processeur': platform.processor(),
+    }
+    if repetitions_demarrage > 0:
+        reference, demarrages = mesurer_points_entree(repetitions_demarrage)
+        environnement['interpreteur_vide_s'] = reference
+        for nom, mesure in demarrages.items():
+            resultats[f'demarrage@{nom}'] = {**mesure, 'repetitions': repetitions_demarrage}
+            print(f"{'demarrage':>24} @ {nom:<24} : {mesure['demarrage_s'] * 1000:9.3f} ms", file=sys.stderr)
+
+    return {'environnement': environnement, 'resultats': resultats}
+
+
+def comparer(reference, nouveau, seuil):
+    """
+    Compare deux rapports et liste les régressions.
+
+    Une régression est une médiane, un pic mémoire ou un temps de démarrage
+    supérieur de plus de `seuil` (relatif) à la référence.
+
+    Retourne:
+        list: Messages décrivant chaque régression
+    """
+    regressions = []
+    for cle, mesures in sorted(nouveau['resultats'].items()):
+        ancien = reference['resultats'].get(cle)
+        if ancien is None:
+            print(f"{cle:>32} : nouvelle mesure")
+            continue
+        for metrique in ('mediane_s', 'pic_memoire_octets', 'demarrage_s'):
+            if metrique not in ancien or metrique not in mesures:
+                continue
+            avant, apres = ancien[metrique], mesures[metrique]
+            variation = (apres - avant) / avant if avant else 0.0
+            marque = "REGRESSION" if variation > seuil else ""
+            print(f"{cle:>32} {metrique:>20} : {avant:12.6g} -> {apres:12.6g} ({variation:+7.1%}) {marque}")
+            if variation > seuil:
+                regressions.append(f"{cle} {metrique} {variation:+.1%}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Micro-benchmarks par étape.")
+    sous_commandes = parser.add_subparsers(dest='commande', required=True)
+
+    p_exec = sous_commandes.add_parser('executer', help="Exécute les benchmarks")
+    p_exec.add_argument('-o', '--sortie', default='-', help="Fichier JSON (défaut : sortie standard)")
+    p_exec.add_argument('--tailles', type=int, nargs='+', default=[512, 1024, 2048])
+    p_exec.add_argument('--repetitions', type=int, default=30)
+    p_exec.add_argument('--repetitions-demarrage', type=int, default=5,
+                        help="Lancements de chaque point d'entrée (0 : démarrage non mesuré)")
+
+    p_comp = sous_commandes.add_parser('comparer', help="Compare un rapport à une référence")
+    p_comp.add_argument('reference')
+    p_comp.add_argument('nouveau')
+    p_comp.add_argument('--seuil', type=float, default=0.10,
+                        help="Variation relative tolérée (défaut : 0.10)")
+
+    args = parser.parse_args(argv)
+    if args.commande == 'executer':
+        rapport = executer(args.tailles, args.repetitions, args.repetitions_demarrage)
+        texte = json.dumps(rapport, indent=2, ensure_ascii=False)
+        if args.sortie == '-':
+            print(texte)
+        else:
+            with open(args.sortie, 'w') as fichier:
+                fichier.write(texte + '\n')
+        return 0
+
+    with open(args.reference) as fichier:
+        reference = json.load(fichier)
+    with open(args.nouveau) as fichier:
+        nouveau = json.load(fichier)
+    regressions = comparer(reference, nouveau, args.seuil)
+    if regressions:
+        print(f"{len(regressions)} régression(s) au-delà de {args.seuil:.0%}.")
+        return 1
+    print("Aucune régression.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Benchmark du temps de démarrage de chaque point d'entrée.
+
+Chaque commande est lancée dans un nouvel interpréteur (avec -X importtime)
+depuis la racine du dépôt : le temps affiché est le meilleur temps total
+moins celui d'un interpréteur vide, et la dernière colonne indique quelles
+dépendances lourdes ont été importées. Les mêmes mesures figurent dans le
+rapport de benchmarks.bench_etapes (clés 'demarrage@...'), comparé d'une
+version à l'autre par sa commande `comparer`.
+
+Utilisation:
+    python -m benchmarks.bench_imports [--repetitions 5]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dépendances dont l'import coûte cher
+DEPENDANCES_LOURDES = ('numpy', 'scipy', 'skimage', 'matplotlib', 'PIL', 'cv2', 'tkinter')
+
+# Code EAN-13 valide utilisé pour le décodage seul
+CODE_TEST = '4006381333931'
+
+
+def signature_test(code=CODE_TEST):
+    """Signature de 95 bits d'un code EAN-13, sous forme de chaîne de '0' et '1'."""
+    from utils.decoder import CODE_G, CODE_L, CODE_R, PARITE
+    gauche = ''.join((CODE_L if parite == 'L' else CODE_G)[int(chiffre)]
+                     for parite, chiffre in zip(PARITE[int(code[0])], code[1:7]))
+    droite = ''.join(CODE_R[int(chiffre)] for chiffre in code[7:])
+    return '101' + gauche + '01010' + droite + '101'
+
+
+# (nom, arguments de l'interpréteur)
+POINTS_ENTREE = (
+    ('main.py --help', ['main.py', '--help']),
+    ('batch.py --help', ['batch.py', '--help']),
+    ('serveur.py --help', ['serveur.py', '--help']),
+    ('client.py --help', ['client.py', '--help']),
+    ('video.py --help', ['video.py', '--help']),
+    ('import app', ['-c', 'import app']),
+    ('import utils.decoder', ['-c', 'import utils.decoder']),
+    ('import utils.plages', ['-c', 'import utils.plages']),
+    ('import utils.pipeline', ['-c', 'import utils.pipeline']),
+    ('décodage seul', ['-c', 'import sys; from utils.decoder import decode_ean13_signature; '
+                                 'decode_ean13_signature([int(b) for b in sys.argv[1]])', signature_test()]),
+)
+
+def lancer(arguments):
+    """
+    Lance l'interpréteur et mesure sa durée.
+
+    Retourne:
+        tuple: (durée en secondes, modules importés, code de retour)
+    """
+    debut = time.perf_counter()
+    processus = subprocess.run([sys.executable, '-X', 'importtime', *arguments], cwd=RACINE,
+                               stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                               stderr=subprocess.PIPE, text=True)
+    duree = time.perf_counter() - debut
+    modules = {ligne.rsplit('|', 1)[1].strip() for ligne in processus.stderr.splitlines()
+               if ligne.startswith('import time:') and ligne.count('|') == 2}
+    return duree, modules, processus.returncode
+
+
+def mesurer(arguments, repetitions):
+    """Meilleure durée sur plusieurs lancements, et modules importés."""
+    meilleur, modules, code = float('inf'), set(), 0
+    for _ in range(repetitions):
+        duree, modules, code = lancer(arguments)
+        meilleur = min(meilleur, duree)
+    return meilleur, modules, code
+
+
+def mesurer_points_entree(repetitions):
+    """
+    Temps de démarrage de chaque point d'entrée, interpréteur vide déduit.
+
+    Retourne:
+        tuple: (durée de l'interpréteur vide, {nom: {'demarrage_s',
+            'dependances_lourdes', 'code_retour'}})
+    """
+    reference, _, _ = mesurer(['-c', 'pass'], repetitions)
+    mesures = {}
+    for nom, arguments in POINTS_ENTREE:
+        duree, modules, code = mesurer(arguments, repetitions)
+        mesures[nom] = {'demarrage_s': max(0.0, duree - reference),
+                        'dependances_lourdes': [d for d in DEPENDANCES_LOURDES if d in modules],
+                        'code_retour': code}
+    return reference, mesures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du temps de démarrage des points d'entrée.")
+    parser.add_argument('--repetitions', type=int, default=5)
+    args = parser.parse_args()
+
+    reference, mesures = mesurer_points_entree(args.repetitions)
+    print(f"Interpréteur vide : {reference * 1000:.0f} ms")
+    print(f"{'point d entrée':>24} {'démarrage (ms)':>15}  dépendances lourdes importées")
+    for nom, mesure in mesures.items():
+        etat = '' if mesure['code_retour'] == 0 else f"  (code de retour {mesure['code_retour']})"
+        print(f"{nom:>24} {mesure['demarrage_s'] * 1000:>15.0f}  "
+              f"{', '.join(mesure['dependances_lourdes']) or '-'}{etat}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Mesure de bout en bout sur un corpus synthétique (voir benchmarks.synthese).
+
+Pour chaque niveau de dégradation : taux de décodage correct, taux de
+lectures erronées, rayons utilisés par succès et images traitées par seconde.
+
+Utilisation:
+    python -m benchmarks.bout_en_bout corpus/manifeste.jsonl [--budget 20] [-o rapport.json]
+"""
+
+import argparse
+import json
+import os
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from utils.pipeline import lire_code_barres
+
+
+def evaluer(chemin_manifeste, **options):
+    """
+    Décode chaque image du manifeste et agrège les résultats par niveau.
+
+    Paramètres:
+        chemin_manifeste (str): Manifeste produit par benchmarks.synthese
+        **options: Paramètres de lire_code_barres (budget, mode, ...)
+
+    Retourne:
+        dict: {niveau: {'images', 'taux_decodage', 'taux_erreur',
+            'rayons_par_succes', 'images_par_s'}}
+    """
+    dossier = os.path.dirname(chemin_manifeste)
+    par_niveau = defaultdict(list)
+    with open(chemin_manifeste) as manifeste:
+        entrees = [json.loads(ligne) for ligne in manifeste if ligne.strip()]
+
+    for entree in entrees:
+        debut = time.perf_counter()
+        resultat = lire_code_barres(os.path.join(dossier, entree['fichier']), **options)
+        duree = time.perf_counter() - debut
+        par_niveau[entree['niveau']].append((entree['code'], resultat, duree))
+
+    rapport = {}
+    for niveau, lignes in sorted(par_niveau.items()):
+        corrects = [r for code, r, _ in lignes if r['code'] == code]
+        erreurs = [r for code, r, _ in lignes if r['code'] is not None and r['code'] != code]
+        rapport[niveau] = {
+            'images': len(lignes),
+            'taux_decodage': len(corrects) / len(lignes),
+            'taux_erreur': len(erreurs) / len(lignes),
+            'rayons_par_succes': float(np.mean([r['tentatives'] for r in corrects])) if corrects else None,
+            'images_par_s': len(lignes) / sum(d for _, _, d in lignes),
+        }
+    return rapport
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mesure de bout en bout sur un corpus synthétique.")
+    parser.add_argument('manifeste', help="Fichier manifeste.jsonl du corpus")
+    parser.add_argument('--budget', type=int, default=20, help="Nombre maximal de rayons par image")
+    parser.add_argument('--taille-lot', type=int, default=4)
+    parser.add_argument('--confiance', type=float, default=0.75)
+    parser.add_argument('--mode', choices=('plages', 'modules'), default='plages')
+    parser.add_argument('--reduction', type=int, choices=(1, 2, 4, 8), default=1,
+                        help="Segmentation sur l'image réduite (voir lire_code_barres)")
+    parser.add_argument('-o', '--sortie', help="Fichier JSON du rapport")
+    args = parser.parse_args(argv)
+
+    rapport = evaluer(args.manifeste, budget=args.budget, taille_lot=args.taille_lot,
+                      seuil_confiance=args.confiance, mode=args.mode, reduction=args.reduction)
+    print(f"{'niveau':>6} {'images':>7} {'décodés':>8} {'erronés':>8} {'rayons/succès':>14} {'images/s':>9}")
+    for niveau, mesures in rapport.items():
+        rayons = mesures['rayons_par_succes']
+        print(f"{niveau:>6} {mesures['images']:>7} {mesures['taux_decodage']:>8.1%} "
+              f"{mesures['taux_erreur']:>8.1%} {rayons if rayons is None else round(rayons, 1)!s:>14} "
+              f"{mesures['images_par_s']:>9.2f}")
+    if args.sortie:
+        with open(args.sortie, 'w') as fichier:
+            json.dump(rapport, fichier, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Générateur de corpus synthétique EAN-13 pour les mesures de bout en bout.
+
+Les codes sont rendus à partir des mêmes tables L/G/R et de parité que le
+décodeur (utils.decoder), puis dégradés de manière contrôlée : échelle,
+rotation, perspective, flou, éclairage non uniforme, bruit et compression
+JPEG. L'intensité des dégradations dépend d'un niveau (0 = image parfaite).
+La vérité terrain et les paramètres tirés sont écrits dans un manifeste JSONL.
+
+Utilisation:
+    python -m benchmarks.synthese -o corpus/ -n 50 --niveaux 0 1 2 3 [--seed 0]
+"""
+
+import argparse
+import io
+import json
+import os
+
+import numpy as np
+from PIL import Image
+from scipy.ndimage import gaussian_filter
+from skimage.transform import estimate_transform, rescale, rotate, warp
+
+from utils.decoder import CODE_G, CODE_L, CODE_R, PARITE
+
+# Plages des dégradations par niveau (valeurs tirées uniformément)
+NIVEAUX = {
+    0: {'module': (3.0, 3.0), 'rotation': (0, 0), 'perspective': (0, 0), 'flou': (0, 0),
+        'bruit': (0, 0), 'eclairage': (0, 0), 'jpeg': None},
+    1: {'module': (2.5, 4.0), 'rotation': (-5, 5), 'perspective': (0, 0.02), 'flou': (0, 0.6),
+        'bruit': (0, 0.02), 'eclairage': (0, 0.2), 'jpeg': (80, 95)},
+    2: {'module': (2.0, 4.5), 'rotation': (-20, 20), 'perspective': (0, 0.05), 'flou': (0.5, 1.2),
+        'bruit': (0.02, 0.05), 'eclairage': (0.2, 0.4), 'jpeg': (50, 80)},
+    3: {'module': (1.6, 5.0), 'rotation': (-45, 45), 'perspective': (0.03, 0.1), 'flou': (1.0, 2.0),
+        'bruit': (0.05, 0.1), 'eclairage': (0.3, 0.6), 'jpeg': (20, 50)},
+}
+
+
+def cle_controle(chiffres12):
+    """Clé de contrôle EAN-13 d'une chaîne de 12 chiffres."""
+    total = sum(int(c) * (3 if i % 2 else 1) for i, c in enumerate(chiffres12))
+    return str((10 - total % 10) % 10)
+
+
+def code_aleatoire(rng):
+    """Code EAN-13 valide tiré au hasard."""
+    chiffres12 = ''.join(str(d) for d in rng.integers(0, 10, 12))
+    return chiffres12 + cle_controle(chiffres12)
+
+
+def bits_ean13(code):
+    """
+    Signature de 95 bits d'un code EAN-13 (1 pour une barre).
+
+    Paramètres:
+        code (str): 13 chiffres (ou 12, la clé est alors ajoutée)
+
+    Retourne:
+        str: Chaîne de 95 caractères '0' / '1'
+    """
+    if len(code) == 12:
+        code += cle_controle(code)
+    if len(code) != 13 or not code.isdigit() or cle_controle(code[:12]) != code[12]:
+        raise ValueError(f"Code EAN-13 invalide : {code}")
+    chiffres = [int(c) for c in code]
+    bits = '101'
+    for parite, chiffre in zip(PARITE[chiffres[0]], chiffres[1:7]):
+        bits += (CODE_L if parite == 'L' else CODE_G)[chiffre]
+    bits += '01010'
+    bits += ''.join(CODE_R[chiffre] for chiffre in chiffres[7:])
+    return bits + '101'
+
+
+def rendre_code_barres(code, module=3.0, hauteur=None, zone_blanche=15):
+    """
+    Rend un code EAN-13 net (barres noires sur fond blanc).
+
+    Paramètres:
+        code (str): Code EAN-13
+        module (float): Largeur d'un module en pixels (peut être non entière)
+        hauteur (int, optionnel): Hauteur des barres (défaut : 60 modules)
+        zone_blanche (int): Marge blanche autour du code, en modules
+
+    Retourne:
+        np.ndarray: Image float64 dans [0, 1]
+    """
+    bits = np.array([int(b) for b in bits_ean13(code)])
+    hauteur = hauteur or int(60 * module)
+    marge = int(zone_blanche * module)
+    largeur = int(np.ceil(95 * module)) + 2 * marge
+    # Couverture de chaque colonne par les barres (anticrénelage horizontal)
+    x = np.arange(largeur) - marge
+    bords = np.arange(96) * module
+    couverture = np.zeros(largeur)
+    for i in np.nonzero(bits)[0]:
+        couverture += np.clip(np.minimum(x + 1, bords[i + 1]) - np.maximum(x, bords[i]), 0, 1)
+    image = np.ones((hauteur + 2 * marge, largeur))
+    image[marge:marge + hauteur] -= couverture
+    return image
+
+
+def degrader(image, niveau, rng):
+    """
+    Applique les dégradations d'un niveau à une image.
+
+    Retourne:
+        tuple: (image dégradée, paramètres tirés)
+    """
+    plages = NIVEAUX[niveau]
+    tirage = {nom: float(rng.uniform(*plage)) for nom, plage in plages.items()
+              if nom not in ('module', 'jpeg')}
+
+    image = rotate(image, tirage['rotation'], resize=True, mode='constant', cval=1.0)
+
+    if tirage['perspective'] > 0:
+        h, w = image.shape
+        source = np.array([[0, 0], [w, 0], [w, h], [0, h]], dtype=float)
+        cible = source + rng.uniform(-1, 1, (4, 2)) * tirage['perspective'] * np.array([w, h])
+        transformation = estimate_transform('projective', cible, source)
+        image = warp(image, transformation, mode='constant', cval=1.0)
+
+    if tirage['flou'] > 0:
+        image = gaussian_filter(image, tirage['flou'])
+
+    if tirage['eclairage'] > 0:
+        h, w = image.shape
+        angle = rng.uniform(0, 2 * np.pi)
+        yy, xx = np.mgrid[0:h, 0:w]
+        rampe = (np.cos(angle) * xx / w + np.sin(angle) * yy / h)
+        rampe = (rampe - rampe.min()) / max(np.ptp(rampe), 1e-12)
+        image = image * (1 - tirage['eclairage'] * rampe)
+
+    if tirage['bruit'] > 0:
+        image = image + rng.normal(0, tirage['bruit'], image.shape)
+
+    image = np.clip(image, 0, 1)
+    if plages['jpeg'] is not None:
+        tirage['jpeg'] = int(rng.integers(*plages['jpeg']))
+        tampon = io.BytesIO()
+        Image.fromarray((image * 255).astype(np.uint8)).save(tampon, format='JPEG',
+                                                             quality=tirage['jpeg'])
+        image = np.asarray(Image.open(tampon), dtype=np.float64) / 255
+    return image, tirage
+
+
+def generer_image(code, niveau, rng, echelle=1.0):
+    """
+    Rend puis dégrade un code.
+
+    Paramètres:
+        code (str): Code EAN-13
+        niveau (int): Niveau de dégradation (clé de NIVEAUX)
+        rng (np.random.Generator): Générateur aléatoire
+        echelle (float): Facteur d'échelle final (taille de l'image produite)
+
+    Retourne:
+        tuple: (image uint8, paramètres)
+    """
+    module = float(rng.uniform(*NIVEAUX[niveau]['module']))
+    image, parametres = degrader(rendre_code_barres(code, module), niveau, rng)
+    if echelle != 1.0:
+        image = rescale(image, echelle, anti_aliasing=echelle < 1)
+    parametres['module'] = module * echelle
+    return (np.clip(image, 0, 1) * 255).astype(np.uint8), parametres
+
+
+def generer_corpus(dossier, nb_par_niveau, niveaux, seed=0, echelle=1.0, format_image='png'):
+    """
+    Écrit un corpus d'images (PNG, ou JPEG de qualité 95) et son manifeste
+    `manifeste.jsonl`.
+
+    Retourne:
+        str: Chemin du manifeste
+    """
+    os.makedirs(dossier, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    chemin_manifeste = os.path.join(dossier, 'manifeste.jsonl')
+    with open(chemin_manifeste, 'w') as manifeste:
+        for niveau in niveaux:
+            for i in range(nb_par_niveau):
+                code = code_aleatoire(rng)
+                image, parametres = generer_image(code, niveau, rng, echelle)
+                nom = f'n{niveau}_{i:05d}.{format_image}'
+                Image.fromarray(image).save(os.path.join(dossier, nom), quality=95)
+                manifeste.write(json.dumps({'fichier': nom, 'code': code, 'niveau': niveau,
+                                            'parametres': parametres}) + '\n')
+    return chemin_manifeste
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Génère un corpus synthétique EAN-13.")
+    parser.add_argument('-o', '--dossier', required=True, help="Dossier de sortie")
+    parser.add_argument('-n', '--nombre', type=int, default=50, help="Images par niveau")
+    parser.add_argument('--niveaux', type=int, nargs='+', default=sorted(NIVEAUX),
+                        choices=sorted(NIVEAUX))
+    parser.add_argument('--echelle', type=float, default=1.0, help="Facteur d'échelle des images")
+    parser.add_argument('--format', choices=('png', 'jpg'), default='png', help="Format des images")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    chemin = generer_corpus(args.dossier, args.nombre, args.niveaux, args.seed, args.echelle, args.format)
+    print(f"Manifeste écrit : {chemin}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Client du démon de lecture (voir serveur.py).
+
+Le client n'importe que la bibliothèque standard : son démarrage est
+immédiat, tout le calcul étant fait par les processus déjà chauds du démon.
+Chaque image produit une ligne JSON, comme batch.py.
+
+Protocole (une requête puis une réponse par ligne, en JSON, sur le socket):
+    {"id": 1, "chemin": "/abs/photo.jpg", "options": {"budget": 20}}
+    {"id": 2, "octets": "<contenu du fichier en base64>"}
+    {"commande": "etat"} ou {"commande": "arret"}
+
+Utilisation:
+    python client.py photo.jpg
+    python client.py scans/*.jpg --octets -c 4
+    python client.py --etat
+"""
+
+import argparse
+import base64
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+
+# Socket du démon par défaut (propre à l'utilisateur)
+SOCKET_DEFAUT = os.environ.get('CODEBARRES_SOCKET') or os.path.join(
+    tempfile.gettempdir(), f"codes-barres-{os.getuid()}.sock")
+
+# Taille maximale d'une requête (une ligne JSON, image en base64 comprise)
+TAILLE_MAX_REQUETE = 64 * 1024 * 1024
+
+
+class Connexion:
+    """
+    Connexion au démon ; les requêtes d'une connexion sont traitées dans l'ordre.
+
+    Exemple:
+        with Connexion() as connexion:
+            resultat = connexion.lire("photo.jpg")
+    """
+
+    def __init__(self, chemin_socket=SOCKET_DEFAUT, delai=None):
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.settimeout(delai)
+        self._socket.connect(chemin_socket)
+        self._fichier = self._socket.makefile('rwb')
+
+    def requete(self, requete):
+        """Envoie une requête (dict) et renvoie la réponse du démon (dict)."""
+        self._fichier.write(json.dumps(requete).encode() + b'\n')
+        self._fichier.flush()
+        ligne = self._fichier.readline()
+        if not ligne:
+            raise ConnectionError("Connexion fermée par le démon.")
+        return json.loads(ligne)
+
+    def lire(self, chemin, octets=False, **options):
+        """
+        Lit le code-barres d'une image.
+
+        Paramètres:
+            chemin (str): Fichier image
+            octets (bool): Envoie le contenu du fichier plutôt que son chemin
+                (démon sur une autre arborescence, fichier temporaire...)
+            **options: Paramètres de lire_code_barres (budget, mode...)
+
+        Retourne:
+            dict: Résultat de lire_code_barres, 'image' valant `chemin`
+        """
+        requete = {'options': options}
+        if octets:
+            with open(chemin, 'rb') as fichier:
+                requete['octets'] = base64.b64encode(fichier.read()).decode('ascii')
+        else:
+            requete['chemin'] = os.path.abspath(chemin)
+        resultat = self.requete(requete)
+        # Chemin tel que donné, y compris pour les réponses 'occupe' et d'erreur
+        resultat['image'] = chemin
+        return resultat
+
+    def fermer(self):
+        """Ferme la connexion (sans erreur si le démon l'a déjà fermée)."""
+        try:
+            self._fichier.close()
+        except OSError:
+            pass
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+        return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Client du démon de lecture de codes-barres.")
+    parser.add_argument('images', nargs='*', help="Fichiers image")
+    parser.add_argument('--socket', default=SOCKET_DEFAUT, help=f"Socket du démon (défaut : {SOCKET_DEFAUT})")
+    parser.add_argument('--octets', action='store_true',
+                        help="Envoie le contenu des fichiers plutôt que leur chemin")
+    parser.add_argument('-c', '--connexions', type=lambda v: max(1, int(v)), default=1,
+                        help="Nombre de connexions simultanées au démon")
+    parser.add_argument('--budget', type=int, help="Nombre maximal de rayons par image")
+    parser.add_argument('--mode', choices=('plages', 'modules'))
+    parser.add_argument('--reduction', type=int, choices=(1, 2, 4, 8))
+    parser.add_argument('--econome', action='store_true', help="Segmentation en float32 et en place")
+    parser.add_argument('--etat', action='store_true', help="Affiche l'état du démon")
+    parser.add_argument('--arreter', action='store_true',
+                        help="Arrête le démon (après les requêtes en cours)")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.etat or args.arreter:
+            with Connexion(args.socket) as connexion:
+                reponse = connexion.requete({'commande': 'arret' if args.arreter else 'etat'})
+            print(json.dumps(reponse, ensure_ascii=False))
+            return 0
+    except (FileNotFoundError, ConnectionRefusedError):
+        print(f"Démon injoignable sur {args.socket} (lancer : python serveur.py)", file=sys.stderr)
+        return 1
+    if not args.images:
+        parser.error("aucune image à lire")
+    options = {nom: valeur for nom, valeur in
+               (('budget', args.budget), ('mode', args.mode), ('reduction', args.reduction),
+                ('econome', args.econome or None))
+               if valeur is not None}
+
+    # Chaque connexion lit les images d'indice i, i + n, i + 2n...
+    resultats = [None] * len(args.images)
+    injoignable = []
+
+    def lire(debut):
+        try:
+            connexion = Connexion(args.socket)
+        except (FileNotFoundError, ConnectionRefusedError):
+            injoignable.append(debut)
+            return
+        try:
+            for i in range(debut, len(args.images), args.connexions):
+                try:
+                    resultats[i] = connexion.lire(args.images[i], octets=args.octets, **options)
+                except ConnectionError:
+                    return  # démon arrêté : les images restantes sont en erreur
+                except OSError as e:
+                    # Image illisible (mode --octets) : le démon n'est pas en cause
+                    resultats[i] = {'image': args.images[i], 'code': None, 'statut': 'erreur',
+                                    'erreur': f"{type(e).__name__}: {e}"}
+        finally:
+            connexion.fermer()
+
+    fils = [threading.Thread(target=lire, args=(i,)) for i in range(args.connexions)]
+    for fil in fils:
+        fil.start()
+    for fil in fils:
+        fil.join()
+    if len(injoignable) == len(fils):
+        print(f"Démon injoignable sur {args.socket} (lancer : python serveur.py)", file=sys.stderr)
+        return 1
+
+    for i, resultat in enumerate(resultats):
+        if resultat is None:
+            resultat = {'image': args.images[i], 'code': None, 'statut': 'erreur',
+                        'erreur': "Connexion au démon interrompue."}
+        print(json.dumps(resultat, ensure_ascii=False))
+    nb_ok = sum(resultat is not None and resultat['statut'] == 'ok' for resultat in resultats)
+    print(f"{nb_ok}/{len(resultats)} code(s)-barres décodé(s).", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
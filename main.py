@@ -1,64 +1,76 @@
+import argparse
 import os
-from utils.segmentation import segmentation
-from utils.rays import lancer_aleatoire
-from utils.extraction import extract_signature
-from utils.decoder import decode_ean13_signature
 
-def main():
+def main(argv=None):
     """
     Programme principal :
     1. Charge une image fournie par l'utilisateur.
-    2. Effectue la segmentation pour détecter la région d'intérêt.
-    3. Lance des rayons aléatoires pour extraire des signatures.
-    4. Tente de décoder le code-barres EAN-13 jusqu'à réussir ou atteindre la limite.
+    2. Effectue la segmentation pour détecter les régions candidates orientées.
+    3. Lance des rayons stratifiés (du centre vers les bords), le long de
+       l'axe du code-barres, en commençant par les meilleurs candidats.
+    4. Accumule les votes des rayons jusqu'à atteindre la confiance demandée
+       ou épuiser le budget de rayons.
+    
+    Si la variable d'environnement CODEBARRES_CACHE désigne un dossier, les
+    résultats y sont conservés (voir utils.cache) : une image déjà lue est
+    servie sans être décodée.
     """
+    parser = argparse.ArgumentParser(
+        description="Lecture interactive d'un code-barres EAN-13 (le chemin de l'image est demandé).")
+    parser.parse_args(argv)
+
+    # Modules de calcul importés après les arguments : --help ne les charge pas
+    from utils.image import EXTENSIONS_BRUTES
+    from utils.cache import CacheResultats
+    from utils.pipeline import STATUT_AUCUNE_REGION, STATUT_OK, lire_code_barres
+
     # Demande à l'utilisateur de fournir un chemin d'image valide
     image_path = input("Veuillez entrer le chemin du fichier image : ")
     while not os.path.exists(image_path):
         print("Fichier introuvable. Veuillez réessayer.")
         image_path = input("Veuillez entrer un chemin valide : ")
 
-    # Étape 1 : Segmentation pour détecter la région d'intérêt
-    try:
-        min_row, min_col, max_row, max_col = segmentation(image_path)
-        print("Segmentation réussie. Région détectée.")
-    except Exception as e:
-        print(f"Erreur lors de la segmentation : {e}")
-        return
+    # Une image brute 8 bits n'indique pas ses dimensions
+    forme = None
+    if image_path.lower().endswith(EXTENSIONS_BRUTES):
+        forme = tuple(int(v) for v in input("Dimensions de l'image brute (hauteur largeur) : ").split())
 
-    # Définir les coins de la région détectée
-    p1 = (min_col, min_row)
-    p2 = (max_col, min_row)
-    p3 = (max_col, max_row)
-    p4 = (min_col, max_row)
+    # Paramètres de la recherche par rayons (étape 2)
+    max_attempts = 20  # Budget de rayons
+    seed = 0  # Graine du générateur de rayons (latence reproductible)
+    # Mode de décodage : 'plages' (largeurs des barres, module non entier,
+    # deux sens de lecture) ou 'modules' (95 modules lus en leur centre)
+    mode = 'plages'
+    # Lots de rayons traités en parallèle (1 : séquentiel ; le résultat ne
+    # dépend pas du nombre de threads)
+    nb_threads = 1
 
-    # Étape 2 : Recherche d'un code-barres en lançant des rayons aléatoires
-    max_attempts = 20  # Limite d'essais
-    attempt = 0
-    code_barres = None
-    while attempt < max_attempts:
-        print(f"Tentative {attempt + 1}/{max_attempts}...")
-        # Générer un rayon aléatoire
-        point1, point2 = lancer_aleatoire(p1, p2, p3, p4)
-        # Extraire la signature le long du rayon généré
-        signature_95bits = extract_signature(image_path, point1, point2)
-        if signature_95bits is not None:
-            try:
-                # Tenter de décoder la signature
-                code_barres = decode_ean13_signature(signature_95bits)
-                print(f"Code-barres détecté : {code_barres}")
-                break  # Arrêter la boucle si un code valide est trouvé
-            except ValueError as e:
-                print(f"Erreur de décodage : {e}")
-        else:
-            print("Signature non valide ou non extraite correctement.")
-        attempt += 1
+    # Cache des résultats, adressé par le contenu de l'image et les paramètres
+    cache = None
+    if os.environ.get('CODEBARRES_CACHE'):
+        cache = CacheResultats(os.environ['CODEBARRES_CACHE'])
 
-    # Étape 3 : Résultat final
-    if code_barres:
-        print(f"Code-barres final détecté : {code_barres}")
+    # Chargement, segmentation en régions candidates orientées, puis lots de
+    # rayons stratifiés répartis entre les candidats jusqu'à la confiance
+    # demandée (voir utils.pipeline.lire_code_barres)
+    resultat = lire_code_barres(image_path, budget=max_attempts, taille_lot=4, mode=mode, seed=seed,
+                                nb_threads=nb_threads, forme=forme, cache=cache)
+
+    # Résultat final
+    if resultat['statut'] == STATUT_OK and resultat['cache']:
+        print(f"Code-barres final détecté : {resultat['code']} (résultat en cache)")
+        return
+    if resultat['statut'] == STATUT_OK:
+        print(f"Code-barres final détecté : {resultat['code']} "
+              f"(confiance {resultat['confiance']:.2f}, {resultat['tentatives']} rayon(s))")
+    elif resultat['statut'] == STATUT_AUCUNE_REGION:
+        print(f"Erreur lors de la segmentation : {resultat['erreur']}")
+    elif resultat['erreur']:
+        print(f"Erreur lors de la lecture de l'image : {resultat['erreur']}")
     else:
-        print("Échec de la détection après plusieurs tentatives.")
+        print(f"Échec de la détection après {resultat['tentatives']} rayons.")
+    durees = ', '.join(f"{etape} {duree * 1000:.0f} ms" for etape, duree in resultat['temps'].items())
+    print(f"Durées : {durees}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,306 @@
+"""
+Démon de lecture de codes-barres, à l'écoute d'un socket Unix.
+
+Lancer `python main.py` pour chaque image paie l'import de NumPy, SciPy et
+scikit-image et le calcul des noyaux avant tout décodage. Le démon paie ce
+coût une seule fois : un pool de processus est démarré et préchauffé
+(modules importés, noyaux calculés, une lecture à blanc), puis chaque
+requête reçue sur le socket est confiée à un processus déjà prêt.
+
+Plusieurs clients peuvent être connectés en même temps (un thread par
+connexion). Les requêtes en attente d'un processus sont limitées : au-delà,
+le démon répond immédiatement avec le statut 'occupe' plutôt que
+d'accumuler du retard. SIGTERM, SIGINT ou la commande 'arret' arrêtent le
+démon proprement : il n'accepte plus de connexion, termine les requêtes en
+cours puis supprime son socket. Si un processus meurt pendant une lecture
+(mémoire épuisée, signal), les requêtes qu'il servait reçoivent le statut
+'erreur' et un nouveau pool prend le relais.
+
+Protocole : voir client.py.
+
+Utilisation:
+    python serveur.py -j 4 --file 32
+    python serveur.py --socket /run/codes-barres.sock --cache ~/.cache/codes-barres
+"""
+
+import argparse
+import base64
+import binascii
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from batch import traiter_image
+from client import SOCKET_DEFAUT, TAILLE_MAX_REQUETE
+
+# Statut d'une requête refusée parce que la file d'attente est pleine
+STATUT_OCCUPE = 'occupe'
+
+# Paramètres de lire_code_barres qu'un client peut choisir
+OPTIONS_CLIENT = ('budget', 'taille_lot', 'seuil_confiance', 'mode', 'seed', 'forme', 'reduction',
+                  'facteur_pyramide', 'econome', 'taille_tuile')
+
+# Intervalle (s) auquel le fil principal vérifie si l'arrêt est demandé
+INTERVALLE_ARRET = 0.5
+
+
+def prechauffer():
+    """
+    Initialisation d'un processus du pool : imports, noyaux et lecture à blanc.
+
+    Les modules de calcul n'importent SciPy et scikit-image qu'à leur
+    premier usage : ils sont importés ici explicitement, puis une lecture à
+    blanc d'une petite image fait les premières allocations, hors de toute
+    requête. Les
+    processus ignorent SIGINT et SIGTERM, souvent envoyés à tout le groupe
+    (Ctrl-C, gestionnaire de services) : c'est le démon qui s'arrête, en
+    laissant les lectures en cours se terminer.
+    """
+    for signal_arret in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signal_arret, signal.SIG_IGN)
+    import numpy as np
+    import scipy.ndimage
+    import scipy.signal
+    import skimage.filters
+    import skimage.io
+    import skimage.measure
+    import skimage.morphology
+    from PIL import Image
+    from utils.convolution import noyaux_segmentation
+    from utils.pipeline import lire_code_barres
+    noyaux_segmentation()
+    Image.init()
+    lire_code_barres(np.zeros((64, 64)))
+
+
+def _erreur(message, **champs):
+    """Réponse d'erreur au format des résultats de lire_code_barres."""
+    return {'code': None, 'statut': 'erreur', 'erreur': message, **champs}
+
+
+class ServeurDecodage(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Serveur sur socket Unix, un thread par connexion, calcul dans un pool de processus.
+
+    Attributs:
+        pool (ProcessPoolExecutor): Processus préchauffés, remplacés si l'un d'eux meurt
+        nb_processus (int): Taille du pool
+        capacite (int): Nombre maximal de requêtes en cours ou en attente
+        options (dict): Paramètres transmis à traiter_image (cache...)
+        arret (threading.Event): Positionné quand le démon s'arrête
+    """
+
+    daemon_threads = False
+    block_on_close = True
+
+    def __init__(self, chemin_socket, nb_processus, taille_file, options=None):
+        self.nb_processus = nb_processus
+        self.capacite = nb_processus + taille_file
+        self.options = options or {}
+        self.arret = threading.Event()
+        self._places = threading.BoundedSemaphore(self.capacite)
+        self._en_cours = 0
+        self._connexions = set()
+        self._verrou = threading.Lock()
+        _liberer_socket(chemin_socket)
+        # Pool démarré avant les threads du serveur (fork depuis un processus mono-thread)
+        self.pool = _demarrer_pool(nb_processus)
+        super().__init__(chemin_socket, _Gestionnaire)
+        os.chmod(chemin_socket, 0o600)
+
+    def executer(self, source, options):
+        """
+        Lit une image dans le pool, si la file d'attente n'est pas pleine.
+
+        Retourne:
+            dict: Résultat de lire_code_barres, statut 'occupe' ou 'erreur'
+        """
+        if not self._places.acquire(blocking=False):
+            return _erreur(f"File d'attente pleine ({self.capacite} requêtes).", statut=STATUT_OCCUPE)
+        try:
+            with self._verrou:
+                self._en_cours += 1
+                pool = self.pool
+            try:
+                return pool.submit(traiter_image, source, **{**self.options, **options}).result()
+            except BrokenProcessPool:
+                # Processus mort : les requêtes qu'il servait échouent, les suivantes
+                # vont à un nouveau pool
+                self._remplacer_pool(pool)
+                return _erreur("Processus de traitement interrompu (mémoire épuisée ou signal).")
+            except Exception as e:
+                return _erreur(f"{type(e).__name__}: {e}")
+        finally:
+            with self._verrou:
+                self._en_cours -= 1
+            self._places.release()
+
+    def _remplacer_pool(self, pool):
+        """Remplace un pool cassé (une seule fois, même si plusieurs requêtes l'ont vu casser)."""
+        with self._verrou:
+            if self.pool is not pool:
+                return
+            self.pool = _demarrer_pool(self.nb_processus)
+        pool.shutdown(wait=False)
+
+    def etat(self):
+        """État du démon (réponse à la commande 'etat')."""
+        return {'processus': self.nb_processus, 'capacite': self.capacite,
+                'en_cours': self._en_cours, 'pid': os.getpid()}
+
+    def arreter(self):
+        """Demande l'arrêt du démon (n'attend pas la fin des requêtes en cours)."""
+        self.arret.set()
+
+    def fermer(self):
+        """Arrêt propre : plus de connexion, fin des requêtes en cours, pool et socket libérés."""
+        self.shutdown()
+        # Fin de lecture sur chaque connexion : un client inactif est libéré,
+        # une requête en cours se termine et reçoit sa réponse
+        with self._verrou:
+            connexions = list(self._connexions)
+        for connexion in connexions:
+            try:
+                connexion.shutdown(socket.SHUT_RD)
+            except OSError:
+                pass
+        self.server_close()  # attend les threads des connexions (block_on_close)
+        self.pool.shutdown()
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+
+
+def _demarrer_pool(nb_processus):
+    """Pool de processus préchauffés, démarrés sans attendre la première requête."""
+    pool = ProcessPoolExecutor(nb_processus, initializer=prechauffer)
+    pool.submit(int)  # avec fork, le premier envoi démarre tous les processus
+    return pool
+
+
+def _liberer_socket(chemin_socket):
+    """Supprime le socket d'un démon disparu ; refuse d'écraser celui d'un démon actif."""
+    if not os.path.exists(chemin_socket):
+        return
+    sonde = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sonde.connect(chemin_socket)
+    except ConnectionRefusedError:
+        os.unlink(chemin_socket)
+    else:
+        raise RuntimeError(f"Un démon écoute déjà sur {chemin_socket}")
+    finally:
+        sonde.close()
+
+
+class _Gestionnaire(socketserver.StreamRequestHandler):
+    """Traite les requêtes d'une connexion, une ligne JSON à la fois."""
+
+    def setup(self):
+        super().setup()
+        with self.server._verrou:
+            self.server._connexions.add(self.connection)
+        if self.server.arret.is_set():
+            # Connexion acceptée juste avant l'arrêt : aucune requête ne sera lue
+            self.connection.shutdown(socket.SHUT_RD)
+
+    def finish(self):
+        with self.server._verrou:
+            self.server._connexions.discard(self.connection)
+        super().finish()
+
+    def handle(self):
+        while not self.server.arret.is_set():
+            ligne = self.rfile.readline(TAILLE_MAX_REQUETE + 1)
+            if not ligne:
+                return
+            if len(ligne) > TAILLE_MAX_REQUETE:
+                self._repondre(_erreur(f"Requête trop longue (plus de {TAILLE_MAX_REQUETE} octets)."))
+                return
+            try:
+                self._repondre(self._traiter(ligne))
+            except (BrokenPipeError, ConnectionResetError):
+                return  # client parti avant la réponse
+
+    def _repondre(self, reponse):
+        self.wfile.write(json.dumps(reponse, ensure_ascii=False).encode() + b'\n')
+        self.wfile.flush()
+
+    def _traiter(self, ligne):
+        """Réponse (dict) à une ligne de requête."""
+        try:
+            requete = json.loads(ligne)
+            if not isinstance(requete, dict):
+                raise ValueError("la requête doit être un objet JSON")
+        except ValueError as e:
+            return _erreur(f"Requête invalide : {e}")
+        champs = {'id': requete['id']} if 'id' in requete else {}
+
+        commande = requete.get('commande')
+        if commande == 'etat':
+            return {**self.server.etat(), **champs}
+        if commande == 'arret':
+            self.server.arreter()
+            return {'arret': True, **champs}
+        if commande is not None:
+            return _erreur(f"Commande inconnue : {commande}", **champs)
+
+        options = requete.get('options') or {}
+        inconnues = set(options) - set(OPTIONS_CLIENT)
+        if inconnues:
+            return _erreur(f"Options inconnues : {', '.join(sorted(inconnues))}", **champs)
+        if 'chemin' in requete:
+            source = requete['chemin']
+        elif 'octets' in requete:
+            try:
+                source = base64.b64decode(requete['octets'], validate=True)
+            except (binascii.Error, TypeError) as e:
+                return _erreur(f"Contenu base64 invalide : {e}", **champs)
+        else:
+            return _erreur("La requête doit contenir 'chemin', 'octets' ou 'commande'.", **champs)
+        return {**self.server.executer(source, options), **champs}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Démon de lecture de codes-barres EAN-13 (socket Unix).")
+    parser.add_argument('--socket', default=SOCKET_DEFAUT, help=f"Chemin du socket (défaut : {SOCKET_DEFAUT})")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count(),
+                        help="Nombre de processus préchauffés (défaut : nombre de cœurs)")
+    parser.add_argument('--file', type=int, default=16,
+                        help="Requêtes en attente au-delà des processus occupés (défaut : 16)")
+    parser.add_argument('--cache', metavar='DOSSIER',
+                        help="Cache persistant des résultats (voir batch.py)")
+    parser.add_argument('--cache-taille', type=float, default=64,
+                        help="Taille maximale du cache, en Mo (défaut : 64)")
+    args = parser.parse_args(argv)
+
+    options = {}
+    if args.cache:
+        options = {'dossier_cache': args.cache, 'taille_cache': int(args.cache_taille * 1024 * 1024)}
+    try:
+        serveur = ServeurDecodage(args.socket, args.workers, args.file, options)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    # Les signaux ne font que demander l'arrêt : l'arrêt lui-même a lieu dans le fil principal
+    for signal_arret in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signal_arret, lambda *_: serveur.arreter())
+    fil = threading.Thread(target=serveur.serve_forever, daemon=True)
+    fil.start()
+    print(f"Démon prêt sur {args.socket} ({args.workers} processus, file de {args.file}).",
+          file=sys.stderr)
+    while not serveur.arret.wait(INTERVALLE_ARRET):
+        pass
+    print("Arrêt : fin des requêtes en cours...", file=sys.stderr)
+    serveur.fermer()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+import json
+import os
+import signal
+from concurrent.futures.process import BrokenProcessPool
+
+import batch
+from batch import executer_images
+
+
+def _traiter_ou_mourir(chemin):
+    """Simule un processus tué (mémoire épuisée) ou une exception selon le nom de l'image."""
+    if 'mort' in chemin:
+        os.kill(os.getpid(), signal.SIGKILL)
+    if 'exception' in chemin:
+        raise RuntimeError(f"échec sur {chemin}")
+    return {'image': chemin, 'statut': 'ok'}
+
+
+def test_executer_images_survit_a_un_processus_mort():
+    chemins = [f'image_{i}.png' for i in range(12)]
+    chemins[3] = 'image_mort_3.png'
+    chemins[9] = 'image_mort_9.png'
+    resultats = list(executer_images(_traiter_ou_mourir, chemins, 2))
+    assert [chemin for chemin, _ in resultats] == chemins
+    for chemin, resultat in resultats:
+        if 'mort' in chemin:
+            assert isinstance(resultat, BrokenProcessPool)
+        else:
+            assert resultat == {'image': chemin, 'statut': 'ok'}
+
+
+def test_executer_images_isole_une_exception():
+    chemins = [f'image_{i}.png' for i in range(6)]
+    chemins[2] = 'image_exception_2.png'
+    resultats = dict(executer_images(_traiter_ou_mourir, chemins, 2))
+    assert isinstance(resultats['image_exception_2.png'], RuntimeError)
+    assert all(resultats[chemin] == {'image': chemin, 'statut': 'ok'} for chemin in chemins if 'exception' not in chemin)
+
+
+def test_executer_images_sans_image():
+    assert list(executer_images(_traiter_ou_mourir, [], 2)) == []
+
+
+def test_resultats_ecrits_des_leur_arrivee(tmp_path, monkeypatch):
+    """Chaque ligne JSONL est écrite avant que l'image suivante ne soit rendue ; une exception devient 'erreur'."""
+    sortie = tmp_path / 'resultats.jsonl'
+    lignes_vues = []
+
+    def executer(traiter, chemins, nb_processus):
+        for i, chemin in enumerate(chemins):
+            lignes_vues.append(len(sortie.read_text().splitlines()) if sortie.exists() else 0)
+            yield chemin, RuntimeError("cache inaccessible") if i == 1 else {'image': chemin, 'statut': 'ok',
+                                                                            'code': None}
+
+    monkeypatch.setattr(batch, 'executer_images', executer)
+    chemins = [str(tmp_path / f'image_{i}.png') for i in range(4)]
+    batch.main(chemins + ['-j', '2', '-o', str(sortie)])
+    assert lignes_vues == [0, 1, 2, 3]
+    resultats = [json.loads(ligne) for ligne in sortie.read_text().splitlines()]
+    assert [r['statut'] for r in resultats] == ['ok', 'erreur', 'ok', 'ok']
+    assert resultats[1]['erreur'] == "RuntimeError: cache inaccessible"
+    assert resultats[1]['image'] == chemins[1]
+
+
+def test_colonne_produits(tmp_path, monkeypatch):
+    """Avec --produits, chaque résultat porte 'en_base', y compris au-delà d'un paquet de recherche."""
+    catalogue = tmp_path / 'catalogue.txt'
+    catalogue.write_text('4006381333931\n5901234123457\n')
+    codes = ['4006381333931', '3017620422003', None, '5901234123457']
+
+    def executer(traiter, chemins, nb_processus):
+        for i, chemin in enumerate(chemins):
+            if i == 2:
+                yield chemin, RuntimeError("image illisible")
+            else:
+                code = codes[i % len(codes)]
+                yield chemin, {'image': chemin, 'statut': 'ok' if code else 'echec_decodage', 'code': code}
+
+    monkeypatch.setattr(batch, 'executer_images', executer)
+    sortie = tmp_path / 'resultats.jsonl'
+    chemins = [str(tmp_path / f'image_{i}.png') for i in range(batch.TAILLE_LOT_PRODUITS + 6)]
+    batch.main(chemins + ['--produits', str(catalogue), '-o', str(sortie)])
+    resultats = [json.loads(ligne) for ligne in sortie.read_text().splitlines()]
+    assert [r['image'] for r in resultats] == chemins
+    assert resultats[2]['statut'] == 'erreur'
+    assert [r['en_base'] for r in resultats] == [r.get('code') in ('4006381333931', '5901234123457')
+                                                 for r in resultats]
@@ -0,0 +1,20 @@
+from utils.cache import CacheResultats, empreinte
+
+
+def test_taille_comptee_en_octets(tmp_path):
+    """Un résultat non ASCII compte pour ses octets UTF-8, pas pour ses caractères."""
+    cache = CacheResultats(str(tmp_path), taille_max=3000)
+    resultat = {'erreur': 'é' * 1000}
+    cache.ecrire('a', resultat)
+    taille, = cache._connexion.execute("SELECT taille FROM resultats WHERE cle = 'a'").fetchone()
+    assert taille > 2000
+    # 2 x ~2000 octets dépassent 3000 : l'entrée la plus ancienne est évincée
+    cache.ecrire('b', resultat)
+    assert cache.lire('a') is None
+    assert cache.lire('b') == resultat
+    cache.fermer()
+
+
+def test_empreinte_depend_des_parametres():
+    assert empreinte(b'image', {'budget': 20}) == empreinte(b'image', {'budget': 20})
+    assert empreinte(b'image', {'budget': 20}) != empreinte(b'image', {'budget': 21})
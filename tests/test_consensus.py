@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthese import rendre_code_barres
+from utils import instrumentation
+from utils.consensus import decoder_par_consensus
+from utils.pipeline import lire_code_barres
+from utils.segmentation import Candidat
+
+CODE = '5901234123457'
+
+
+def _candidat_entier(image):
+    """Candidat couvrant toute l'image, axe du code horizontal."""
+    h, w = image.shape
+    return Candidat(coins=((0, 0), (w - 1, 0), (w - 1, h - 1), (0, h - 1)), angle=np.pi / 2,
+                    coherence=1.0, aire=h * w, bbox=(0, 0, h, w))
+
+
+@pytest.mark.parametrize('mode', ['plages', 'modules'])
+@pytest.mark.parametrize('module', [2.0, 3.0, 3.7])
+def test_modes_decodent_un_code_sombre_sur_fond_clair(mode, module):
+    image = rendre_code_barres(CODE, module)
+    resultat = decoder_par_consensus(image, [_candidat_entier(image)], budget=8, taille_lot=4, mode=mode)
+    assert resultat.code == CODE
+
+
+@pytest.mark.parametrize('mode', ['plages', 'modules'])
+def test_modes_lisent_dans_les_deux_sens(mode):
+    image = rendre_code_barres(CODE, 3.0)[:, ::-1]
+    resultat = decoder_par_consensus(image, [_candidat_entier(image)], budget=8, taille_lot=4, mode=mode)
+    assert resultat.code == CODE
+
+
+@pytest.mark.parametrize('budget', [0, 1, 3, 4, 7])
+def test_budget_inferieur_au_nombre_de_candidats(budget):
+    """Chaque rayon va aux meilleurs candidats ; aucun candidat ne reçoit 0 rayon."""
+    image = rendre_code_barres(CODE, 3.0)
+    candidats = [_candidat_entier(image)] * 5
+    resultat = decoder_par_consensus(image, candidats, budget=budget, taille_lot=4)
+    assert resultat.rayons == min(budget, 3)  # arrêt à la 3e lecture concordante
+    # Moins de 3 lectures concordantes : confiance sous 0.75, aucun code retenu
+    assert (resultat.code == CODE) == (budget >= 3)
+
+
+def test_sans_candidat():
+    resultat = decoder_par_consensus(np.ones((20, 20)), [], budget=8)
+    assert resultat.code is None
+    assert resultat.rayons == 0
+
+
+
+@pytest.mark.parametrize('mode', ['plages', 'modules'])
+def test_resultat_independant_du_nombre_de_threads(mode):
+    """Les lots sont accumulés par ordre de priorité : même arrêt, mêmes votes."""
+    image = rendre_code_barres(CODE, 2.3)
+    image = np.clip(image + np.random.default_rng(0).normal(0, 0.3, image.shape), 0, 1)
+    candidats = [_candidat_entier(image)] * 3
+    resultats, suivis = [], []
+    for nb_threads in (1, 4):
+        suivi = []
+        resultats.append(decoder_par_consensus(image, candidats, budget=48, taille_lot=2, mode=mode,
+                                               nb_threads=nb_threads,
+                                               progression=lambda n, c, lot, codes: suivi.append((n, c))))
+        suivis.append(suivi)
+    sequentiel, parallele = resultats
+    assert parallele.code == sequentiel.code == CODE
+    assert parallele.rayons == sequentiel.rayons
+    assert parallele.confiance == sequentiel.confiance
+    np.testing.assert_array_equal(parallele.votes, sequentiel.votes)
+    np.testing.assert_array_equal(parallele.rayon, sequentiel.rayon)
+    assert suivis[0] == suivis[1]
+
+
+@pytest.mark.parametrize('nb_threads', [1, 4])
+def test_rayons_comptes_a_leur_extraction(nb_threads):
+    """Arrêt anticipé : seuls les rayons des lots traités sont comptés, pas tout le budget."""
+    image = rendre_code_barres(CODE, 3.0)
+    mesures = instrumentation.activer()
+    try:
+        resultat = decoder_par_consensus(image, [_candidat_entier(image)] * 2, budget=40, taille_lot=2,
+                                         nb_threads=nb_threads)
+    finally:
+        instrumentation.desactiver()
+    assert resultat.rayons == 4
+    assert mesures.compteurs[('rayons_generes', (('methode', 'stratifie'),))] == resultat.rayons
+
+
+def test_budget_epuise_sous_le_seuil():
+    """Un seul rayon lu (confiance 0.5) : le code n'est pas retenu, la confiance reste renseignée."""
+    image = rendre_code_barres(CODE, 3.0)
+    resultat = decoder_par_consensus(image, [_candidat_entier(image)], budget=1, taille_lot=1)
+    assert resultat.rayons == 1
+    assert resultat.confiance == pytest.approx(0.5)
+    assert resultat.code is None
+    assert resultat.rayon is None
+    assert decoder_par_consensus(image, [_candidat_entier(image)], budget=1, taille_lot=1,
+                                 seuil_confiance=0.5).code == CODE
+
+
+def test_lire_code_barres_sous_le_seuil_en_echec():
+    image = rendre_code_barres(CODE, 3.0)
+    resultat = lire_code_barres(image, budget=2, taille_lot=1)
+    assert resultat['statut'] == 'echec_decodage'
+    assert resultat['code'] is None
+    assert 0 < resultat['confiance'] < 0.75
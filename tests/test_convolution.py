@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from scipy.signal import convolve2d
+
+from utils.convolution import choisir_methode, convoluer, noyaux_segmentation
+from utils.segmentation import tenseur_structure
+
+
+@pytest.mark.parametrize('methode', ['auto', 'directe', 'separable', 'fft'])
+@pytest.mark.parametrize('noyau', ['G_x', 'G_y', 'G'])
+def test_convoluer_identique_a_convolve2d(methode, noyau):
+    """Chaque méthode donne le résultat de convolve2d (mode 'same', bord 'symm')."""
+    image = np.random.default_rng(0).random((61, 83))
+    noyau_v, noyau_h = noyaux_segmentation()[noyau]
+    attendu = convolve2d(image, np.outer(noyau_v, noyau_h), mode='same', boundary='symm')
+    np.testing.assert_allclose(convoluer(image, noyau_v, noyau_h, methode=methode), attendu,
+                               rtol=0, atol=1e-10)
+
+
+def test_convoluer_noyau_plus_grand_que_image():
+    """Le bord symétrique reste correct quand le noyau dépasse l'image."""
+    image = np.random.default_rng(1).random((9, 14))
+    noyau_v, noyau_h = noyaux_segmentation()['G']
+    attendu = convolve2d(image, np.outer(noyau_v, noyau_h), mode='same', boundary='symm')
+    for methode in ('separable', 'fft'):
+        np.testing.assert_allclose(convoluer(image, noyau_v, noyau_h, methode=methode), attendu,
+                                   rtol=0, atol=1e-10)
+
+
+def test_tenseur_structure_independant_de_la_methode():
+    image = np.random.default_rng(2).random((70, 90))
+    reference = tenseur_structure(image, methode='directe')
+    for methode in ('separable', 'fft'):
+        for composante, attendue in zip(tenseur_structure(image, methode=methode), reference):
+            np.testing.assert_allclose(composante, attendue, rtol=0, atol=1e-10)
+
+
+def test_convoluer_methode_inconnue():
+    with pytest.raises(ValueError):
+        convoluer(np.zeros((5, 5)), np.ones(3), np.ones(3), methode='winograd')
+
+
+def test_choix_automatique_de_la_methode():
+    """Noyaux de la segmentation : toujours séparable ; noyaux longs sur grande image : FFT."""
+    taille = len(noyaux_segmentation()['G_x'][0])
+    for cote in (64, 1024, 8192):
+        assert choisir_methode((cote, cote), taille, taille) == 'separable'
+    assert choisir_methode((2048, 2048), 201, 201) == 'fft'
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthese import bits_ean13, code_aleatoire
+from utils.decoder import CODE_G, CODE_L, CODE_R, PARITE, decode_ean13_lot, decode_ean13_signature
+
+
+def _decode_reference(bits):
+    """Décodeur d'origine, motif par motif avec des dictionnaires (référence du test)."""
+    if list(bits[0:3]) != [1, 0, 1]:
+        raise ValueError("Motif de garde gauche incorrect.")
+    if list(bits[45:50]) != [0, 1, 0, 1, 0]:
+        raise ValueError("Motif de garde central incorrect.")
+    if list(bits[92:95]) != [1, 0, 1]:
+        raise ValueError("Motif de garde droit incorrect.")
+    code_L = {motif: str(chiffre) for chiffre, motif in enumerate(CODE_L)}
+    code_G = {motif: str(chiffre) for chiffre, motif in enumerate(CODE_G)}
+    code_R = {motif: str(chiffre) for chiffre, motif in enumerate(CODE_R)}
+    parite = {motif: str(chiffre) for chiffre, motif in enumerate(PARITE)}
+
+    gauche, motif_parite = '', ''
+    for i in range(6):
+        motif = ''.join(map(str, bits[3 + i * 7:10 + i * 7]))
+        if motif in code_L:
+            gauche += code_L[motif]
+            motif_parite += 'L'
+        elif motif in code_G:
+            gauche += code_G[motif]
+            motif_parite += 'G'
+        else:
+            raise ValueError(f"Motif inconnu dans la partie gauche : {motif}")
+    if motif_parite not in parite:
+        raise ValueError(f"Motif de parité inconnu : {motif_parite}")
+    droite = ''
+    for i in range(6):
+        motif = ''.join(map(str, bits[50 + i * 7:57 + i * 7]))
+        if motif not in code_R:
+            raise ValueError(f"Motif inconnu dans la partie droite : {motif}")
+        droite += code_R[motif]
+
+    code = parite[motif_parite] + gauche + droite
+    chiffres = list(map(int, code))
+    total = 3 * sum(chiffres[1:12:2]) + sum(chiffres[0:12:2])
+    cle = (10 - total % 10) % 10
+    if cle != chiffres[-1]:
+        raise ValueError(f"Clé de contrôle invalide : attendu {cle}, obtenu {chiffres[-1]}")
+    return code
+
+
+def _resultat(decodeur, bits):
+    try:
+        return decodeur(bits)
+    except ValueError as e:
+        return str(e)
+
+
+def _signatures_test(nombre, seed=0):
+    """Signatures valides, altérées de quelques bits, et aléatoires aux gardes correctes."""
+    rng = np.random.default_rng(seed)
+    signatures = []
+    for _ in range(nombre):
+        bits = np.array([int(b) for b in bits_ean13(code_aleatoire(rng))])
+        genre = rng.integers(4)
+        if genre == 1:
+            positions = rng.choice(95, rng.integers(1, 4), replace=False)
+            bits[positions] ^= 1
+        elif genre == 2:
+            # Bits de données aléatoires : motifs inconnus, parité ou clé fausses
+            positions = np.r_[3:45, 50:92]
+            bits[positions] = rng.integers(0, 2, len(positions))
+        elif genre == 3:
+            # Un seul chiffre remplacé par un autre motif valide : clé fausse
+            i = rng.integers(6)
+            bits[50 + i * 7:57 + i * 7] = [int(b) for b in CODE_R[rng.integers(10)]]
+        signatures.append(bits)
+    return np.array(signatures)
+
+
+def test_decode_ean13_signature_identique_a_la_reference():
+    """Même code, ou même message d'erreur, que le décodeur d'origine."""
+    for bits in _signatures_test(2000):
+        assert _resultat(decode_ean13_signature, list(bits)) == _resultat(_decode_reference, list(bits))
+
+
+def test_decode_ean13_lot_identique_a_la_reference():
+    signatures = _signatures_test(2000, seed=1)
+    codes, statuts = decode_ean13_lot(signatures)
+    for bits, code, statut in zip(signatures, codes, statuts):
+        attendu = _resultat(_decode_reference, list(bits))
+        if statut == 0:
+            assert code == attendu
+        else:
+            assert code == ''
+            assert not attendu.isdigit()
+
+
+def test_decode_ean13_signature_longueur():
+    with pytest.raises(ValueError):
+        decode_ean13_signature([0] * 94)
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthese import code_aleatoire, rendre_code_barres
+from utils.extraction import extract_signature, extract_signatures
+from utils.rays import lancers_aleatoires
+
+
+@pytest.mark.parametrize('module', [2.0, 2.7, 3.0, 4.2])
+def test_extract_signatures_identique_a_extract_signature(module):
+    """Le passage vectorisé donne, rayon par rayon, la signature de extract_signature."""
+    rng = np.random.default_rng(int(module * 10))
+    image = rendre_code_barres(code_aleatoire(rng), module=module)
+    image = np.clip(image + rng.normal(0, 0.03, image.shape), 0, 1)
+    h, w = image.shape
+    rayons = lancers_aleatoires((0, 0), (w - 1, 0), (w - 1, h - 1), (0, h - 1), 40, rng=rng)
+
+    signatures, echecs = extract_signatures(image, rayons)
+    assert signatures.shape == (len(rayons), 95)
+    for rayon, signature, echec in zip(rayons, signatures, echecs):
+        attendue = extract_signature(image, tuple(rayon[0]), tuple(rayon[1]))
+        if attendue is None:
+            assert echec
+        else:
+            assert not echec
+            np.testing.assert_array_equal(signature, attendue)
+
+
+def test_extract_signatures_profil_uniforme():
+    """Un rayon sur une zone uniforme est un échec, comme pour extract_signature."""
+    image = np.ones((50, 300))
+    signatures, echecs = extract_signatures(image, np.array([[(10, 10), (290, 20)]], dtype=float))
+    assert echecs.tolist() == [True]
+    assert not signatures.any()
+    assert extract_signature(image, (10, 10), (290, 20)) is None
+
+
+def test_extract_signatures_sans_rayon():
+    signatures, echecs = extract_signatures(np.ones((10, 10)), np.zeros((0, 2, 2)))
+    assert signatures.shape == (0, 95)
+    assert echecs.shape == (0,)
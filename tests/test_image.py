@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+from benchmarks.synthese import rendre_code_barres
+from utils.image import charger_image
+from utils.segmentation import segmentation_candidats
+
+
+def _damier(hauteur=30, largeur=40):
+    return ((np.indices((hauteur, largeur)).sum(axis=0) % 2) * 255).astype(np.uint8)
+
+
+def test_forme_ignoree_pour_un_format_decode(tmp_path):
+    """Un PNG se décode normalement même si une forme est donnée (lots mêlant PNG et .raw)."""
+    chemin = tmp_path / 'damier.png'
+    Image.fromarray(_damier()).save(chemin)
+    image = charger_image(str(chemin), forme=(12, 100))
+    assert image.shape == (30, 40)
+    np.testing.assert_array_equal(image.gris, _damier() / 255)
+
+
+def test_image_brute_projetee_avec_sa_forme(tmp_path):
+    chemin = tmp_path / 'damier.raw'
+    _damier().tofile(chemin)
+    image = charger_image(str(chemin), forme=(30, 40))
+    assert isinstance(image.donnees, np.memmap)
+    np.testing.assert_array_equal(image.donnees, _damier())
+
+
+def test_image_brute_sans_forme(tmp_path):
+    chemin = tmp_path / 'damier.gray'
+    _damier().tofile(chemin)
+    with pytest.raises(ValueError):
+        charger_image(str(chemin))
+
+
+@pytest.mark.parametrize('facteur', [2, 4])
+def test_jpeg_reduit_sans_decodage_pleine_resolution(tmp_path, facteur):
+    """Dimensions non divisibles par le facteur : candidats ramenés à pleine résolution sans la décoder."""
+    code = (rendre_code_barres('4006381333931', 12.0, zone_blanche=4) * 255).astype(np.uint8)
+    scene = np.full((code.shape[0] + 3, code.shape[1] + 5), 255, dtype=np.uint8)
+    scene[:code.shape[0], :code.shape[1]] = code
+    chemin = tmp_path / 'code.jpg'
+    Image.fromarray(scene).save(chemin, quality=95)
+    assert scene.shape[0] % facteur and scene.shape[1] % facteur
+
+    np.random.seed(0)
+    reference = segmentation_candidats(charger_image(str(chemin)))[0]
+    image = charger_image(str(chemin), differe=True)
+    np.random.seed(0)
+    candidat = segmentation_candidats(image, reduction=facteur)[0]
+    assert image._donnees is None
+
+    # Le décodeur arrondit la taille réduite au pixel supérieur
+    reduite, echelles = image.reduite(facteur)
+    assert reduite.shape == tuple(-(-n // facteur) for n in scene.shape)
+    assert echelles == (scene.shape[0] / reduite.shape[0], scene.shape[1] / reduite.shape[1])
+    assert candidat.bbox == reference.bbox
+    assert candidat.angle == pytest.approx(reference.angle, abs=0.01)
+    np.testing.assert_allclose(candidat.coins, reference.coins, atol=facteur)
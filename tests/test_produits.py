@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+
+from utils.produits import chemin_index, construire_index, ouvrir_index
+
+CODES = ['4006381333931', '5901234123457', '3017620422003']
+
+
+def _catalogue(chemin, lignes, fin=b'\n'):
+    chemin.write_bytes(fin.join(ligne.encode() for ligne in lignes) + fin)
+    return str(chemin)
+
+
+def test_index_trie_sans_doublon_ni_ligne_invalide(tmp_path):
+    lignes = CODES + [CODES[0], '', 'code', '123', '40063813339310', '400638133393a', '  5901234123457  ']
+    chemin = _catalogue(tmp_path / 'catalogue.txt', lignes)
+    index = np.load(construire_index(chemin))
+    assert index.dtype == np.uint64
+    np.testing.assert_array_equal(index, sorted(int(code) for code in CODES))
+
+
+def test_catalogue_crlf(tmp_path):
+    chemin = _catalogue(tmp_path / 'catalogue.txt', CODES, fin=b'\r\n')
+    index = ouvrir_index(chemin)
+    assert len(index) == len(CODES)
+    assert all(code in index for code in CODES)
+
+
+def test_catalogue_vide(tmp_path):
+    chemin = _catalogue(tmp_path / 'catalogue.txt', ['en-tête'])
+    index = ouvrir_index(chemin)
+    assert len(index) == 0
+    assert not index.contient(CODES[0])
+
+
+def test_index_reconstruit_si_le_catalogue_change(tmp_path):
+    chemin = _catalogue(tmp_path / 'catalogue.txt', CODES[:1])
+    index = ouvrir_index(chemin)
+    assert ouvrir_index(chemin) is index
+    assert os.path.exists(chemin_index(chemin))
+    assert CODES[1] not in index
+
+    _catalogue(tmp_path / 'catalogue.txt', CODES[:2])
+    date = os.path.getmtime(chemin_index(chemin)) + 10
+    os.utime(chemin, (date, date))
+    nouvel_index = ouvrir_index(chemin)
+    assert nouvel_index is not index
+    assert CODES[1] in nouvel_index
+    # L'index .npy s'ouvre aussi directement
+    assert CODES[1] in ouvrir_index(chemin_index(chemin))
+
+
+def test_verifier_lot(tmp_path):
+    index = ouvrir_index(_catalogue(tmp_path / 'catalogue.txt', CODES[1:]))
+    lot = [CODES[0], CODES[1], None, '', '590123412345', '9999999999999', CODES[2], 4006381333931]
+    np.testing.assert_array_equal(index.verifier_lot(lot), [False, True, False, False, False, False, True, False])
+    assert index.contient(CODES[2])
+    assert not index.contient(CODES[0])
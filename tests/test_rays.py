@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from utils.rays import lancers_aleatoires, ordonnancer_rayons, rayons_stratifies
+
+COINS = ((0, 0), (200, 0), (200, 80), (0, 80))
+
+
+def test_rayons_stratifies_sans_rayon():
+    rayons = rayons_stratifies(*COINS, 0)
+    assert rayons.shape == (0, 2, 2)
+    assert list(ordonnancer_rayons(*COINS, 0)) == []
+
+
+def test_rayons_stratifies_reproductibles():
+    np.testing.assert_array_equal(rayons_stratifies(*COINS, 16, seed=3), rayons_stratifies(*COINS, 16, seed=3))
+
+
+def test_rayons_stratifies_du_centre_vers_les_bords():
+    """Le premier rayon est horizontal au centre, puis 1/4 et 3/4 de la hauteur."""
+    rayons = rayons_stratifies(*COINS, 3, perturbation=0)
+    np.testing.assert_allclose(rayons[:, 0, 1], [40, 20, 60])
+    np.testing.assert_allclose(rayons[:, 0, 1], rayons[:, 1, 1])
+
+
+def _ecarts_angulaires(rayons, direction):
+    """Angle (degrés) entre chaque rayon et une direction, au signe près."""
+    vecteurs = rayons[:, 1] - rayons[:, 0]
+    cos = np.abs(vecteurs @ direction) / (np.linalg.norm(vecteurs, axis=1) * np.linalg.norm(direction))
+    return np.degrees(np.arccos(np.clip(cos, 0, 1)))
+
+
+def test_lancers_aleatoires_forme_et_contrainte_d_angle():
+    rayons = lancers_aleatoires(*COINS, 64, rng=0)
+    assert rayons.shape == (64, 2, 2)
+    assert (_ecarts_angulaires(rayons, np.array([1.0, 0.0])) < 30).all()
+
+
+@pytest.mark.parametrize('angle', [np.pi / 2, np.pi / 3, 2 * np.pi / 3])
+def test_lancers_aleatoires_orientes_par_angle(angle):
+    """Région carrée : seule la contrainte d'angle écarte les rayons trop obliques."""
+    carre = ((0, 0), (100, 0), (100, 100), (0, 100))
+    rayons = lancers_aleatoires(*carre, 64, angle=angle, rng=1)
+    assert rayons.shape == (64, 2, 2)
+    direction = np.array([np.sin(angle), -np.cos(angle)])
+    assert (_ecarts_angulaires(rayons, direction) < 30).all()
+
+
+def test_lancers_aleatoires_reproductibles():
+    np.testing.assert_array_equal(lancers_aleatoires(*COINS, 16, rng=7), lancers_aleatoires(*COINS, 16, rng=7))
+    np.testing.assert_array_equal(lancers_aleatoires(*COINS, 16, rng=np.random.default_rng(7)),
+                                  lancers_aleatoires(*COINS, 16, rng=7))
+    assert not np.array_equal(lancers_aleatoires(*COINS, 16, rng=7), lancers_aleatoires(*COINS, 16, rng=8))
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from skimage.transform import rotate
+
+from benchmarks.synthese import generer_image, rendre_code_barres
+from utils.consensus import decoder_par_consensus
+from utils.image import charger_image
+from utils.pipeline import lire_code_barres
+from utils.segmentation import _bruiter, _etiqueter, carte_coherence, segmentation_candidats
+
+CODE = '4006381333931'
+
+
+def _code_tourne(rotation, module=3.0):
+    """Code-barres synthétique tourné de `rotation` degrés (sens trigonométrique)."""
+    return rotate(rendre_code_barres(CODE, module), rotation, resize=True, mode='constant', cval=1.0)
+
+
+def _ecart_angulaire(a, b):
+    """Écart entre deux orientations de barres, en degrés, modulo 180."""
+    ecart = abs(a - b) % 180
+    return min(ecart, 180 - ecart)
+
+
+@pytest.mark.parametrize('rotation', [0, 25, -30, 60, 90])
+def test_orientation_du_meilleur_candidat(rotation):
+    """L'angle des barres suit la rotation du code (barres verticales : 90 degrés)."""
+    np.random.seed(0)
+    candidat = segmentation_candidats(_code_tourne(rotation))[0]
+    assert _ecart_angulaire(np.degrees(candidat.angle), 90 - rotation) < 5
+
+
+@pytest.mark.parametrize('rotation', [0, 25, -30])
+def test_rayons_du_candidat_traversent_les_barres(rotation):
+    """Les rayons lancés entre les coins du candidat décodent le code tourné."""
+    np.random.seed(0)
+    image = _code_tourne(rotation)
+    candidats = segmentation_candidats(image)
+    assert decoder_par_consensus(image, candidats[:1], budget=16, taille_lot=4).code == CODE
+
+
+@pytest.mark.parametrize('niveau, graine', [(1, 0), (1, 1), (2, 0)])
+def test_mode_econome_equivalent_au_float64(niveau, graine):
+    """Mêmes tirages de bruit : D1 à 1e-4 près, mêmes régions, mêmes candidats."""
+    donnees, _ = generer_image(CODE, niveau, np.random.default_rng(graine))
+    image = charger_image(donnees)
+    np.random.seed(0)
+    D1 = carte_coherence(_bruiter(image.gris))
+    np.random.seed(0)
+    D1_econome = carte_coherence(_bruiter(image.donnees, econome=True), econome=True)
+    assert D1_econome.dtype == np.float32
+    assert np.abs(D1 - D1_econome).max() < 1e-4
+    np.testing.assert_array_equal(_etiqueter(D1), _etiqueter(D1_econome))
+
+    np.random.seed(0)
+    candidats = segmentation_candidats(donnees)
+    np.random.seed(0)
+    candidats_econome = segmentation_candidats(donnees, econome=True)
+    assert [c.bbox for c in candidats_econome] == [c.bbox for c in candidats]
+    np.testing.assert_allclose([c.coins for c in candidats_econome], [c.coins for c in candidats], atol=1e-3)
+    np.testing.assert_allclose([c.angle for c in candidats_econome], [c.angle for c in candidats], atol=1e-5)
+
+
+def test_lire_code_barres_econome():
+    donnees, _ = generer_image(CODE, 1, np.random.default_rng(0))
+    np.random.seed(0)
+    resultat = lire_code_barres(donnees, econome=True)
+    assert resultat['statut'] == 'ok'
+    assert resultat['code'] == CODE
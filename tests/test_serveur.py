@@ -0,0 +1,108 @@
+import base64
+import os
+import signal
+import threading
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import batch
+import serveur
+from benchmarks.synthese import generer_image
+from client import Connexion
+from serveur import STATUT_OCCUPE, ServeurDecodage
+
+CODE = '4006381333931'
+
+
+def _traiter_ou_mourir(source, **options):
+    """Simule un processus tué (mémoire épuisée) pour les images dont le nom contient 'mort'."""
+    if isinstance(source, str) and 'mort' in source:
+        os.kill(os.getpid(), signal.SIGKILL)
+    return batch.traiter_image(source, **options)
+
+
+@pytest.fixture
+def demon(tmp_path, monkeypatch):
+    """Démon à un processus, sans file d'attente, sur un socket temporaire."""
+    monkeypatch.setattr(serveur, 'traiter_image', _traiter_ou_mourir)
+    chemin_socket = str(tmp_path / 'demon.sock')
+    instance = ServeurDecodage(chemin_socket, 1, 0)
+    fil = threading.Thread(target=instance.serve_forever, daemon=True)
+    fil.start()
+    yield instance
+    if os.path.exists(chemin_socket):
+        instance.fermer()
+
+
+@pytest.fixture(scope='module')
+def image_code(tmp_path_factory):
+    image, _ = generer_image(CODE, 0, np.random.default_rng(0))
+    chemin = tmp_path_factory.mktemp('images') / 'code.png'
+    Image.fromarray(image).save(chemin)
+    return str(chemin)
+
+
+def test_lecture_par_chemin_et_par_octets(demon, image_code):
+    with Connexion(demon.server_address, delai=60) as connexion:
+        resultat = connexion.lire(image_code)
+        assert resultat['statut'] == 'ok'
+        assert resultat['code'] == CODE
+        resultat = connexion.lire(image_code, octets=True, budget=20)
+        assert resultat['statut'] == 'ok'
+        assert resultat['code'] == CODE
+        assert resultat['image'] == image_code
+
+
+def test_requetes_invalides(demon, image_code):
+    with Connexion(demon.server_address, delai=60) as connexion:
+        reponse = connexion.requete({'id': 1, 'chemin': image_code, 'options': {'dossier_cache': '/tmp'}})
+        assert reponse['statut'] == 'erreur'
+        assert 'dossier_cache' in reponse['erreur']
+        assert reponse['id'] == 1
+        reponse = connexion.requete({'id': 2, 'commande': 'redemarrer'})
+        assert reponse['statut'] == 'erreur'
+        assert reponse['id'] == 2
+        assert connexion.requete({'octets': 'pas du base64 !'})['statut'] == 'erreur'
+        assert connexion.requete({'options': {}})['statut'] == 'erreur'
+        # La connexion reste utilisable après une erreur
+        assert connexion.lire(image_code)['code'] == CODE
+
+
+def test_occupe_quand_la_file_est_pleine(demon, image_code):
+    assert demon._places.acquire(blocking=False)
+    try:
+        with Connexion(demon.server_address, delai=60) as connexion:
+            resultat = connexion.lire(image_code)
+    finally:
+        demon._places.release()
+    assert resultat['statut'] == STATUT_OCCUPE
+    assert resultat['image'] == image_code
+
+
+def test_processus_mort(demon, image_code, tmp_path):
+    """Un processus tué pendant une lecture donne une erreur ; le démon continue avec un nouveau pool."""
+    chemin_mort = str(tmp_path / 'image_mort.png')
+    with Connexion(demon.server_address, delai=60) as connexion:
+        resultat = connexion.lire(chemin_mort)
+        assert resultat['statut'] == 'erreur'
+        assert 'interrompu' in resultat['erreur']
+        assert connexion.lire(image_code)['code'] == CODE
+        assert connexion.requete({'commande': 'etat'})['en_cours'] == 0
+
+
+def test_etat_et_arret(demon):
+    chemin_socket = demon.server_address
+    with Connexion(chemin_socket, delai=60) as connexion:
+        etat = connexion.requete({'id': 7, 'commande': 'etat'})
+        assert etat == {'processus': 1, 'capacite': 1, 'en_cours': 0, 'pid': os.getpid(), 'id': 7}
+        assert connexion.requete({'commande': 'arret'})['arret'] is True
+    assert demon.arret.is_set()
+    demon.fermer()
+    assert not os.path.exists(chemin_socket)
+
+
+def test_socket_d_un_demon_actif_preserve(demon):
+    with pytest.raises(RuntimeError):
+        ServeurDecodage(demon.server_address, 1, 0)
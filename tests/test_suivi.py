@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthese import generer_image
+from utils.segmentation import decaler_candidat, segmentation_candidats
+from utils.suivi import SuiviCodeBarres
+
+CODE = '4006381333931'
+
+
+@pytest.fixture(scope='module')
+def code():
+    image, _ = generer_image(CODE, 0, np.random.default_rng(0))
+    return image
+
+
+def _trame(code, colonne, ligne=40):
+    """Image du flux : le code sur un fond uniforme, à la position donnée."""
+    trame = np.full((360, 1100), 200, dtype=np.uint8)
+    if colonne is not None:
+        trame[ligne:ligne + code.shape[0], colonne:colonne + code.shape[1]] = code
+    return trame
+
+
+def _suivi_initialise(code, **options):
+    """Suivi dont la région courante est celle du code placé en (40, 20)."""
+    np.random.seed(0)
+    suivi = SuiviCodeBarres(budget=32, delai_doublon=0, **options)
+    suivi.candidat = decaler_candidat(segmentation_candidats(code)[0], 40, 20)
+    return suivi
+
+
+def test_region_reportee_sans_segmentation(code):
+    suivi = _suivi_initialise(code)
+    region = suivi.candidat
+    for i, colonne in enumerate([20, 24]):
+        resultat = suivi.traiter_image(_trame(code, colonne), 0.1 * i)
+        assert resultat['code'] == CODE
+        assert resultat['niveau'] == 'suivi'
+    assert suivi.candidat == region
+
+
+def test_fenetre_de_recherche_apres_deplacement(code):
+    """Le code sort de la région suivie mais reste dans la fenêtre de recherche."""
+    suivi = _suivi_initialise(code)
+    resultat = suivi.traiter_image(_trame(code, 170), 0.0)
+    assert resultat['code'] == CODE
+    assert resultat['niveau'] == 'fenetre'
+    min_row, min_col, max_row, max_col = suivi.candidat.bbox
+    assert min_col <= 170 and max_col >= 170 + code.shape[1]
+
+
+def test_recherche_complete_apres_perte(code):
+    """Hors de la fenêtre, le code n'est relu qu'après `pertes_max` images par une segmentation complète."""
+    suivi = _suivi_initialise(code, pertes_max=2)
+    assert suivi.traiter_image(_trame(code, 700), 0.0) is None
+    assert suivi.candidat is not None
+    assert suivi.traiter_image(_trame(code, 700), 0.1) is None
+    assert suivi.candidat is None
+
+    np.random.seed(0)
+    resultat = suivi.traiter_image(_trame(code, 700), 0.2)
+    assert resultat['code'] == CODE
+    assert resultat['niveau'] == 'complet'
+    assert suivi.traiter_image(_trame(code, 700), 0.3)['niveau'] == 'suivi'
+
+
+def test_doublon_ignore_dans_le_delai(code):
+    suivi = _suivi_initialise(code)
+    suivi.delai_doublon = 0.5
+    horodatages = [0.0, 0.2, 0.4, 1.0, 1.6]
+    lus = [t for t in horodatages if suivi.traiter_image(_trame(code, 20), t) is not None]
+    # Chaque lecture repousse le délai : le code n'est signalé qu'après 0,5 s sans l'avoir vu
+    assert lus == [0.0, 1.0, 1.6]
+
+
+def test_doublon_signale_apres_une_absence(code):
+    suivi = _suivi_initialise(code, pertes_max=5)
+    suivi.delai_doublon = 0.5
+    assert suivi.traiter_image(_trame(code, 20), 0.0) is not None
+    assert suivi.traiter_image(_trame(code, None), 0.1) is None
+    assert suivi.traiter_image(_trame(code, 20), 0.2) is None
+    assert suivi.traiter_image(_trame(code, 20), 0.8)['code'] == CODE
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthese import generer_image
+from utils.image import charger_image
+from utils.pipeline import lire_code_barres
+from utils.segmentation import _candidats_bruites, segmentation_candidats
+from utils.tuiles import bruit_fenetre
+
+CODE = '4006381333931'
+
+
+def _scene():
+    """Code dégradé et zone texturée sur un fond uniforme de 500 x 700 pixels."""
+    code, _ = generer_image(CODE, 1, np.random.default_rng(0))
+    scene = np.full((500, 700), 200, dtype=np.uint8)
+    scene[40:40 + code.shape[0], 240:240 + code.shape[1]] = code
+    scene[380:480, 30:230] = np.random.default_rng(5).integers(0, 256, (100, 200))
+    return scene
+
+
+@pytest.mark.parametrize('taille_tuile', [64, 100, 256, 1000])
+def test_candidats_tuiles_identiques_a_l_image_entiere(taille_tuile):
+    """Avec le même bruit (bruit_fenetre), les tuiles donnent les candidats de l'image entière."""
+    scene = _scene()
+    I_bruite = np.clip(charger_image(scene).gris + bruit_fenetre(0, scene.shape[0], 0, scene.shape[1]), 0, 1)
+    references = _candidats_bruites(I_bruite, 5, 'separable')
+    candidats = segmentation_candidats(scene, taille_tuile=taille_tuile)
+    assert len(candidats) == len(references) > 1
+    for candidat, reference in zip(candidats, references):
+        assert candidat.bbox == reference.bbox
+        assert candidat.aire == reference.aire
+        assert candidat.angle == pytest.approx(reference.angle, abs=1e-9)
+        assert candidat.coherence == pytest.approx(reference.coherence, abs=1e-9)
+        np.testing.assert_allclose(candidat.coins, reference.coins, atol=1e-6)
+
+
+def test_lire_code_barres_par_tuiles():
+    resultat = lire_code_barres(_scene(), taille_tuile=128)
+    assert resultat['statut'] == 'ok'
+    assert resultat['code'] == CODE
+
+
+def test_tuiles_et_pyramide_exclusives():
+    with pytest.raises(ValueError):
+        segmentation_candidats(_scene(), taille_tuile=128, facteur_pyramide=2)
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from benchmarks.synthese import generer_image
+from video import lire_video
+
+cv2 = pytest.importorskip('cv2')
+
+CODE = '4006381333931'
+
+
+def _ecrire_video(chemin, trames, fps=10):
+    hauteur, largeur = trames[0].shape
+    ecriture = cv2.VideoWriter(str(chemin), cv2.VideoWriter_fourcc(*'MJPG'), fps, (largeur, hauteur))
+    for trame in trames:
+        ecriture.write(cv2.cvtColor(trame, cv2.COLOR_GRAY2BGR))
+    ecriture.release()
+
+
+def test_code_signale_une_fois_par_passage(tmp_path):
+    """Le code lu sur des images successives n'est signalé qu'à son retour dans le champ."""
+    code, _ = generer_image(CODE, 0, np.random.default_rng(0))
+    fond = np.full((360, 600), 200, dtype=np.uint8)
+    avec_code = fond.copy()
+    avec_code[40:40 + code.shape[0], 20:20 + code.shape[1]] = code
+    chemin = tmp_path / 'convoyeur.avi'
+    _ecrire_video(chemin, [avec_code] * 3 + [fond] * 12 + [avec_code] * 2)
+
+    np.random.seed(0)
+    resultats = list(lire_video(str(chemin), budget=32, delai_doublon=1.0))
+    assert [r['code'] for r in resultats] == [CODE, CODE]
+    assert [r['image'] for r in resultats] == [0, 15]
+    assert resultats[0]['niveau'] == 'complet'
+    assert resultats[1]['horodatage'] == pytest.approx(1.5)
+
+
+def test_video_illisible(tmp_path):
+    with pytest.raises(ValueError):
+        list(lire_video(str(tmp_path / 'absente.avi')))
@@ -0,0 +1,136 @@
+"""
+Cache persistant des résultats de lecture, adressé par le contenu des images.
+
+La clé d'une entrée est l'empreinte SHA-256 des octets du fichier image et
+des paramètres de la chaîne de lecture : une photo soumise à nouveau (reprise,
+doublon) est servie sans décodage, quel que soit son nom. Les entrées sont
+stockées dans une base SQLite d'un dossier local, partageable entre
+processus ; au-delà de la taille maximale, les entrées les moins récemment
+lues sont supprimées (LRU).
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+
+# Version du format des résultats : la changer invalide toutes les entrées
+VERSION_CACHE = 1
+
+# Taille maximale par défaut des résultats stockés, en octets
+TAILLE_MAX_DEFAUT = 64 * 1024 * 1024
+
+# Taille des blocs lus pour calculer l'empreinte d'un fichier
+TAILLE_BLOC = 1024 * 1024
+
+
+def empreinte(source, parametres):
+    """
+    Clé de cache d'une image et des paramètres de lecture.
+
+    Paramètres:
+        source (str ou bytes): Chemin du fichier image, ou son contenu
+        parametres (dict): Paramètres influant sur le résultat (sérialisables en JSON)
+
+    Retourne:
+        str: Empreinte hexadécimale SHA-256
+    """
+    h = hashlib.sha256()
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        h.update(source)
+    else:
+        with open(source, 'rb') as fichier:
+            for bloc in iter(lambda: fichier.read(TAILLE_BLOC), b''):
+                h.update(bloc)
+    h.update(json.dumps({'version': VERSION_CACHE, **parametres}, sort_keys=True).encode())
+    return h.hexdigest()
+
+
+class CacheResultats:
+    """
+    Cache SQLite des résultats, borné en taille avec éviction LRU.
+
+    Utilisable depuis plusieurs threads (connexion protégée par un verrou) et
+    plusieurs processus (journal WAL de SQLite).
+
+    Attributs:
+        chemin (str): Chemin de la base SQLite
+        taille_max (int): Taille maximale cumulée des résultats, en octets
+            (JSON encodé en UTF-8)
+    """
+
+    def __init__(self, dossier, taille_max=TAILLE_MAX_DEFAUT):
+        os.makedirs(dossier, exist_ok=True)
+        self.chemin = os.path.join(dossier, 'resultats.sqlite')
+        self.taille_max = taille_max
+        self._verrou = threading.Lock()
+        self._connexion = sqlite3.connect(self.chemin, timeout=30, check_same_thread=False,
+                                          isolation_level=None)
+        self._connexion.execute("PRAGMA journal_mode=WAL")
+        self._connexion.execute("""
+            CREATE TABLE IF NOT EXISTS resultats (
+                cle TEXT PRIMARY KEY,
+                valeur TEXT NOT NULL,
+                taille INTEGER NOT NULL,
+                dernier_acces REAL NOT NULL
+            )""")
+        self._connexion.execute(
+            "CREATE INDEX IF NOT EXISTS resultats_acces ON resultats (dernier_acces)")
+
+    def lire(self, cle):
+        """
+        Résultat associé à une clé, ou None ; une lecture rafraîchit l'entrée.
+
+        Retourne:
+            dict ou None: Résultat stocké par ecrire
+        """
+        with self._verrou:
+            ligne = self._connexion.execute(
+                "SELECT valeur FROM resultats WHERE cle = ?", (cle,)).fetchone()
+            if ligne is None:
+                return None
+            self._connexion.execute(
+                "UPDATE resultats SET dernier_acces = ? WHERE cle = ?", (time.time(), cle))
+        return json.loads(ligne[0])
+
+    def ecrire(self, cle, resultat):
+        """Stocke un résultat (dict sérialisable en JSON) puis applique l'éviction."""
+        valeur = json.dumps(resultat, ensure_ascii=False)
+        with self._verrou:
+            self._connexion.execute(
+                "INSERT OR REPLACE INTO resultats (cle, valeur, taille, dernier_acces) VALUES (?, ?, ?, ?)",
+                (cle, valeur, len(valeur.encode()), time.time()))
+            self._evincer()
+
+    def _evincer(self):
+        """Supprime les entrées les moins récemment lues au-delà de la taille maximale."""
+        total = self._connexion.execute("SELECT COALESCE(SUM(taille), 0) FROM resultats").fetchone()[0]
+        if total <= self.taille_max:
+            return
+        a_liberer = total - self.taille_max
+        cles = []
+        for cle, taille in self._connexion.execute(
+                "SELECT cle, taille FROM resultats ORDER BY dernier_acces"):
+            cles.append((cle,))
+            a_liberer -= taille
+            if a_liberer <= 0:
+                break
+        self._connexion.executemany("DELETE FROM resultats WHERE cle = ?", cles)
+
+    def __len__(self):
+        with self._verrou:
+            return self._connexion.execute("SELECT COUNT(*) FROM resultats").fetchone()[0]
+
+    def fermer(self):
+        """Ferme la connexion à la base."""
+        with self._verrou:
+            self._connexion.close()
+
+
+@lru_cache(maxsize=None)
+def ouvrir_cache(dossier, taille_max=TAILLE_MAX_DEFAUT):
+    """Cache du dossier, ouvert une seule fois par processus."""
+    return CacheResultats(dossier, taille_max)
@@ -0,0 +1,259 @@
+"""
+Décodage par consensus de plusieurs rayons.
+
+Les rayons sont lancés par lots ; chaque rayon vote pour les chiffres qu'il a
+pu décoder, même si sa clé de contrôle est fausse. Le décodage s'arrête dès
+que chaque position atteint la confiance demandée, ce qui évite de consommer
+tout le budget de rayons et réduit les lectures erronées qui passent la clé
+de contrôle par hasard.
+"""
+
+import threading
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from utils import instrumentation
+from utils.decoder import STATUT_GARDE_DROITE, STATUT_OK, chiffres_ean13_lot, cle_controle_valide
+from utils.extraction import extract_modules, extract_profils
+from utils.image import charger_image
+from utils.plages import signatures_profil
+from utils.rays import rayons_stratifies
+
+# Poids d'un vote selon que le rayon a été entièrement décodé ou non
+POIDS_COMPLET = 1.0
+POIDS_PARTIEL = 0.5
+
+ResultatConsensus = namedtuple('ResultatConsensus', ['code', 'confiance', 'rayons', 'votes',
+                                                     'rayon', 'candidat'])
+ResultatConsensus.__doc__ = """
+Résultat du décodage par consensus.
+
+Attributs:
+    code (str ou None): Code EAN-13 retenu ; None si aucun code ne vérifie la
+        clé de contrôle ou si le budget est épuisé sous le seuil de confiance
+    confiance (float): Confiance du code majoritaire, entre 0 et 1 (renseignée
+        même lorsque code vaut None)
+    rayons (int): Nombre de rayons utilisés
+    votes (np.ndarray): Votes accumulés, tableau (13, 10) position x chiffre
+    rayon (np.ndarray ou None): Premier rayon ((x1, y1), (x2, y2)) entièrement
+        décodé en le code retenu
+    candidat (Candidat ou None): Région candidate de ce rayon
+"""
+
+
+def decoder_par_consensus(image, candidats, budget=64, taille_lot=8, seuil_confiance=0.75,
+                          mode='plages', seed=0, nb_threads=1, progression=None):
+    """
+    Décode un code-barres en accumulant les votes de plusieurs rayons.
+
+    La confiance d'une position vaut votes du chiffre majoritaire / (total + 1) ;
+    le « + 1 » agit comme un a priori qui exige plusieurs rayons concordants
+    (3 lectures identiques donnent 0.75). La confiance du code est la plus
+    faible de ses 13 positions, et le code doit vérifier la clé de contrôle.
+    Un code n'est retenu que s'il atteint seuil_confiance : un majoritaire lu
+    par un seul rayon (clé de contrôle juste par hasard) n'est pas renvoyé
+    lorsque le budget s'épuise.
+
+    Paramètres:
+        image (str, np.ndarray ou ImageGrise): Image à décoder
+        candidats (list): Régions candidates (voir segmentation_candidats),
+            parcourues de la meilleure à la moins bonne
+        budget (int): Nombre maximal de rayons ; s'il est inférieur au nombre
+            de candidats, seuls les `budget` meilleurs reçoivent un rayon
+        taille_lot (int): Nombre de rayons extraits et décodés par lot
+        seuil_confiance (float): Confiance à atteindre pour s'arrêter
+        mode (str): 'plages' (largeurs des barres) ou 'modules' (95 modules lus
+            en leur centre, voir extract_modules) ; les deux modes lisent le
+            rayon dans les deux sens
+        seed (int): Graine du générateur de rayons
+        nb_threads (int): Nombre de lots traités en parallèle. NumPy, SciPy et
+            map_coordinates libèrent le GIL : avec nb_threads > 1, les lots sont
+            répartis sur un pool de threads partageant l'image et accumulés
+            dans l'ordre de priorité : le résultat est celui du traitement
+            séquentiel, et les lots restants sont annulés dès l'arrêt
+        progression (callable, optionnel): Appelée après chaque lot avec
+            (rayons utilisés, confiance, rayons du lot, codes lus par ces
+            rayons) ; si elle renvoie True, le décodage s'arrête (annulation)
+            et le résultat porte sur les lots déjà traités
+
+    Retourne:
+        ResultatConsensus: Code retenu, confiance et nombre de rayons utilisés
+    """
+    if mode not in ('plages', 'modules'):
+        raise ValueError(f"Mode de décodage inconnu : {mode}")
+    image = charger_image(image)
+
+    # Répartition du budget entre les candidats (le meilleur reçoit le reste) ;
+    # avec moins de rayons que de candidats, seuls les meilleurs en reçoivent
+    candidats = list(candidats)[:max(budget, 0)]
+    budgets = [budget // len(candidats)] * len(candidats) if candidats else []
+    if budgets:
+        budgets[0] += budget % len(candidats)
+
+    # Lots de rayons, par ordre de priorité, avec leur candidat
+    lots = []
+    for candidat, budget_candidat in zip(candidats, budgets):
+        rayons = rayons_stratifies(*candidat.coins, budget_candidat, seed=seed)
+        lots.extend((rayons[debut:debut + taille_lot], candidat)
+                    for debut in range(0, len(rayons), taille_lot))
+
+    if nb_threads > 1:
+        return _consensus_parallele(image, lots, seuil_confiance, mode, nb_threads, progression)
+
+    votes = np.zeros((13, 10))
+    rayons_utilises = 0
+    code, confiance = None, 0.0
+    lectures = []
+    for lot, candidat in lots:
+        votes_du_lot, codes = _votes_et_codes_lot(image, lot, mode)
+        votes += votes_du_lot
+        lectures.extend(zip(lot, codes, [candidat] * len(lot)))
+        rayons_utilises += len(lot)
+        instrumentation.incrementer('rayons_generes', len(lot), methode='stratifie')
+        code, confiance = evaluer_votes(votes)
+        if progression is not None and progression(rayons_utilises, confiance, lot, codes):
+            break
+        if code is not None and confiance >= seuil_confiance:
+            break
+    return _resultat(code, confiance, seuil_confiance, rayons_utilises, votes, lectures)
+
+
+def _consensus_parallele(image, lots, seuil_confiance, mode, nb_threads, progression=None):
+    """
+    Accumule les votes des lots traités sur un pool de threads.
+
+    Au plus 2 * nb_threads lots sont en vol, mais leurs résultats sont
+    accumulés dans l'ordre de priorité et le critère d'arrêt est évalué après
+    chaque lot, comme en séquentiel : le résultat ne dépend pas du nombre de
+    threads. Dès l'arrêt, les lots en attente sont annulés, ceux déjà démarrés
+    s'arrêtent avant leur extraction et les lots calculés par anticipation
+    sont ignorés.
+    """
+    arret = threading.Event()
+
+    def traiter(lot):
+        if arret.is_set():
+            return None
+        return _votes_et_codes_lot(image, lot, mode)
+
+    votes = np.zeros((13, 10))
+    rayons_utilises = 0
+    code, confiance = None, 0.0
+    lectures = []
+    suivants = iter(lots)
+    executor = ThreadPoolExecutor(max_workers=nb_threads)
+    try:
+        en_cours = deque()
+        while True:
+            # Alimente le pool en lots, par ordre de priorité
+            while len(en_cours) < 2 * nb_threads:
+                suivant = next(suivants, None)
+                if suivant is None:
+                    break
+                lot, candidat = suivant
+                en_cours.append((executor.submit(traiter, lot), lot, candidat))
+            if not en_cours:
+                break
+
+            # Le plus prioritaire des lots en vol est toujours accumulé le premier
+            future, lot, candidat = en_cours.popleft()
+            votes_du_lot, codes = future.result()
+            votes += votes_du_lot
+            lectures.extend(zip(lot, codes, [candidat] * len(lot)))
+            rayons_utilises += len(lot)
+            instrumentation.incrementer('rayons_generes', len(lot), methode='stratifie')
+            code, confiance = evaluer_votes(votes)
+            if progression is not None and progression(rayons_utilises, confiance, lot, codes):
+                break
+            if code is not None and confiance >= seuil_confiance:
+                break
+    finally:
+        arret.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+    return _resultat(code, confiance, seuil_confiance, rayons_utilises, votes, lectures)
+
+
+def _resultat(code, confiance, seuil_confiance, rayons_utilises, votes, lectures):
+    """ResultatConsensus, sans code retenu si la confiance reste sous le seuil."""
+    if confiance < seuil_confiance:
+        code = None
+    return ResultatConsensus(code, confiance, rayons_utilises, votes, *_rayon_gagnant(code, lectures))
+
+
+def _rayon_gagnant(code, lectures):
+    """Premier rayon (et son candidat) dont la lecture complète donne le code retenu."""
+    if code is not None:
+        for rayon, lu, candidat in lectures:
+            if lu == code:
+                return rayon, candidat
+    return None, None
+
+
+def votes_lot(image, rayons, mode='plages'):
+    """
+    Votes d'un lot de rayons : chaque rayon vote une fois par position, avec
+    sa meilleure fenêtre (décodage complet, à défaut le plus de chiffres lus).
+
+    Retourne:
+        np.ndarray: Votes (13, 10) apportés par le lot
+    """
+    return _votes_et_codes_lot(image, rayons, mode)[0]
+
+
+def _votes_et_codes_lot(image, rayons, mode):
+    """
+    Comme votes_lot, en renvoyant aussi le code complet lu par chaque rayon.
+
+    Retourne:
+        tuple: (votes (13, 10), liste des codes par rayon, None si le rayon
+            n'a pas été entièrement décodé)
+    """
+    if mode == 'plages':
+        signatures = [signatures_profil(profil) for profil in extract_profils(image, rayons)]
+        proprietaires = np.repeat(np.arange(len(signatures)), [len(s) for s in signatures])
+        signatures = np.concatenate(signatures) if signatures else np.zeros((0, 95))
+    else:
+        # Chaque rayon est lu dans ses deux sens (deux fenêtres du même rayon)
+        signatures, echecs = extract_modules(image, rayons)
+        proprietaires = np.tile(np.nonzero(~echecs)[0], 2)
+        signatures = np.concatenate([signatures[~echecs], signatures[~echecs, ::-1]])
+
+    votes = np.zeros((13, 10))
+    codes = [None] * len(rayons)
+    if len(signatures) == 0:
+        return votes, codes
+    chiffres, statuts = chiffres_ean13_lot(signatures)
+
+    # Les fenêtres aux gardes invalides ne votent pas
+    utiles = statuts > STATUT_GARDE_DROITE
+    utiles |= statuts == STATUT_OK
+    lus = (chiffres >= 0).sum(axis=1) + 13 * (statuts == STATUT_OK)
+    for rayon in np.unique(proprietaires[utiles]):
+        fenetres = np.nonzero(utiles & (proprietaires == rayon))[0]
+        meilleure = fenetres[np.argmax(lus[fenetres])]
+        poids = POIDS_COMPLET if statuts[meilleure] == STATUT_OK else POIDS_PARTIEL
+        positions = np.nonzero(chiffres[meilleure] >= 0)[0]
+        votes[positions, chiffres[meilleure, positions]] += poids
+        if statuts[meilleure] == STATUT_OK:
+            codes[rayon] = ''.join(map(str, chiffres[meilleure]))
+    return votes, codes
+
+
+def evaluer_votes(votes):
+    """
+    Code majoritaire et confiance associée.
+
+    Retourne:
+        tuple: (code, confiance) ; code vaut None si une position n'a reçu
+            aucun vote ou si le code majoritaire ne vérifie pas la clé de contrôle
+    """
+    totaux = votes.sum(axis=1)
+    if (totaux == 0).any():
+        return None, 0.0
+    chiffres = votes.argmax(axis=1)
+    if not cle_controle_valide(chiffres[None, :])[0]:
+        return None, 0.0
+    confiance = float((votes.max(axis=1) / (totaux + 1)).min())
+    return ''.join(map(str, chiffres)), confiance
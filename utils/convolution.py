@@ -0,0 +1,101 @@
+from functools import lru_cache
+
+import numpy as np
+
+# Méthodes de convolution disponibles
+METHODES = ('auto', 'directe', 'separable', 'fft')
+
+
+@lru_cache(maxsize=None)
+def noyaux_segmentation(sigma_G=1.8, sigma_T=18):
+    """
+    Noyaux séparables utilisés par la segmentation par tenseur de structure.
+
+    Chaque noyau 2D est le produit extérieur d'un noyau vertical (axe des
+    lignes) et d'un noyau horizontal (axe des colonnes) : G_2D = outer(v, h).
+    Le lissage du tenseur utilise la même fenêtre que les gradients
+    (taille 2 * int(3 * sigma_G) + 1), comme l'implémentation d'origine.
+
+    Paramètres:
+        sigma_G (float): Écart-type des dérivées de gaussienne
+        sigma_T (float): Écart-type du lissage du tenseur de structure
+
+    Retourne:
+        dict: {'G_x': (v, h), 'G_y': (v, h), 'G': (v, h)} en lecture seule
+    """
+    size = int(3 * sigma_G)
+    x = np.arange(-size, size + 1, dtype=np.float64)
+
+    gauss_G = np.exp(-x**2 / (2 * sigma_G**2))
+    derivee_G = -(x / (2 * np.pi * sigma_G**4)) * gauss_G
+    gauss_T = np.exp(-x**2 / (2 * sigma_T**2))
+
+    noyaux = {
+        'G_x': (gauss_G, derivee_G),
+        'G_y': (derivee_G, gauss_G),
+        'G': ((1 / (2 * np.pi * sigma_T**2)) * gauss_T, gauss_T),
+    }
+    for v, h in noyaux.values():
+        v.flags.writeable = False
+        h.flags.writeable = False
+    return noyaux
+
+
+def choisir_methode(forme, taille_v, taille_h):
+    """
+    Choisit la méthode la plus rapide pour une image et un noyau séparable.
+
+    Le coût séparable est proportionnel à (taille_v + taille_h) par pixel,
+    celui de la FFT à c * log2 du nombre de pixels. La constante c = 6 est le
+    seuil de bascule mesuré sur les images de 1 à 4 MP par
+    `python -m benchmarks.bench_convolution --croisement` (la FFT l'emporte
+    vers 60 à 80 coefficients par axe). Les noyaux de la segmentation
+    (11 coefficients) restent donc toujours en séparable : la FFT ne sert
+    qu'aux noyaux longs (sigma élevés).
+
+    Retourne:
+        str: 'separable' ou 'fft'
+    """
+    nb_pixels = (forme[0] + taille_v) * (forme[1] + taille_h)
+    cout_fft = 6 * np.log2(max(nb_pixels, 2))
+    return 'fft' if taille_v + taille_h > cout_fft else 'separable'
+
+
+def convoluer(image, noyau_v, noyau_h, methode='auto'):
+    """
+    Convolution 2D 'same' avec bord symétrique par un noyau séparable.
+
+    Donne le même résultat que
+    convolve2d(image, np.outer(noyau_v, noyau_h), mode='same', boundary='symm').
+
+    Paramètres:
+        image (np.ndarray): Image 2D
+        noyau_v (np.ndarray): Noyau 1D de longueur impaire appliqué selon les
+            lignes (axe 0)
+        noyau_h (np.ndarray): Noyau 1D de longueur impaire appliqué selon les
+            colonnes (axe 1)
+        methode (str): 'auto', 'directe', 'separable' ou 'fft'
+
+    Retourne:
+        np.ndarray: Image convoluée, de même forme que l'image d'entrée
+    """
+    if methode not in METHODES:
+        raise ValueError(f"Méthode de convolution inconnue : {methode}")
+    if methode == 'auto':
+        methode = choisir_methode(image.shape, len(noyau_v), len(noyau_h))
+
+    if methode == 'directe':
+        from scipy.signal import convolve2d
+        return convolve2d(image, np.outer(noyau_v, noyau_h), mode='same', boundary='symm')
+
+    if methode == 'separable':
+        # Le mode 'reflect' de scipy.ndimage correspond au bord 'symm' de convolve2d
+        from scipy.ndimage import convolve1d
+        sortie = convolve1d(image, noyau_v, axis=0, mode='reflect')
+        return convolve1d(sortie, noyau_h, axis=1, mode='reflect')
+
+    # FFT : remplissage symétrique explicite puis convolution 'valid'
+    from scipy.signal import fftconvolve
+    demi_v, demi_h = len(noyau_v) // 2, len(noyau_h) // 2
+    etendue = np.pad(image, ((demi_v, demi_v), (demi_h, demi_h)), mode='symmetric')
+    return fftconvolve(etendue, np.outer(noyau_v, noyau_h), mode='valid')
@@ -1,142 +1,216 @@
+import numpy as np
+
+from utils import instrumentation
+
+# Tables de codage pour les chiffres (indice = chiffre)
+CODE_L = ('0001101', '0011001', '0010011', '0111101', '0100011',
+          '0110001', '0101111', '0111011', '0110111', '0001011')
+CODE_G = ('0100111', '0110011', '0011011', '0100001', '0011101',
+          '0111001', '0000101', '0010001', '0001001', '0010111')
+CODE_R = ('1110010', '1100110', '1101100', '1000010', '1011100',
+          '1001110', '1010000', '1000100', '1001000', '1110100')
+
+# Table de parité pour déterminer le premier chiffre (indice = chiffre)
+PARITE = ('LLLLLL', 'LLGLGG', 'LLGGLG', 'LLGGGL', 'LGLLGG',
+          'LGGLLG', 'LGGGLL', 'LGLGLG', 'LGLGGL', 'LGGLGL')
+
+# Motifs de garde
+GARDE_GAUCHE = (1, 0, 1)
+GARDE_CENTRE = (0, 1, 0, 1, 0)
+GARDE_DROITE = (1, 0, 1)
+
+# Codes de statut renvoyés par decode_ean13_lot, dans l'ordre des vérifications
+STATUT_OK = 0
+STATUT_GARDE_GAUCHE = 1
+STATUT_GARDE_CENTRE = 2
+STATUT_GARDE_DROITE = 3
+STATUT_MOTIF_GAUCHE = 4
+STATUT_PARITE = 5
+STATUT_MOTIF_DROIT = 6
+STATUT_CLE_CONTROLE = 7
+
+# Raison d'échec associée à chaque statut, pour l'instrumentation
+RAISONS_ECHEC = ('ok', 'garde_gauche', 'garde_centre', 'garde_droite', 'motif_inconnu',
+                 'parite', 'motif_inconnu', 'cle_controle')
+
+
+def _table(codes):
+    """Table de 128 entrées : motif de 7 bits (entier) -> chiffre, -1 si inconnu."""
+    table = np.full(128, -1, dtype=np.int8)
+    for chiffre, motif in enumerate(codes):
+        table[int(motif, 2)] = chiffre
+    return table
+
+
+# Tables de correspondance précalculées (motifs empaquetés en entiers)
+TABLE_L = _table(CODE_L)
+TABLE_G = _table(CODE_G)
+TABLE_R = _table(CODE_R)
+TABLE_PARITE = np.full(64, -1, dtype=np.int8)
+for _chiffre, _motif in enumerate(PARITE):
+    TABLE_PARITE[int(_motif.replace('L', '0').replace('G', '1'), 2)] = _chiffre
+
+_POIDS_7 = 1 << np.arange(6, -1, -1)
+_POIDS_6 = 1 << np.arange(5, -1, -1)
+_POIDS_CLE = np.array([1, 3] * 6)
+
+
+def decode_ean13_lot(signatures):
+    """
+    Décode en un seul appel vectorisé un lot de signatures EAN-13 de 95 bits.
+
+    Chaque motif de 7 bits est empaqueté en entier puis décodé par les tables
+    de 128 entrées ; la clé de contrôle est calculée arithmétiquement.
+
+    Paramètres:
+        signatures: tableau (N, 95) de bits (0 ou 1)
+
+    Retourne:
+        tuple: (codes, statuts) où codes est un tableau (N,) de chaînes de 13
+            chiffres ('' en cas d'échec) et statuts un tableau (N,) de codes
+            STATUT_* indiquant la première vérification en échec
+    """
+    chiffres, statuts = chiffres_ean13_lot(signatures)
+    codes = np.full(len(chiffres), '', dtype='<U13')
+    valides = statuts == STATUT_OK
+    if valides.any():
+        codes[valides] = [''.join(map(str, ligne)) for ligne in chiffres[valides]]
+    return codes, statuts
+
+
+def chiffres_ean13_lot(signatures):
+    """
+    Décode chiffre par chiffre un lot de signatures, y compris partiellement.
+
+    Paramètres:
+        signatures: tableau (N, 95) de bits (0 ou 1)
+
+    Retourne:
+        tuple: (chiffres, statuts) où chiffres est un tableau (N, 13) d'entiers
+            (-1 pour un chiffre non décodé) et statuts un tableau (N,) de codes
+            STATUT_* ; les chiffres sont renseignés même si les gardes ou la
+            clé de contrôle sont en échec
+    """
+    bits = np.asarray(signatures, dtype=np.int64)
+    if bits.ndim != 2 or bits.shape[1] != 95:
+        raise ValueError("Les signatures doivent former un tableau (N, 95).")
+    n = len(bits)
+
+    # Motifs de garde
+    garde_gauche = (bits[:, 0:3] == GARDE_GAUCHE).all(axis=1)
+    garde_centre = (bits[:, 45:50] == GARDE_CENTRE).all(axis=1)
+    garde_droite = (bits[:, 92:95] == GARDE_DROITE).all(axis=1)
+
+    # Empaquetage des 6 + 6 motifs de 7 bits en entiers
+    motifs_gauche = bits[:, 3:45].reshape(n, 6, 7) @ _POIDS_7
+    motifs_droite = bits[:, 50:92].reshape(n, 6, 7) @ _POIDS_7
+
+    # Décodage de la partie gauche (L ou G) et du motif de parité
+    chiffres_L = TABLE_L[motifs_gauche]
+    chiffres_G = TABLE_G[motifs_gauche]
+    est_G = chiffres_G >= 0
+    chiffres_gauche = np.where(est_G, chiffres_G, chiffres_L)
+    motif_gauche_ok = (chiffres_gauche >= 0).all(axis=1)
+    premier = np.where(motif_gauche_ok, TABLE_PARITE[est_G.astype(np.int64) @ _POIDS_6], -1)
+
+    # Décodage de la partie droite
+    chiffres_droite = TABLE_R[motifs_droite]
+    motif_droit_ok = (chiffres_droite >= 0).all(axis=1)
+
+    # Clé de contrôle selon la norme EAN-13
+    chiffres = np.concatenate([premier[:, None], chiffres_gauche, chiffres_droite], axis=1)
+    chiffres = chiffres.astype(np.int64)
+    cle_ok = cle_controle_valide(chiffres)
+
+    statuts = np.select(
+        [~garde_gauche, ~garde_centre, ~garde_droite, ~motif_gauche_ok,
+         premier < 0, ~motif_droit_ok, ~cle_ok],
+        [STATUT_GARDE_GAUCHE, STATUT_GARDE_CENTRE, STATUT_GARDE_DROITE,
+         STATUT_MOTIF_GAUCHE, STATUT_PARITE, STATUT_MOTIF_DROIT, STATUT_CLE_CONTROLE],
+        default=STATUT_OK,
+    )
+    if instrumentation.active() is not None:
+        _compter_statuts(statuts)
+    return chiffres, statuts
+
+
+def _compter_statuts(statuts):
+    """Compte les signatures décodées et les échecs par raison."""
+    instrumentation.incrementer('signatures_decodees', len(statuts))
+    for statut, nombre in enumerate(np.bincount(statuts, minlength=len(RAISONS_ECHEC))):
+        if statut != STATUT_OK and nombre:
+            instrumentation.incrementer('echecs_decodage', int(nombre), raison=RAISONS_ECHEC[statut])
+
+
+def cle_controle_valide(chiffres):
+    """
+    Vérifie la clé de contrôle EAN-13 de chaque ligne d'un tableau (N, 13).
+
+    Retourne:
+        np.ndarray: Booléens (N,), faux si un chiffre vaut -1
+    """
+    chiffres = np.asarray(chiffres, dtype=np.int64)
+    cle = (10 - (chiffres[:, :12] @ _POIDS_CLE) % 10) % 10
+    return (cle == chiffres[:, 12]) & (chiffres >= 0).all(axis=1)
+
+
 def decode_ean13_signature(binary_signature):
     """
     Decoder un code-barres EAN-13 à partir de sa signature binaire.
-    
+
     Paramètres:
         binary_signature: liste d'entiers (0 ou 1), représentant la signature
             binaire du code-barres (95 bits)
-            
+
     Retourne:
         code_barres: chaîne de caractères représentant le code EAN-13 décodé
     """
     # Vérifier la longueur de la signature
     if len(binary_signature) != 95:
         raise ValueError("La signature binaire doit contenir exactement 95 bits.")
-    
-    # Motifs de garde
-    guard_left = [1, 0, 1]
-    guard_center = [0, 1, 0, 1, 0]
-    guard_right = [1, 0, 1]
-    
-    # Vérifier les motifs de garde
-    if list(binary_signature[0:3]) != guard_left:
-        raise ValueError("Motif de garde gauche incorrect.")
-    if list(binary_signature[45:50]) != guard_center:
-        raise ValueError("Motif de garde central incorrect.")
-    if list(binary_signature[92:95]) != guard_right:
-        raise ValueError("Motif de garde droit incorrect.")
-    
-    # Tables de codage pour les chiffres
-    code_L = {
-        '0001101': '0',
-        '0011001': '1',
-        '0010011': '2',
-        '0111101': '3',
-        '0100011': '4',
-        '0110001': '5',
-        '0101111': '6',
-        '0111011': '7',
-        '0110111': '8',
-        '0001011': '9',
-    }
-    code_G = {
-        '0100111': '0',
-        '0110011': '1',
-        '0011011': '2',
-        '0100001': '3',
-        '0011101': '4',
-        '0111001': '5',
-        '0000101': '6',
-        '0010001': '7',
-        '0001001': '8',
-        '0010111': '9',
-    }
-    code_R = {
-        '1110010': '0',
-        '1100110': '1',
-        '1101100': '2',
-        '1000010': '3',
-        '1011100': '4',
-        '1001110': '5',
-        '1010000': '6',
-        '1000100': '7',
-        '1001000': '8',
-        '1110100': '9',
-    }
-    
-    # Table de parité pour déterminer le premier chiffre
-    parity_table = {
-        'LLLLLL': '0',
-        'LLGLGG': '1',
-        'LLGGLG': '2',
-        'LLGGGL': '3',
-        'LGLLGG': '4',
-        'LGGLLG': '5',
-        'LGGGLL': '6',
-        'LGLGLG': '7',
-        'LGLGGL': '8',
-        'LGGLGL': '9',
-    }
-    
-    # Décodage des 6 chiffres de gauche
-    left_digits = []
-    parity_pattern = ''
-    for i in range(6):
-        start = 3 + i * 7
-        end = start + 7
-        pattern_bits = binary_signature[start:end]
-        pattern = ''.join(map(str, pattern_bits))
-        if pattern in code_L:
-            digit = code_L[pattern]
-            parity_pattern += 'L'
-        elif pattern in code_G:
-            digit = code_G[pattern]
-            parity_pattern += 'G'
-        else:
-            raise ValueError(f"Motif inconnu dans la partie gauche : {pattern}")
-        left_digits.append(digit)
-    
-    # Déterminer le premier chiffre à partir du motif de parité
-    if parity_pattern in parity_table:
-        first_digit = parity_table[parity_pattern]
-    else:
-        raise ValueError(f"Motif de parité inconnu : {parity_pattern}")
-    
-    # Décodage des 6 chiffres de droite
-    right_digits = []
-    for i in range(6):
-        start = 50 + i * 7
-        end = start + 7
-        pattern_bits = binary_signature[start:end]
-        pattern = ''.join(map(str, pattern_bits))
-        if pattern in code_R:
-            digit = code_R[pattern]
-        else:
-            raise ValueError(f"Motif inconnu dans la partie droite : {pattern}")
-        right_digits.append(digit)
-    
-    # Construire le code-barres complet
-    code_barres = first_digit + ''.join(left_digits) + ''.join(right_digits)
-    
-    # Vérifier la clé de contrôle
-    digits = list(map(int, code_barres))
-    if len(digits) != 13:
-        raise ValueError("Le code-barres doit contenir 13 chiffres.")
-    
-    # Calcul de la clé de contrôle selon la norme EAN-13
-    # Étape 1 : Somme des chiffres en positions paires (2e, 4e, ..., 12e)
-    sum_even = sum(digits[i] for i in range(1, 12, 2))
-    # Étape 2 : Multiplier la somme par 3
-    sum_even *= 3
-    # Étape 3 : Somme des chiffres en positions impaires (1ère, 3e, ..., 11e)
-    sum_odd = sum(digits[i] for i in range(0, 12, 2))
-    # Étape 4 : Calculer le total
-    total = sum_even + sum_odd
-    # Étape 5 : Calculer la clé de contrôle
-    check_digit = (10 - (total % 10)) % 10
-    
-    # Vérifier si la clé de contrôle est correcte
-    if check_digit != digits[-1]:
-        raise ValueError(f"Clé de contrôle invalide : attendu {check_digit}, obtenu {digits[-1]}")
-    
-    return code_barres
\ No newline at end of file
+
+    codes, statuts = decode_ean13_lot(np.asarray(binary_signature).reshape(1, 95))
+    statut = statuts[0]
+    if statut == STATUT_OK:
+        return str(codes[0])
+    raise ValueError(message_statut(statut, binary_signature))
+
+
+def message_statut(statut, binary_signature):
+    """
+    Message d'erreur correspondant à un code de statut de decode_ean13_lot.
+
+    Paramètres:
+        statut (int): Code STATUT_* en échec
+        binary_signature: signature de 95 bits concernée
+
+    Retourne:
+        str: Message explicatif
+    """
+    bits = [int(b) for b in binary_signature]
+    motifs_gauche = [''.join(map(str, bits[3 + i * 7:10 + i * 7])) for i in range(6)]
+    motifs_droite = [''.join(map(str, bits[50 + i * 7:57 + i * 7])) for i in range(6)]
+
+    if statut == STATUT_GARDE_GAUCHE:
+        return "Motif de garde gauche incorrect."
+    if statut == STATUT_GARDE_CENTRE:
+        return "Motif de garde central incorrect."
+    if statut == STATUT_GARDE_DROITE:
+        return "Motif de garde droit incorrect."
+    if statut == STATUT_MOTIF_GAUCHE:
+        pattern = next(m for m in motifs_gauche if m not in CODE_L and m not in CODE_G)
+        return f"Motif inconnu dans la partie gauche : {pattern}"
+    if statut == STATUT_PARITE:
+        parity_pattern = ''.join('L' if m in CODE_L else 'G' for m in motifs_gauche)
+        return f"Motif de parité inconnu : {parity_pattern}"
+    if statut == STATUT_MOTIF_DROIT:
+        pattern = next(m for m in motifs_droite if m not in CODE_R)
+        return f"Motif inconnu dans la partie droite : {pattern}"
+    if statut == STATUT_CLE_CONTROLE:
+        digits = [PARITE.index(''.join('L' if m in CODE_L else 'G' for m in motifs_gauche))]
+        digits += [CODE_L.index(m) if m in CODE_L else CODE_G.index(m) for m in motifs_gauche]
+        digits += [CODE_R.index(m) for m in motifs_droite]
+        total = sum(d * w for d, w in zip(digits[:12], _POIDS_CLE))
+        check_digit = (10 - (total % 10)) % 10
+        return f"Clé de contrôle invalide : attendu {check_digit}, obtenu {digits[-1]}"
+    return f"Statut de décodage inconnu : {statut}"
@@ -1,29 +1,28 @@
 import numpy as np
-from skimage import io, color
-from skimage.filters import threshold_otsu
-from scipy.ndimage import map_coordinates
+from utils.image import charger_image
+from utils import instrumentation
 
-def extract_signature(image_path, p1, p2):
+def extract_signature(image, p1, p2):
     """
     Extrait une signature binaire de 95 bits le long d'un rayon défini par deux points.
     
     Paramètres:
-        image_path (str): Chemin de l'image
+        image (str, np.ndarray ou ImageGrise): Chemin de l'image, tableau image
+            ou image déjà décodée
         p1 (tuple): Point de départ du rayon (x, y)
         p2 (tuple): Point d'arrivée du rayon (x, y)
         
     Retourne:
         list: Liste de 95 bits représentant la signature extraite
     """
-    # Charger l'image
-    img = io.imread(image_path)
-    if img.shape[-1] == 4:  # Si l'image a un canal alpha
-        img = img[..., :3]
-    image = color.rgb2gray(img)
+    # Charger l'image (aucun décodage si elle est déjà en mémoire ; les images
+    # projetées en mémoire sont échantillonnées sans copie)
+    image = charger_image(image)
     
     # Étape 1 : Calcul de la longueur du rayon
     longueur_rayon = int(np.sqrt((p2[0] - p1[0])**2 + (p2[1] - p1[1])**2))
-    print(f"Longueur du rayon : {longueur_rayon} pixels")
+    instrumentation.journal("Longueur du rayon : {} pixels", longueur_rayon)
+    instrumentation.incrementer('extractions')
     
     # Étape 2 : Extraction initiale de la signature
     nb_points = max(longueur_rayon, 95)  # Nombre de points à échantillonner
@@ -34,16 +33,24 @@ def extract_signature(image_path, p1, p2):
     y = p1[1] + (p2[1] - p1[1]) * t
     
     # Extraction des intensités sur le rayon avec interpolation bilinéaire
-    intensities = map_coordinates(image, [y, x], order=1, mode='reflect')
+    intensities = image.echantillonner(y, x)
+    
+    # Un profil uniforme ne contient aucune transition exploitable
+    if np.ptp(intensities) < 1e-8:
+        instrumentation.journal("Aucune région utile trouvée dans la signature.")
+        instrumentation.incrementer('extractions_echouees', raison='uniforme')
+        return None
     
     # Étape 3 : Application du seuil d'Otsu
+    from skimage.filters import threshold_otsu
     threshold = threshold_otsu(intensities)  # Calcul du seuil d'Otsu
     binary_signature = (intensities > threshold).astype(int)  # Binarisation
     
     # Étape 4 : Trouver les limites utiles
     non_zero = np.nonzero(binary_signature)[0]
     if len(non_zero) == 0:
-        print("Aucune région utile trouvée dans la signature.")
+        instrumentation.journal("Aucune région utile trouvée dans la signature.")
+        instrumentation.incrementer('extractions_echouees', raison='vide')
         return None  # Retourne None si aucune donnée utile
     
     # Étape 5 : Réduction aux indices utiles
@@ -65,7 +72,7 @@ def extract_signature(image_path, p1, p2):
     # Étape 6 : Ajustement et extraction finale
     useful_length = np.sqrt((useful_p2[0] - useful_p1[0])**2 + (useful_p2[1] - useful_p1[1])**2)
     u = max(1, int(useful_length / 95))  # Calcul de l'unité de base
-    print(f"Unité de base u calculée : {u}")
+    instrumentation.journal("Unité de base u calculée : {}", u)
     
     # Étape 7 : Extraction finale sur 95 * u points
     nb_points_final = 95 * u
@@ -74,9 +81,13 @@ def extract_signature(image_path, p1, p2):
     y = useful_p1[1] + (useful_p2[1] - useful_p1[1]) * t
     
     # Extraction finale avec interpolation
-    final_signature = map_coordinates(image, [y, x], order=1, mode='reflect')
+    final_signature = image.echantillonner(y, x)
     
     # Binarisation finale avec Otsu
+    if np.ptp(final_signature) < 1e-8:
+        instrumentation.journal("Aucune région utile trouvée dans la signature.")
+        instrumentation.incrementer('extractions_echouees', raison='uniforme')
+        return None
     final_threshold = threshold_otsu(final_signature)
     final_binary_signature = (final_signature > final_threshold).astype(int)
     
@@ -85,5 +96,259 @@ def extract_signature(image_path, p1, p2):
         signature_95bits = final_binary_signature[:95]
         return signature_95bits  # Retourne la signature binaire
     else:
-        print("La signature extraite est trop courte.")
-        return None
\ No newline at end of file
+        instrumentation.journal("La signature extraite est trop courte.")
+        instrumentation.incrementer('extractions_echouees', raison='trop_courte')
+        return None
+
+def extract_signatures(image, rayons):
+    """
+    Extrait en un seul passage vectorisé les signatures de 95 bits de plusieurs rayons.
+
+    Chaque rayon suit exactement les étapes de extract_signature (échantillonnage
+    initial, seuil d'Otsu, réduction aux indices utiles, échantillonnage final),
+    mais tous les rayons sont échantillonnés par un même appel à map_coordinates
+    et seuillés ensemble.
+
+    Paramètres:
+        image (str, np.ndarray ou ImageGrise): Chemin de l'image, tableau image
+            ou image déjà décodée
+        rayons (array-like): Tableau (N, 2, 2) des extrémités des rayons,
+            rayons[i] = ((x1, y1), (x2, y2))
+
+    Retourne:
+        tuple: (signatures, echecs) où signatures est un tableau (N, 95) de bits
+            et echecs un masque booléen (N,) des rayons sans signature valide
+    """
+    image = charger_image(image)
+    rayons = np.asarray(rayons, dtype=np.float64).reshape(-1, 2, 2)
+    nb_rayons = len(rayons)
+    if nb_rayons == 0:
+        return np.zeros((0, 95), dtype=np.uint8), np.zeros(0, dtype=bool)
+    p1 = rayons[:, 0, :]
+    p2 = rayons[:, 1, :]
+
+    # Étape 1 : Longueur de chaque rayon et nombre de points à échantillonner
+    longueurs = np.sqrt(((p2 - p1)**2).sum(axis=1)).astype(int)
+    nb_points = np.maximum(longueurs, 95)
+
+    # Étape 2 : Échantillonnage initial de tous les rayons
+    intensities, masque = _echantillonner(image, p1, p2, nb_points)
+
+    # Étape 3 : Seuil d'Otsu par rayon
+    thresholds = _otsu_lignes(intensities, masque)
+    binary = (intensities > thresholds[:, None]) & masque
+
+    # Étape 4 : Trouver les limites utiles (un profil uniforme est un échec)
+    echecs = ~binary.any(axis=1) | (_etendue_lignes(intensities, masque) < 1e-8)
+    start_idx = np.argmax(binary, axis=1)
+    end_idx = binary.shape[1] - 1 - np.argmax(binary[:, ::-1], axis=1)
+
+    # Étape 5 : Coordonnées des points utiles
+    t_start = (start_idx / nb_points)[:, None]
+    t_end = (end_idx / nb_points)[:, None]
+    useful_p1 = p1 + (p2 - p1) * t_start
+    useful_p2 = p1 + (p2 - p1) * t_end
+
+    # Étape 6 : Unité de base de chaque rayon
+    useful_length = np.sqrt(((useful_p2 - useful_p1)**2).sum(axis=1))
+    u = np.maximum(1, (useful_length / 95).astype(int))
+
+    # Étape 7 : Extraction finale sur 95 * u points pour chaque rayon
+    final_signature, masque_final = _echantillonner(image, useful_p1, useful_p2, 95 * u)
+    final_thresholds = _otsu_lignes(final_signature, masque_final)
+    echecs |= _etendue_lignes(final_signature, masque_final) < 1e-8
+
+    # Étape 8 : Sélection des 95 premiers bits
+    signatures = (final_signature[:, :95] > final_thresholds[:, None]).astype(np.uint8)
+    signatures[echecs] = 0
+    if instrumentation.active() is not None:
+        instrumentation.incrementer('extractions', nb_rayons)
+        vides = ~binary.any(axis=1)
+        instrumentation.incrementer('extractions_echouees', int(vides.sum()), raison='vide')
+        instrumentation.incrementer('extractions_echouees', int((echecs & ~vides).sum()), raison='uniforme')
+    return signatures, echecs
+
+
+def extract_profil(image, p1, p2, sur_echantillonnage=2, marge=0.1):
+    """
+    Extrait le profil d'intensité brut le long d'un rayon, pour le décodage
+    par longueurs de plages (voir utils.plages). Le rayon est prolongé de
+    `marge` fois sa longueur de chaque côté, afin d'inclure les zones
+    blanches qui entourent un code-barres aux bords de la région détectée.
+    
+    Paramètres:
+        image (str, np.ndarray ou ImageGrise): Chemin de l'image, tableau image
+            ou image déjà décodée
+        p1 (tuple): Point de départ du rayon (x, y)
+        p2 (tuple): Point d'arrivée du rayon (x, y)
+        sur_echantillonnage (int): Nombre d'échantillons par pixel
+        marge (float): Prolongement relatif du rayon de chaque côté
+        
+    Retourne:
+        np.ndarray: Intensités interpolées le long du rayon
+    """
+    image = charger_image(image)
+    longueur_rayon = np.sqrt((p2[0] - p1[0])**2 + (p2[1] - p1[1])**2)
+    nb_points = max(int(longueur_rayon * (1 + 2 * marge) * sur_echantillonnage), 2)
+    t = np.linspace(-marge, 1 + marge, nb_points)
+    x = p1[0] + (p2[0] - p1[0]) * t
+    y = p1[1] + (p2[1] - p1[1]) * t
+    return image.echantillonner(y, x)
+
+
+def extract_profils(image, rayons, sur_echantillonnage=2, marge=0.1):
+    """
+    Version par lot de extract_profil : un seul appel à map_coordinates pour
+    tous les rayons.
+    
+    Paramètres:
+        image (str, np.ndarray ou ImageGrise): Chemin de l'image, tableau image
+            ou image déjà décodée
+        rayons (array-like): Tableau (N, 2, 2) des extrémités des rayons
+        sur_echantillonnage (int): Nombre d'échantillons par pixel
+        marge (float): Prolongement relatif des rayons de chaque côté
+        
+    Retourne:
+        list: N profils d'intensité (np.ndarray de longueurs variables)
+    """
+    image = charger_image(image)
+    rayons = np.asarray(rayons, dtype=np.float64).reshape(-1, 2, 2)
+    if len(rayons) == 0:
+        return []
+    instrumentation.incrementer('extractions', len(rayons))
+    direction = rayons[:, 1, :] - rayons[:, 0, :]
+    p1 = rayons[:, 0, :] - marge * direction
+    p2 = rayons[:, 1, :] + marge * direction
+    longueurs = np.sqrt((direction**2).sum(axis=1))
+    nb_points = np.maximum((longueurs * (1 + 2 * marge) * sur_echantillonnage).astype(int), 2)
+    intensites, _ = _echantillonner(image, p1, p2, nb_points)
+    return [ligne[:n] for ligne, n in zip(intensites, nb_points)]
+
+
+def extract_modules(image, rayons, sur_echantillonnage=2, marge=0.1):
+    """
+    Signatures de 95 modules de plusieurs rayons, barres sombres à 1.
+    
+    Contrairement à extract_signatures (bits clairs à 1, 95 premiers
+    échantillons), le code est délimité par ses barres extrêmes et chaque
+    module est lu en son centre : la signature suit la convention EAN-13
+    (barre = 1) quelle que soit la largeur du module. Le rayon est prolongé
+    de `marge` fois sa longueur de chaque côté, comme dans extract_profil.
+    
+    Paramètres:
+        image (str, np.ndarray ou ImageGrise): Chemin de l'image, tableau image
+            ou image déjà décodée
+        rayons (array-like): Tableau (N, 2, 2) des extrémités des rayons
+        sur_echantillonnage (int): Nombre d'échantillons par pixel
+        marge (float): Prolongement relatif des rayons de chaque côté
+        
+    Retourne:
+        tuple: (signatures, echecs) où signatures est un tableau (N, 95) de bits
+            dans le sens du rayon et echecs un masque booléen (N,) des rayons
+            sans barre
+    """
+    image = charger_image(image)
+    rayons = np.asarray(rayons, dtype=np.float64).reshape(-1, 2, 2)
+    if len(rayons) == 0:
+        return np.zeros((0, 95), dtype=np.uint8), np.zeros(0, dtype=bool)
+    instrumentation.incrementer('extractions', len(rayons))
+    direction = rayons[:, 1, :] - rayons[:, 0, :]
+    p1 = rayons[:, 0, :] - marge * direction
+    p2 = rayons[:, 1, :] + marge * direction
+    longueurs = np.sqrt((direction**2).sum(axis=1))
+    nb_points = np.maximum((longueurs * (1 + 2 * marge) * sur_echantillonnage).astype(int), 2)
+    
+    # Profil seuillé par Otsu : barres sombres
+    intensities, masque = _echantillonner(image, p1, p2, nb_points)
+    thresholds = _otsu_lignes(intensities, masque)
+    barres = (intensities <= thresholds[:, None]) & masque
+    echecs = ~barres.any(axis=1) | (_etendue_lignes(intensities, masque) < 1e-8)
+    
+    # Étendue du code : de la première à la dernière barre (bords des échantillons)
+    start_idx = np.argmax(barres, axis=1)
+    end_idx = barres.shape[1] - 1 - np.argmax(barres[:, ::-1], axis=1)
+    t_start = ((start_idx - 0.5) / np.maximum(nb_points - 1, 1))[:, None]
+    t_end = ((end_idx + 0.5) / np.maximum(nb_points - 1, 1))[:, None]
+    debut = p1 + (p2 - p1) * t_start
+    fin = p1 + (p2 - p1) * t_end
+    
+    # Lecture de chaque module en son centre
+    t = (np.arange(95) + 0.5) / 95
+    x = debut[:, 0, None] + (fin[:, 0] - debut[:, 0])[:, None] * t
+    y = debut[:, 1, None] + (fin[:, 1] - debut[:, 1])[:, None] * t
+    signatures = (image.echantillonner(y, x) <= thresholds[:, None]).astype(np.uint8)
+    signatures[echecs] = 0
+    if instrumentation.active() is not None:
+        instrumentation.incrementer('extractions_echouees', int(echecs.sum()), raison='vide')
+    return signatures, echecs
+
+
+def _echantillonner(image, p1, p2, nb_points):
+    """
+    Échantillonne N rayons de longueurs différentes en un seul appel.
+
+    Le rayon i est échantillonné en nb_points[i] points régulièrement répartis
+    (comme np.linspace(0, 1, nb_points[i])) ; les lignes sont complétées
+    jusqu'à la plus grande longueur et le masque indique les points valides.
+
+    Retourne:
+        tuple: (intensites, masque), deux tableaux de forme (N, max(nb_points))
+    """
+    k = np.arange(nb_points.max())
+    masque = k[None, :] < nb_points[:, None]
+    t = np.minimum(k[None, :] / np.maximum(nb_points - 1, 1)[:, None], 1.0)
+    x = p1[:, 0, None] + (p2[:, 0] - p1[:, 0])[:, None] * t
+    y = p1[:, 1, None] + (p2[:, 1] - p1[:, 1])[:, None] * t
+    intensites = image.echantillonner(y, x)
+    return intensites, masque
+
+
+def _etendue_lignes(valeurs, masque):
+    """Écart max - min de chaque ligne, restreint aux valeurs masquées."""
+    vmin = np.where(masque, valeurs, np.inf).min(axis=1)
+    vmax = np.where(masque, valeurs, -np.inf).max(axis=1)
+    return vmax - vmin
+
+
+def _otsu_lignes(valeurs, masque, nbins=256):
+    """
+    Seuil d'Otsu calculé indépendamment sur chaque ligne d'un tableau 2D.
+
+    Reproduit skimage.filters.threshold_otsu (histogramme de nbins classes
+    entre le minimum et le maximum de la ligne) en ne tenant compte que des
+    valeurs où masque est vrai.
+
+    Retourne:
+        np.ndarray: Seuil de chaque ligne (N,)
+    """
+    nb_lignes = valeurs.shape[0]
+    vmin = np.where(masque, valeurs, np.inf).min(axis=1)
+    vmax = np.where(masque, valeurs, -np.inf).max(axis=1)
+    etendue = vmax - vmin
+    constantes = etendue == 0
+    etendue[constantes] = 1.0
+
+    # Histogramme de chaque ligne par un unique bincount
+    classes = ((valeurs - vmin[:, None]) * (nbins / etendue)[:, None]).astype(np.int64)
+    np.clip(classes, 0, nbins - 1, out=classes)
+    classes += (np.arange(nb_lignes) * nbins)[:, None]
+    counts = np.bincount(classes[masque], minlength=nb_lignes * nbins)
+    counts = counts.reshape(nb_lignes, nbins).astype(np.float64)
+
+    largeur = etendue / nbins
+    bin_centers = vmin[:, None] + largeur[:, None] * (np.arange(nbins) + 0.5)
+
+    # Variance inter-classes pour chaque seuil candidat
+    weight1 = np.cumsum(counts, axis=1)
+    weight2 = np.cumsum(counts[:, ::-1], axis=1)[:, ::-1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean1 = np.cumsum(counts * bin_centers, axis=1) / weight1
+        mean2 = (np.cumsum((counts * bin_centers)[:, ::-1], axis=1) / weight2[:, ::-1])[:, ::-1]
+        variance12 = weight1[:, :-1] * weight2[:, 1:] * (mean1[:, :-1] - mean2[:, 1:])**2
+    variance12 = np.nan_to_num(variance12, nan=-1.0)
+    idx = np.argmax(variance12, axis=1)
+    thresholds = bin_centers[np.arange(nb_lignes), idx]
+
+    # Ligne constante : threshold_otsu renvoie la valeur elle-même
+    thresholds[constantes] = vmin[constantes]
+    return thresholds
@@ -0,0 +1,244 @@
+import os
+import threading
+from io import BytesIO
+
+import numpy as np
+
+from utils import instrumentation
+
+# Extensions des images brutes 8 bits en niveaux de gris (forme à fournir)
+EXTENSIONS_BRUTES = ('.raw', '.gray')
+
+# Facteurs de réduction disponibles pour la segmentation (mise à l'échelle JPEG)
+FACTEURS_REDUCTION = (1, 2, 4, 8)
+
+
+class ImageGrise:
+    """
+    Image décodée et convertie en niveaux de gris une seule fois.
+
+    L'objet est partagé entre la segmentation, l'extraction et l'interface
+    graphique afin d'éviter de relire et de reconvertir le fichier à chaque
+    rayon.
+
+    Les fichiers .npy et les images brutes 8 bits (voir charger_image) sont
+    projetés en mémoire sans décodage ; une image 2D entière n'est convertie
+    en flottants qu'au premier accès à `gris`, les rayons échantillonnant
+    directement les données d'origine (voir echantillonner). Avec
+    differe=True, un fichier n'est décodé qu'au premier accès à ses
+    données : la segmentation peut ainsi travailler sur une version réduite
+    (voir reduite) sans décodage à pleine résolution.
+
+    Attributs:
+        chemin (str ou None): Chemin du fichier d'origine (None pour un tableau ou des octets)
+        donnees (np.ndarray): Données 2D d'origine (éventuellement np.memmap)
+        echelle (float): Facteur ramenant `donnees` dans [0, 1]
+        gris (np.ndarray): Image en niveaux de gris (float64, valeurs dans [0, 1])
+    """
+
+    def __init__(self, source, forme=None, differe=False):
+        self._gris = None
+        self._donnees = None
+        self._echelle = 1.0
+        self._forme = forme
+        self._reduites = {}
+        self._verrou = threading.Lock()
+        if isinstance(source, ImageGrise):
+            self.chemin = source.chemin
+            self._forme = source._forme
+            if source._donnees is not None:
+                self._adopter(source._donnees, source._gris)
+        elif isinstance(source, (str, os.PathLike)):
+            self.chemin = os.fspath(source)
+            if not differe:
+                self._charger()
+            elif not os.path.exists(self.chemin):
+                raise FileNotFoundError(f"Fichier introuvable : {self.chemin}")
+        elif isinstance(source, (bytes, bytearray, memoryview)):
+            # Contenu d'un fichier image (PNG, JPEG...) reçu en mémoire
+            self.chemin = None
+            from PIL import Image
+            with instrumentation.chronometre('duree', etape='decodage_image'):
+                with Image.open(BytesIO(source)) as fichier:
+                    self._adopter(np.asarray(fichier))
+        else:
+            self.chemin = None
+            self._adopter(np.asarray(source))
+
+    def _adopter(self, tableau, gris=None):
+        """Installe les données décodées (conversion immédiate si l'image est en couleur)."""
+        if tableau.ndim == 2:
+            entier = np.issubdtype(tableau.dtype, np.integer)
+            self._echelle = 1 / np.iinfo(tableau.dtype).max if entier else 1.0
+            self._gris = gris
+        else:
+            self._gris = gris if gris is not None else vers_niveaux_de_gris(tableau)
+            tableau = self._gris
+            self._echelle = 1.0
+        self._donnees = tableau
+
+    def _charger(self):
+        """Décode le fichier au premier besoin (une seule fois, même entre threads)."""
+        if self._donnees is None:
+            with self._verrou:
+                if self._donnees is None:
+                    self._adopter(_ouvrir_fichier(self.chemin, self._forme))
+
+    @property
+    def donnees(self):
+        """Données 2D d'origine, décodées au premier accès."""
+        self._charger()
+        return self._donnees
+
+    @property
+    def echelle(self):
+        """Facteur ramenant `donnees` dans [0, 1]."""
+        self._charger()
+        return self._echelle
+
+    @property
+    def gris(self):
+        """Image en niveaux de gris (float64 dans [0, 1]), convertie au premier accès."""
+        self._charger()
+        if self._gris is None:
+            self._gris = vers_niveaux_de_gris(np.asarray(self._donnees))
+        return self._gris
+
+    @property
+    def shape(self):
+        """Dimensions (hauteur, largeur) de l'image."""
+        if self._donnees is None and _est_jpeg(self.chemin):
+            # Dimensions lues dans l'en-tête, sans décodage
+            from PIL import Image
+            with Image.open(self.chemin) as fichier:
+                return fichier.size[::-1]
+        return self.donnees.shape[:2]
+
+    def echantillonner(self, y, x):
+        """
+        Interpolation bilinéaire (bord 'reflect') aux coordonnées (y, x).
+
+        Les données d'origine sont lues directement, sans conversion de
+        l'image entière ; le résultat est ramené dans [0, 1].
+
+        Retourne:
+            np.ndarray: Intensités float64, de la forme de y
+        """
+        from scipy.ndimage import map_coordinates
+        self._charger()
+        if self._gris is not None:
+            return map_coordinates(self._gris, [y, x], order=1, mode='reflect')
+        valeurs = map_coordinates(self._donnees, [y, x], order=1, mode='reflect', output=np.float64)
+        if self._echelle != 1.0:
+            valeurs *= self._echelle
+        return valeurs
+
+    def reduite(self, facteur):
+        """
+        Vue réduite de l'image pour la segmentation.
+
+        Un JPEG encore non décodé est décodé directement en niveaux de gris à
+        1/2, 1/4 ou 1/8 de sa résolution (mise à l'échelle dans le domaine
+        DCT, via Image.draft), sans décodage à pleine résolution. Sinon,
+        l'image est réduite par moyenne sur des blocs facteur x facteur.
+
+        Paramètres:
+            facteur (int): 1, 2, 4 ou 8
+
+        Retourne:
+            tuple: (image float64 dans [0, 1], (echelle_y, echelle_x)) où les
+                échelles ramènent les coordonnées réduites à pleine résolution
+        """
+        if facteur not in FACTEURS_REDUCTION:
+            raise ValueError(f"Facteur de réduction non pris en charge : {facteur}")
+        if facteur == 1:
+            return self.gris, (1.0, 1.0)
+        if facteur not in self._reduites:
+            if self._donnees is None and _est_jpeg(self.chemin):
+                from PIL import Image
+                with instrumentation.chronometre('duree', etape='decodage_reduit'):
+                    with Image.open(self.chemin) as fichier:
+                        hauteur, largeur = fichier.size[::-1]
+                        fichier.draft('L', (largeur // facteur, hauteur // facteur))
+                        reduite = vers_niveaux_de_gris(np.asarray(fichier.convert('L')))
+                # Le décodeur arrondit la taille réduite au pixel supérieur
+                echelles = (hauteur / reduite.shape[0], largeur / reduite.shape[1])
+            else:
+                hauteur, largeur = self.shape
+                h, w = hauteur // facteur, largeur // facteur
+                blocs = self.gris[:h * facteur, :w * facteur].reshape(h, facteur, w, facteur)
+                reduite = blocs.mean(axis=(1, 3))
+                echelles = (float(facteur), float(facteur))
+            self._reduites[facteur] = (reduite, echelles)
+        return self._reduites[facteur]
+
+
+def _est_jpeg(chemin):
+    """Vrai pour un chemin de fichier JPEG."""
+    return chemin is not None and chemin.lower().endswith(('.jpg', '.jpeg'))
+
+
+def _ouvrir_fichier(chemin, forme=None):
+    """
+    Ouvre un fichier image : .npy et images brutes sont projetés en mémoire,
+    les autres formats sont décodés (forme ne s'applique qu'aux images brutes).
+    """
+    extension = os.path.splitext(chemin)[1].lower()
+    if extension == '.npy':
+        return np.load(chemin, mmap_mode='r')
+    if extension in EXTENSIONS_BRUTES:
+        if forme is None:
+            raise ValueError(f"La forme (hauteur, largeur) est nécessaire pour l'image brute : {chemin}")
+        return np.memmap(chemin, dtype=np.uint8, mode='r', shape=tuple(forme))
+    from skimage import io
+    with instrumentation.chronometre('duree', etape='decodage_image'):
+        return io.imread(chemin)
+
+
+def vers_niveaux_de_gris(img):
+    """
+    Convertit un tableau image (niveaux de gris, RGB ou RGBA) en niveaux de gris.
+
+    Paramètres:
+        img (np.ndarray): Image de forme (H, W), (H, W, 3) ou (H, W, 4)
+
+    Retourne:
+        np.ndarray: Image en niveaux de gris (float64, valeurs dans [0, 1])
+    """
+    if img.ndim == 3:
+        if img.shape[-1] == 4:  # Si l'image a un canal alpha
+            img = img[..., :3]
+        from skimage import color
+        return color.rgb2gray(img)
+    if img.ndim != 2:
+        raise ValueError("L'image doit être de forme (H, W), (H, W, 3) ou (H, W, 4).")
+    if np.issubdtype(img.dtype, np.integer):
+        # Même normalisation que rgb2gray pour les images entières
+        return img / np.iinfo(img.dtype).max
+    return img.astype(np.float64, copy=False)
+
+
+def charger_image(source, forme=None, differe=False):
+    """
+    Retourne une ImageGrise à partir d'un chemin, du contenu d'un fichier
+    image (bytes), d'un tableau NumPy ou d'une ImageGrise déjà chargée
+    (renvoyée telle quelle, sans nouveau décodage).
+
+    Les fichiers .npy sont ouverts avec np.load(mmap_mode='r') ; un fichier
+    brut 8 bits en niveaux de gris (.raw, .gray) est projeté avec np.memmap,
+    aux dimensions `forme`. Aucun des deux n'est décodé ni converti ; `forme`
+    est ignorée pour les autres formats, qui indiquent leurs dimensions.
+
+    Paramètres:
+        source (str, bytes, np.ndarray ou ImageGrise): Image à charger
+        forme (tuple, optionnel): (hauteur, largeur) d'une image brute
+            (.raw, .gray)
+        differe (bool): Ne décode un fichier qu'au premier accès à ses
+            données, voir ImageGrise.reduite
+
+    Retourne:
+        ImageGrise: Image décodée en niveaux de gris
+    """
+    if isinstance(source, ImageGrise):
+        return source
+    return ImageGrise(source, forme, differe)
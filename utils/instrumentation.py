@@ -0,0 +1,249 @@
+"""
+Instrumentation de la chaîne de lecture : compteurs, durées par étape et journal.
+
+Les modules de calcul appellent les fonctions de ce module (incrementer,
+chronometre, observer, journal) ; tant qu'aucune instrumentation n'est
+activée, chaque appel se réduit à un test sur une variable globale, sans
+formatage de message ni mesure de temps. Une instrumentation est un objet
+Instrumentation (ou une sous-classe, pour relayer les mesures ailleurs)
+installé par activer().
+
+Exemple:
+    mesures = activer(Instrumentation(verbeux=True))
+    lire_code_barres("photo.jpg")
+    mesures.exporter_prometheus("metriques.prom")
+"""
+
+import json
+import threading
+import time
+
+# Préfixe des métriques au format Prometheus
+PREFIXE_PROMETHEUS = 'codebarres_'
+
+_active = None
+
+
+class Instrumentation:
+    """
+    Collecteur de mesures, utilisable depuis plusieurs threads.
+
+    Les compteurs et les durées sont indexés par leur nom et leurs
+    étiquettes (par exemple raison='parite').
+
+    Attributs:
+        verbeux (bool): Affiche les messages de journal (détails de l'extraction)
+        compteurs (dict): {(nom, etiquettes): valeur}
+        durees (dict): {(nom, etiquettes): [somme, nombre, maximum]} en secondes
+    """
+
+    def __init__(self, verbeux=False):
+        self.verbeux = verbeux
+        self.compteurs = {}
+        self.durees = {}
+        self._verrou = threading.Lock()
+
+    def incrementer(self, nom, valeur=1, **etiquettes):
+        """Ajoute `valeur` au compteur `nom`."""
+        cle = (nom, tuple(sorted(etiquettes.items())))
+        with self._verrou:
+            self.compteurs[cle] = self.compteurs.get(cle, 0) + valeur
+
+    def observer(self, nom, duree, **etiquettes):
+        """Enregistre une durée (en secondes) pour la mesure `nom`."""
+        cle = (nom, tuple(sorted(etiquettes.items())))
+        with self._verrou:
+            cumul = self.durees.setdefault(cle, [0.0, 0, 0.0])
+            cumul[0] += duree
+            cumul[1] += 1
+            cumul[2] = max(cumul[2], duree)
+
+    def journal(self, message):
+        """Affiche un message de diagnostic en mode verbeux."""
+        if self.verbeux:
+            print(message)
+
+    def instantane(self):
+        """
+        Copie des mesures, transmissible entre processus (voir fusionner).
+
+        Retourne:
+            dict: {'compteurs': ..., 'durees': ...}
+        """
+        with self._verrou:
+            return {'compteurs': dict(self.compteurs),
+                    'durees': {cle: list(cumul) for cle, cumul in self.durees.items()}}
+
+    def fusionner(self, instantane):
+        """Ajoute les mesures d'un instantané (par exemple celui d'un autre processus)."""
+        with self._verrou:
+            for cle, valeur in instantane['compteurs'].items():
+                self.compteurs[cle] = self.compteurs.get(cle, 0) + valeur
+            for cle, (somme, nombre, maximum) in instantane['durees'].items():
+                cumul = self.durees.setdefault(cle, [0.0, 0, 0.0])
+                cumul[0] += somme
+                cumul[1] += nombre
+                cumul[2] = max(cumul[2], maximum)
+
+    def reinitialiser(self):
+        """Remet toutes les mesures à zéro."""
+        with self._verrou:
+            self.compteurs.clear()
+            self.durees.clear()
+
+    def vers_json(self):
+        """
+        Mesures sous forme sérialisable en JSON.
+
+        Retourne:
+            dict: {'compteurs': [{'nom', 'etiquettes', 'valeur'}],
+                'durees': [{'nom', 'etiquettes', 'somme_s', 'nombre', 'max_s'}]}
+        """
+        instantane = self.instantane()
+        return {
+            'compteurs': [{'nom': nom, 'etiquettes': dict(etiquettes), 'valeur': valeur}
+                          for (nom, etiquettes), valeur in sorted(instantane['compteurs'].items())],
+            'durees': [{'nom': nom, 'etiquettes': dict(etiquettes), 'somme_s': somme,
+                        'nombre': nombre, 'max_s': maximum}
+                       for (nom, etiquettes), (somme, nombre, maximum)
+                       in sorted(instantane['durees'].items())],
+        }
+
+    def vers_prometheus(self):
+        """
+        Mesures au format texte de Prometheus (compteurs `_total`, durées en
+        résumés `_secondes_sum` / `_secondes_count`).
+
+        Retourne:
+            str: Contenu du fichier d'exposition
+        """
+        instantane = self.instantane()
+        lignes = []
+        types_declares = set()
+
+        def declarer(nom, type_metrique):
+            if nom not in types_declares:
+                types_declares.add(nom)
+                lignes.append(f"# TYPE {nom} {type_metrique}")
+
+        for (nom, etiquettes), valeur in sorted(instantane['compteurs'].items()):
+            metrique = f"{PREFIXE_PROMETHEUS}{nom}_total"
+            declarer(metrique, 'counter')
+            lignes.append(f"{metrique}{_etiquettes_prometheus(etiquettes)} {valeur}")
+        for (nom, etiquettes), (somme, nombre, _) in sorted(instantane['durees'].items()):
+            metrique = f"{PREFIXE_PROMETHEUS}{nom}_secondes"
+            declarer(metrique, 'summary')
+            texte = _etiquettes_prometheus(etiquettes)
+            lignes.append(f"{metrique}_sum{texte} {somme!r}")
+            lignes.append(f"{metrique}_count{texte} {nombre}")
+        return '\n'.join(lignes) + '\n'
+
+    def exporter_json(self, chemin):
+        """Écrit les mesures dans un fichier JSON."""
+        with open(chemin, 'w') as fichier:
+            json.dump(self.vers_json(), fichier, indent=2, ensure_ascii=False)
+
+    def exporter_prometheus(self, chemin):
+        """Écrit les mesures dans un fichier texte Prometheus (collecteur textfile)."""
+        with open(chemin, 'w') as fichier:
+            fichier.write(self.vers_prometheus())
+
+
+def _etiquettes_prometheus(etiquettes):
+    """Formate les étiquettes {cle="valeur",...} (chaîne vide s'il n'y en a pas)."""
+    if not etiquettes:
+        return ''
+    echapper = lambda v: str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    paires = ','.join(f'{cle}="{echapper(valeur)}"' for cle, valeur in etiquettes)
+    return '{' + paires + '}'
+
+
+class _ChronometreInactif:
+    """Chronomètre sans effet, renvoyé quand l'instrumentation est désactivée."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _Chronometre:
+    def __init__(self, instrumentation, nom, etiquettes):
+        self.instrumentation = instrumentation
+        self.nom = nom
+        self.etiquettes = etiquettes
+
+    def __enter__(self):
+        self.debut = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.instrumentation.observer(self.nom, time.perf_counter() - self.debut, **self.etiquettes)
+        return False
+
+
+_CHRONOMETRE_INACTIF = _ChronometreInactif()
+
+
+def activer(instrumentation=None):
+    """
+    Installe une instrumentation pour tout le processus.
+
+    Paramètres:
+        instrumentation (Instrumentation, optionnel): Collecteur à installer
+            (un nouvel Instrumentation par défaut)
+
+    Retourne:
+        Instrumentation: Le collecteur installé
+    """
+    global _active
+    _active = instrumentation if instrumentation is not None else Instrumentation()
+    return _active
+
+
+def desactiver():
+    """Désinstalle l'instrumentation courante (les appels redeviennent sans effet)."""
+    global _active
+    _active = None
+
+
+def active():
+    """Instrumentation installée, ou None."""
+    return _active
+
+
+def incrementer(nom, valeur=1, **etiquettes):
+    """Incrémente un compteur de l'instrumentation active, s'il y en a une."""
+    if _active is not None:
+        _active.incrementer(nom, valeur, **etiquettes)
+
+
+def observer(nom, duree, **etiquettes):
+    """Enregistre une durée dans l'instrumentation active, s'il y en a une."""
+    if _active is not None:
+        _active.observer(nom, duree, **etiquettes)
+
+
+def chronometre(nom, **etiquettes):
+    """
+    Gestionnaire de contexte mesurant la durée de son bloc.
+
+    Exemple:
+        with chronometre('duree', etape='segmentation'):
+            candidats = segmentation_candidats(image)
+    """
+    if _active is None:
+        return _CHRONOMETRE_INACTIF
+    return _Chronometre(_active, nom, etiquettes)
+
+
+def journal(message, *arguments):
+    """
+    Message de diagnostic, formaté avec str.format seulement s'il est affiché.
+
+    Exemple:
+        journal("Longueur du rayon : {} pixels", longueur_rayon)
+    """
+    if _active is not None and _active.verbeux:
+        _active.journal(message.format(*arguments) if arguments else message)
@@ -0,0 +1,146 @@
+"""
+Chaîne de lecture complète d'une image, sans interaction, pour le traitement par lots.
+"""
+
+import os
+import time
+
+from utils import instrumentation
+from utils.cache import empreinte
+from utils.consensus import decoder_par_consensus
+from utils.image import charger_image
+from utils.segmentation import segmentation_candidats
+
+# Statuts possibles d'un résultat
+STATUT_OK = 'ok'
+STATUT_AUCUNE_REGION = 'aucune_region'
+STATUT_ECHEC_DECODAGE = 'echec_decodage'
+STATUT_ERREUR = 'erreur'
+
+
+def resultat_erreur(source, erreur=None):
+    """
+    Résultat d'une image non lue, au format de lire_code_barres.
+
+    Paramètres:
+        source: Image concernée (seul un chemin est reporté dans 'image')
+        erreur (str, optionnel): Message d'erreur
+
+    Retourne:
+        dict: Résultat de statut STATUT_ERREUR
+    """
+    return {
+        'image': source if isinstance(source, str) else None,
+        'code': None,
+        'statut': STATUT_ERREUR,
+        'confiance': 0.0,
+        'tentatives': 0,
+        'region': None,
+        'rayon': None,
+        'cache': False,
+        'temps': {},
+        'erreur': erreur,
+    }
+
+
+def lire_code_barres(source, budget=20, taille_lot=4, seuil_confiance=0.75, mode='plages', seed=0,
+                     nb_threads=1, forme=None, reduction=1, facteur_pyramide=1, econome=False,
+                     taille_tuile=None, cache=None):
+    """
+    Charge, segmente et décode une image ; ne lève jamais d'exception.
+
+    Paramètres:
+        source (str, bytes, np.ndarray ou ImageGrise): Image à décoder (chemin
+            ou contenu d'un fichier image)
+        budget (int): Nombre maximal de rayons
+        taille_lot (int): Nombre de rayons par lot
+        seuil_confiance (float): Confiance à atteindre pour s'arrêter
+        mode (str): 'plages' ou 'modules', voir decoder_par_consensus
+        seed (int): Graine du générateur de rayons
+        nb_threads (int): Nombre de threads pour les lots de rayons (1 pour
+            le traitement par lots, qui parallélise déjà entre images)
+        forme (tuple, optionnel): (hauteur, largeur) d'une image brute 8 bits,
+            voir charger_image
+        reduction (int): 1, 2, 4 ou 8 ; si > 1, la segmentation travaille sur
+            une vue réduite (JPEG décodé directement à résolution réduite) et
+            la pleine résolution n'est décodée qu'au premier rayon
+        facteur_pyramide (int): Si > 1, segmentation grossière-à-fine, voir
+            segmentation_candidats
+        econome (bool): Segmentation en float32, en place, voir segmentation
+        taille_tuile (int, optionnel): Segmentation tuile par tuile des très
+            grandes images, voir segmentation_candidats
+        cache (CacheResultats, optionnel): Cache des résultats ; une image
+            déjà lue avec les mêmes paramètres est servie sans décodage, et
+            seules les lectures réussies sont stockées
+
+    Retourne:
+        dict: {'image', 'code', 'statut', 'confiance', 'tentatives', 'region',
+            'rayon', 'cache', 'temps', 'erreur'} où 'region' donne les coins de
+            la région du rayon gagnant 'rayon' ((x1, y1), (x2, y2)), 'cache'
+            indique un résultat servi par le cache et 'temps' la durée de
+            chaque étape en secondes
+
+    Si une instrumentation est active (voir utils.instrumentation), la durée
+    de chaque étape et le statut du résultat y sont aussi enregistrés.
+    """
+    resultat = resultat_erreur(source)
+    temps = resultat['temps']
+    debut = time.perf_counter()
+    etape = debut
+    cle = None
+    try:
+        # Résultat déjà connu pour les mêmes octets et les mêmes paramètres
+        if cache is not None and isinstance(source, (str, os.PathLike, bytes)):
+            cle = empreinte(source, {'budget': budget, 'taille_lot': taille_lot,
+                                     'seuil_confiance': seuil_confiance, 'mode': mode, 'seed': seed,
+                                     'forme': forme, 'reduction': reduction,
+                                     'facteur_pyramide': facteur_pyramide, 'econome': econome,
+                                     'taille_tuile': taille_tuile})
+            en_cache = cache.lire(cle)
+            temps['cache'] = time.perf_counter() - etape
+            instrumentation.incrementer('cache', resultat='succes' if en_cache else 'echec')
+            if en_cache is not None:
+                resultat.update(en_cache, cache=True)
+                return resultat
+            etape = time.perf_counter()
+
+        image = charger_image(source, forme, differe=reduction > 1)
+        temps['chargement'] = time.perf_counter() - etape
+
+        etape = time.perf_counter()
+        try:
+            candidats = segmentation_candidats(image, econome=econome, reduction=reduction,
+                                               facteur_pyramide=facteur_pyramide, taille_tuile=taille_tuile)
+        except ValueError as e:
+            resultat['statut'] = STATUT_AUCUNE_REGION
+            resultat['erreur'] = str(e)
+            return resultat
+        finally:
+            temps['segmentation'] = time.perf_counter() - etape
+
+        etape = time.perf_counter()
+        consensus = decoder_par_consensus(image, candidats, budget=budget, taille_lot=taille_lot,
+                                          seuil_confiance=seuil_confiance, mode=mode, seed=seed,
+                                          nb_threads=nb_threads)
+        temps['decodage'] = time.perf_counter() - etape
+
+        resultat['code'] = consensus.code
+        resultat['confiance'] = consensus.confiance
+        resultat['tentatives'] = consensus.rayons
+        resultat['statut'] = STATUT_OK if consensus.code else STATUT_ECHEC_DECODAGE
+        if consensus.rayon is not None:
+            resultat['region'] = [list(coin) for coin in consensus.candidat.coins]
+            resultat['rayon'] = consensus.rayon.tolist()
+        if cle is not None and resultat['statut'] == STATUT_OK:
+            cache.ecrire(cle, {cle_resultat: resultat[cle_resultat] for cle_resultat in
+                               ('code', 'statut', 'confiance', 'tentatives', 'region', 'rayon')})
+    except Exception as e:
+        resultat['statut'] = STATUT_ERREUR
+        resultat['erreur'] = f"{type(e).__name__}: {e}"
+    finally:
+        temps['total'] = time.perf_counter() - debut
+        if instrumentation.active() is not None:
+            for nom, duree in temps.items():
+                instrumentation.observer('duree', duree, etape=nom)
+            instrumentation.incrementer('images', statut=resultat['statut'])
+    return resultat
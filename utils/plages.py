@@ -0,0 +1,190 @@
+"""
+Décodage EAN-13 par longueurs de plages (largeurs relatives des barres et espaces).
+
+Contrairement à extract_signature, qui suppose une largeur de module entière,
+ce décodage mesure la largeur de chaque barre et de chaque espace le long du
+rayon (avec une précision inférieure à l'échantillon), puis normalise chaque
+symbole de 4 plages par sa largeur totale de 7 modules, comme le font les
+lecteurs laser. Le rayon peut être parcouru dans les deux sens.
+"""
+
+import numpy as np
+
+from utils import instrumentation
+from utils.decoder import (GARDE_CENTRE, GARDE_DROITE, GARDE_GAUCHE, STATUT_OK,
+                           decode_ean13_lot, message_statut)
+
+# Nombre de plages d'un code EAN-13 : 3 + 6 * 4 + 5 + 6 * 4 + 3
+NB_PLAGES = 59
+
+# Tolérance sur la largeur d'une plage de garde (en modules) et d'un symbole
+TOLERANCE_GARDE = (0.5, 1.5)
+TOLERANCE_SYMBOLE = (5.5, 8.5)
+
+
+def plages(intensites, seuil=None):
+    """
+    Mesure les plages sombres (barres) et claires (espaces) d'un profil.
+
+    Les transitions sont localisées par interpolation linéaire du
+    franchissement du seuil ; les deux plages extrêmes, incomplètes, sont
+    ignorées.
+
+    Paramètres:
+        intensites (np.ndarray): Profil d'intensité le long d'un rayon
+        seuil (float, optionnel): Seuil de binarisation (Otsu par défaut)
+
+    Retourne:
+        tuple: (longueurs, barres) où longueurs contient la largeur de chaque
+            plage (en échantillons) et barres indique les plages sombres
+    """
+    intensites = np.asarray(intensites, dtype=np.float64)
+    if len(intensites) < 2 or np.ptp(intensites) < 1e-8:
+        return np.zeros(0), np.zeros(0, dtype=bool)
+    if seuil is None:
+        from skimage.filters import threshold_otsu
+        seuil = threshold_otsu(intensites)
+    sombre = intensites < seuil
+
+    # Position sous-échantillon de chaque transition
+    transitions = np.nonzero(sombre[1:] != sombre[:-1])[0]
+    v0 = intensites[transitions]
+    v1 = intensites[transitions + 1]
+    positions = transitions + (seuil - v0) / (v1 - v0)
+
+    longueurs = np.diff(positions)
+    barres = sombre[transitions[:-1] + 1]
+    return longueurs, barres
+
+
+def signatures_depuis_plages(longueurs, barres):
+    """
+    Construit une signature de 95 bits pour chaque position de départ possible.
+
+    Toute fenêtre de 59 plages commençant par une barre est interprétée
+    comme un code EAN-13 : les modules de chaque symbole sont obtenus en
+    normalisant ses 4 plages par leur total de 7 modules. Les gardes dont les
+    plages ne mesurent pas environ un module sont mises à zéro, de sorte que
+    decode_ean13_lot les rejette.
+
+    Paramètres:
+        longueurs (np.ndarray): Largeur de chaque plage
+        barres (np.ndarray): Booléens, vrai pour les plages sombres
+
+    Retourne:
+        np.ndarray: Tableau (M, 95) de bits, 1 pour une barre
+    """
+    if len(longueurs) < NB_PLAGES:
+        return np.zeros((0, 95), dtype=np.uint8)
+    departs = np.nonzero(barres[:len(longueurs) - NB_PLAGES + 1])[0]
+    fenetres = np.lib.stride_tricks.sliding_window_view(longueurs, NB_PLAGES)[departs]
+    n = len(fenetres)
+
+    # Largeur d'un module estimée sur l'ensemble du code
+    module = fenetres.sum(axis=1) / 95
+
+    # Gardes : chaque plage doit mesurer environ un module
+    gardes = fenetres[:, np.r_[0:3, 27:32, 56:59]] / module[:, None]
+    gardes_ok = ((gardes > TOLERANCE_GARDE[0]) & (gardes < TOLERANCE_GARDE[1])).all(axis=1)
+
+    # Symboles : 4 plages normalisées sur 7 modules
+    gauche = _modules_symboles(fenetres[:, 3:27].reshape(n, 6, 4), module)
+    droite = _modules_symboles(fenetres[:, 32:56].reshape(n, 6, 4), module)
+
+    signatures = np.zeros((n, 95), dtype=np.uint8)
+    signatures[:, 0:3] = GARDE_GAUCHE
+    signatures[:, 3:45] = _bits_symboles(gauche, premier_bit=0).reshape(n, 42)
+    signatures[:, 45:50] = GARDE_CENTRE
+    signatures[:, 50:92] = _bits_symboles(droite, premier_bit=1).reshape(n, 42)
+    signatures[:, 92:95] = GARDE_DROITE
+    signatures[~gardes_ok] = 0
+    return signatures
+
+
+def signatures_profil(intensites, seuil=None):
+    """
+    Signatures candidates d'un profil, lu dans les deux sens.
+
+    Retourne:
+        np.ndarray: Tableau (M, 95) de bits (sens direct puis sens inverse)
+    """
+    longueurs, barres = plages(intensites, seuil)
+    signatures = np.concatenate([
+        signatures_depuis_plages(longueurs, barres),
+        signatures_depuis_plages(longueurs[::-1], barres[::-1]),
+    ])
+    if len(signatures) == 0:
+        instrumentation.incrementer('extractions_echouees', raison='plages_insuffisantes')
+    return signatures
+
+
+def decode_ean13_profil(intensites, seuil=None):
+    """
+    Décode un code EAN-13 à partir d'un profil d'intensité, quel que soit le
+    sens de lecture et la largeur (non entière) du module.
+
+    Paramètres:
+        intensites (np.ndarray): Profil d'intensité le long d'un rayon
+        seuil (float, optionnel): Seuil de binarisation (Otsu par défaut)
+
+    Retourne:
+        code_barres: chaîne de caractères représentant le code EAN-13 décodé
+    """
+    signatures = signatures_profil(intensites, seuil)
+    if len(signatures) == 0:
+        raise ValueError("Pas assez de barres le long du rayon.")
+    codes, statuts = decode_ean13_lot(signatures)
+    valides = np.nonzero(statuts == STATUT_OK)[0]
+    if len(valides) > 0:
+        return str(codes[valides[0]])
+    # La fenêtre allée le plus loin dans les vérifications explique l'échec
+    meilleure = np.argmax(statuts)
+    raise ValueError(message_statut(statuts[meilleure], signatures[meilleure]))
+
+
+def _modules_symboles(symboles, module):
+    """
+    Convertit des symboles de 4 plages en nombres de modules (somme = 7).
+
+    Les symboles dont la largeur totale s'écarte trop de 7 modules reçoivent
+    des largeurs nulles (motif invalide).
+    """
+    total = symboles.sum(axis=2, keepdims=True)
+    exact = symboles * 7 / total
+    modules = np.clip(np.rint(exact), 1, 4).astype(np.int64)
+
+    # Ajuste la plage la plus mal arrondie jusqu'à obtenir 7 modules
+    for _ in range(3):
+        ecart = 7 - modules.sum(axis=2)
+        if not ecart.any():
+            break
+        erreur = exact - modules
+        plus = np.argmax(np.where(modules < 4, erreur, -np.inf), axis=2)
+        moins = np.argmin(np.where(modules > 1, erreur, np.inf), axis=2)
+        indice = np.where(ecart > 0, plus, moins)
+        np.add.at(modules, (*np.indices(ecart.shape), indice), np.sign(ecart))
+
+    largeur = total[..., 0] / module[:, None]
+    valides = ((largeur > TOLERANCE_SYMBOLE[0]) & (largeur < TOLERANCE_SYMBOLE[1])
+               & (modules.sum(axis=2) == 7))
+    modules[~valides] = 0
+    return modules
+
+
+def _bits_symboles(modules, premier_bit):
+    """
+    Développe des symboles (a, b, c, d) en 7 bits alternés.
+
+    Retourne:
+        np.ndarray: Tableau (..., 7) de bits
+    """
+    fins = np.cumsum(modules, axis=-1)
+    j = np.arange(7)
+    # Indice de la plage contenant chaque module ; la parité donne la couleur
+    plage = (j[None, None, :, None] >= fins[..., None, :]).sum(axis=-1)
+    bits = (plage % 2 == 0).astype(np.uint8)
+    if premier_bit == 0:
+        bits = 1 - bits
+    invalides = (modules == 0).all(axis=-1)
+    bits[invalides] = 0
+    return bits
@@ -0,0 +1,176 @@
+"""
+Base de produits : index des codes EAN-13 connus, pour la vérification des codes lus.
+
+Le catalogue est un fichier texte contenant un code par ligne (plusieurs
+millions de lignes). Il est converti une fois pour toutes en un tableau
+uint64 trié, enregistré au format .npy à côté du fichier texte et reconstruit
+seulement si le texte est plus récent. L'index est ensuite projeté en
+mémoire (np.load avec mmap_mode) : son ouverture est immédiate et une
+recherche par dichotomie ne lit que quelques pages du fichier.
+
+Exemple:
+    index = ouvrir_index("catalogue.txt")
+    index.contient("3017620422003")
+    index.verifier_lot(["3017620422003", "5449000000996"])
+"""
+
+import os
+import threading
+from functools import lru_cache
+
+import numpy as np
+
+# Longueur d'un code EAN-13 : les autres lignes du catalogue sont ignorées
+LONGUEUR_CODE = 13
+
+# Nombre de lignes du catalogue converties à la fois
+LIGNES_PAR_BLOC = 1 << 20
+
+# Suffixe du fichier d'index construit à côté du catalogue texte
+SUFFIXE_INDEX = '.index.npy'
+
+
+def chemin_index(chemin_catalogue):
+    """Chemin du fichier d'index associé à un catalogue texte."""
+    return os.path.splitext(chemin_catalogue)[0] + SUFFIXE_INDEX
+
+
+def _codes_valides(lignes):
+    """Codes EAN-13 (13 chiffres) d'une liste de lignes (bytes), en uint64."""
+    codes = [ligne for ligne in (l.strip() for l in lignes)
+             if len(ligne) == LONGUEUR_CODE and ligne.isdigit()]
+    return np.array(codes, dtype=f'S{LONGUEUR_CODE}').astype(np.uint64)
+
+
+def construire_index(chemin_catalogue, chemin_sortie=None):
+    """
+    Convertit un catalogue texte en index trié et sans doublon.
+
+    Paramètres:
+        chemin_catalogue (str): Fichier texte, un code par ligne ; les lignes
+            qui ne sont pas un code de 13 chiffres sont ignorées
+        chemin_sortie (str, optionnel): Fichier .npy à écrire (par défaut à
+            côté du catalogue, voir chemin_index)
+
+    Retourne:
+        str: Chemin du fichier d'index écrit
+    """
+    if chemin_sortie is None:
+        chemin_sortie = chemin_index(chemin_catalogue)
+    blocs = []
+    with open(chemin_catalogue, 'rb') as fichier:
+        while True:
+            lignes = fichier.readlines(LIGNES_PAR_BLOC * (LONGUEUR_CODE + 1))
+            if not lignes:
+                break
+            blocs.append(_codes_valides(lignes))
+    codes = np.sort(np.concatenate(blocs)) if blocs else np.empty(0, dtype=np.uint64)
+    # Suppression des doublons (plus rapide que np.unique sur un tableau déjà trié)
+    codes = codes[np.concatenate(([True], codes[1:] != codes[:-1]))] if len(codes) else codes
+    # Écriture dans un fichier temporaire : un index à moitié écrit n'est jamais lu
+    temporaire = f"{chemin_sortie}.{os.getpid()}.tmp"
+    with open(temporaire, 'wb') as fichier:
+        np.save(fichier, codes)
+    os.replace(temporaire, chemin_sortie)
+    return chemin_sortie
+
+
+def _vers_entiers(codes):
+    """
+    Convertit des codes (chaînes) en uint64.
+
+    Retourne:
+        tuple: (entiers, valides) où valides indique les codes de 13 chiffres
+            (les autres ne peuvent pas figurer dans l'index)
+    """
+    valides = np.array([isinstance(code, str) and len(code) == LONGUEUR_CODE and code.isdigit()
+                        for code in codes], dtype=bool)
+    entiers = np.zeros(len(valides), dtype=np.uint64)
+    if valides.any():
+        entiers[valides] = np.array([code for code, valide in zip(codes, valides) if valide],
+                                    dtype=f'U{LONGUEUR_CODE}').astype(np.uint64)
+    return entiers, valides
+
+
+class IndexProduits:
+    """
+    Index trié des codes d'un catalogue, chargé au premier accès.
+
+    Attributs:
+        chemin (str): Fichier .npy de l'index
+    """
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+        self._codes = None
+        self._verrou = threading.Lock()
+
+    @property
+    def codes(self):
+        """Codes triés (uint64), projetés en mémoire au premier accès."""
+        if self._codes is None:
+            with self._verrou:
+                if self._codes is None:
+                    self._codes = np.load(self.chemin, mmap_mode='r')
+        return self._codes
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __contains__(self, code):
+        return self.contient(code)
+
+    def contient(self, code):
+        """
+        Indique si un code figure dans le catalogue (recherche dichotomique).
+
+        Paramètres:
+            code (str): Code EAN-13 décodé
+
+        Retourne:
+            bool: True si le produit est connu
+        """
+        return bool(self.verifier_lot([code])[0])
+
+    def verifier_lot(self, codes):
+        """
+        Vérifie un lot de codes en une seule recherche vectorisée.
+
+        Paramètres:
+            codes (list): Codes EAN-13 décodés (None ou code invalide : absent)
+
+        Retourne:
+            np.ndarray: Booléens, True pour les codes présents dans le catalogue
+        """
+        entiers, valides = _vers_entiers(codes)
+        index = self.codes
+        if len(index) == 0:
+            return np.zeros(len(entiers), dtype=bool)
+        positions = np.minimum(np.searchsorted(index, entiers), len(index) - 1)
+        return valides & (index[positions] == entiers)
+
+
+@lru_cache(maxsize=None)
+def _index_a_jour(chemin_index_npy, date_modification):
+    """Index ouvert une seule fois par processus et par version du fichier."""
+    return IndexProduits(chemin_index_npy)
+
+
+def ouvrir_index(chemin):
+    """
+    Index d'un catalogue, construit si nécessaire puis gardé ouvert.
+
+    Paramètres:
+        chemin (str): Catalogue texte (l'index est reconstruit s'il manque ou
+            s'il est plus ancien que le texte) ou fichier d'index .npy
+
+    Retourne:
+        IndexProduits: Index du catalogue
+    """
+    if chemin.endswith('.npy'):
+        index = chemin
+    else:
+        index = chemin_index(chemin)
+        if not os.path.exists(index) or os.path.getmtime(index) < os.path.getmtime(chemin):
+            construire_index(chemin, index)
+    return _index_a_jour(os.path.abspath(index), os.path.getmtime(index))
@@ -1,11 +1,16 @@
 import numpy as np
 
-def lancer_aleatoire(C1, C2, C3, C4):
+from utils import instrumentation
+
+def lancer_aleatoire(C1, C2, C3, C4, angle=None):
     """
     Génère un rayon aléatoire ou orienté dans une zone délimitée par 4 coins.
     
     Paramètres:
         C1, C2, C3, C4 (tuple): Coordonnées des coins de la région (x, y).
+        angle (float, optionnel): Angle des barres en radians (voir
+            segmentation_candidats). Les rayons sont alors orientés
+            perpendiculairement aux barres au lieu de suivre C1 -> C2.
         
     Retourne:
         (tuple): Coordonnées des points de départ et d'arrivée du rayon.
@@ -15,8 +20,11 @@ def lancer_aleatoire(C1, C2, C3, C4):
         raise ValueError("Tous les points doivent avoir deux coordonnées (x, y).")
     
     # Calculer la direction principale
-    direction = np.array([C2[0] - C1[0], C2[1] - C1[1]])
-    direction = direction / np.linalg.norm(direction)
+    if angle is not None:
+        direction = np.array([np.sin(angle), -np.cos(angle)])
+    else:
+        direction = np.array([C2[0] - C1[0], C2[1] - C1[1]])
+        direction = direction / np.linalg.norm(direction)
     
     # Angle maximum autorisé (30 degrés)
     angle_max = np.pi/6
@@ -48,11 +56,73 @@ def lancer_aleatoire(C1, C2, C3, C4):
         
         # Si l'angle est inférieur à la limite, retourner le rayon
         if angle < angle_max:
+            instrumentation.incrementer('rayons_generes', methode='aleatoire')
+            instrumentation.incrementer('rayons_rejetes', essais - 1, methode='aleatoire')
             return p1, p2
     
     # Si aucun rayon adéquat n'a été trouvé, retourner le dernier généré
+    instrumentation.incrementer('rayons_generes', methode='aleatoire')
+    instrumentation.incrementer('rayons_rejetes', essais, methode='aleatoire')
     return p1, p2
 
+def lancers_aleatoires(C1, C2, C3, C4, nb_rayons, angle=None, rng=None, max_essais=100):
+    """
+    Version vectorisée de lancer_aleatoire : génère nb_rayons rayons en un appel.
+    
+    Toutes les extrémités sont tirées en une fois par un np.random.Generator,
+    puis la contrainte d'angle (30 degrés) est appliquée sous forme de masque ;
+    seuls les rayons rejetés sont retirés, au plus max_essais fois. Comme dans
+    lancer_aleatoire, un rayon jamais accepté garde son dernier tirage.
+    
+    Paramètres:
+        C1, C2, C3, C4 (tuple): Coordonnées des coins de la région (x, y).
+        nb_rayons (int): Nombre de rayons à générer.
+        angle (float, optionnel): Angle des barres en radians, voir lancer_aleatoire.
+        rng (int ou np.random.Generator, optionnel): Générateur ou graine ; chaque
+            processus peut ainsi disposer d'un flux indépendant et reproductible.
+        max_essais (int): Nombre maximal de tirages par rayon.
+        
+    Retourne:
+        np.ndarray: Tableau (nb_rayons, 2, 2) des extrémités ((x1, y1), (x2, y2)).
+    """
+    if not all(len(point) == 2 for point in [C1, C2, C3, C4]):
+        raise ValueError("Tous les points doivent avoir deux coordonnées (x, y).")
+    C1, C2, C3, C4 = (np.asarray(C, dtype=np.float64) for C in (C1, C2, C3, C4))
+    rng = np.random.default_rng(rng)
+    
+    # Calculer la direction principale
+    if angle is not None:
+        direction = np.array([np.sin(angle), -np.cos(angle)])
+    else:
+        direction = (C2 - C1) / np.linalg.norm(C2 - C1)
+    cos_max = np.cos(np.pi/6)
+    
+    rayons = np.empty((nb_rayons, 2, 2))
+    a_tirer = np.arange(nb_rayons)
+    for _ in range(max_essais + 1):
+        n = len(a_tirer)
+        # Points aléatoires sur les segments opposés, sens tiré au hasard
+        gauche = C1 + rng.random((n, 1)) * (C4 - C1)
+        droite = C2 + rng.random((n, 1)) * (C3 - C2)
+        inverse = (rng.random(n) < 0.5)[:, None]
+        p1 = np.where(inverse, droite, gauche)
+        p2 = np.where(inverse, gauche, droite)
+        rayons[a_tirer, 0] = p1
+        rayons[a_tirer, 1] = p2
+        
+        # Contrainte d'angle appliquée à tous les rayons à la fois
+        rayon = p2 - p1
+        norme = np.linalg.norm(rayon, axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cos_angle = np.abs(rayon @ direction) / norme
+        acceptes = (norme > 0) & (cos_angle > cos_max)
+        a_tirer = a_tirer[~acceptes]
+        instrumentation.incrementer('rayons_rejetes', len(a_tirer), methode='aleatoire')
+        if len(a_tirer) == 0:
+            break
+    instrumentation.incrementer('rayons_generes', nb_rayons, methode='aleatoire')
+    return rayons
+
 def point_aleatoire_segment(P1, P2):
     """
     Génère un point aléatoire sur un segment [P1, P2].
@@ -65,4 +135,73 @@ def point_aleatoire_segment(P1, P2):
         tuple: Point aléatoire sur le segment (x, y)
     """
     t = np.random.random()
-    return (P1[0] + t * (P2[0] - P1[0]), P1[1] + t * (P2[1] - P1[1]))
\ No newline at end of file
+    return (P1[0] + t * (P2[0] - P1[0]), P1[1] + t * (P2[1] - P1[1]))
+
+def rayons_stratifies(C1, C2, C3, C4, nb_rayons, perturbation=np.pi/36, seed=None):
+    """
+    Génère un ensemble déterministe de rayons couvrant la région de manière systématique.
+    
+    Les rayons traversent la région de C1-C4 vers C2-C3. Leurs positions le
+    long de C1 -> C4 suivent une suite à faible discrépance (van der Corput en
+    base 2) ordonnée du centre vers les bords : 1/2, 1/4, 3/4, 3/8, 5/8, ...
+    Deux rayons consécutifs ne tombent donc jamais sur la même ligne. Chaque
+    rayon (sauf le premier) est légèrement incliné d'un angle tiré dans
+    [-perturbation, perturbation] par un générateur initialisé avec `seed`.
+    
+    Paramètres:
+        C1, C2, C3, C4 (tuple): Coordonnées des coins de la région (x, y).
+        nb_rayons (int): Nombre de rayons à générer.
+        perturbation (float): Inclinaison maximale des rayons, en radians.
+        seed (int ou np.random.Generator, optionnel): Graine du générateur.
+        
+    Les rayons ne sont pas comptés ici (compteur rayons_generes) : le
+    décodage par consensus s'arrête souvent avant d'avoir épuisé le budget,
+    et ne compte que les rayons effectivement extraits.
+    
+    Retourne:
+        np.ndarray: Tableau (nb_rayons, 2, 2) des extrémités, par ordre de priorité.
+    """
+    C1, C2, C3, C4 = (np.asarray(C, dtype=np.float64) for C in (C1, C2, C3, C4))
+    rng = np.random.default_rng(seed)
+    if nb_rayons <= 0:
+        return np.empty((0, 2, 2))
+    
+    # Positions centre -> bords : 1/2, puis 1/2 -/+ vdc(j)/2 en alternance
+    k = np.arange(nb_rayons)
+    positions = 0.5 + np.where(k % 2 == 1, -0.5, 0.5) * _van_der_corput((k + 1) // 2)
+    
+    # Inclinaison : décalage relatif entre l'entrée et la sortie du rayon
+    angles = rng.uniform(-perturbation, perturbation, nb_rayons)
+    angles[0] = 0.0
+    largeur = np.linalg.norm(C2 - C1)
+    hauteur = max(np.linalg.norm(C4 - C1), 1e-12)
+    decalage = np.tan(angles) * largeur / (2 * hauteur)
+    
+    t1 = np.clip(positions - decalage, 0, 1)[:, None]
+    t2 = np.clip(positions + decalage, 0, 1)[:, None]
+    p1 = C1 + t1 * (C4 - C1)
+    p2 = C2 + t2 * (C3 - C2)
+    return np.stack([p1, p2], axis=1)
+
+def ordonnancer_rayons(C1, C2, C3, C4, nb_rayons, perturbation=np.pi/36, seed=None):
+    """
+    Fournit un à un, par ordre de priorité, les rayons de rayons_stratifies.
+    Chaque rayon n'est compté comme généré qu'une fois fourni.
+    
+    Retourne:
+        générateur: Couples (p1, p2) de points (x, y).
+    """
+    for p1, p2 in rayons_stratifies(C1, C2, C3, C4, nb_rayons, perturbation, seed):
+        instrumentation.incrementer('rayons_generes', methode='stratifie')
+        yield tuple(p1), tuple(p2)
+
+def _van_der_corput(n):
+    """Suite de van der Corput en base 2 pour un tableau d'entiers n >= 0."""
+    n = np.asarray(n, dtype=np.int64).copy()
+    resultat = np.zeros(n.shape)
+    base = 0.5
+    while np.any(n > 0):
+        resultat += (n & 1) * base
+        n >>= 1
+        base /= 2
+    return resultat
@@ -1,71 +1,502 @@
+from collections import namedtuple
+
 import numpy as np
-from scipy.signal import convolve2d
-from skimage import color, io
-from skimage.morphology import closing, opening, square
-from skimage.measure import label, regionprops
+from utils.convolution import convoluer, noyaux_segmentation
+from utils.image import charger_image, vers_niveaux_de_gris
+
+# Paramètres de la segmentation
+SIGMA_NOISE = 0.02
+SEUIL_COHERENCE = 0.3
+
+# Nombre de lignes de bruit tirées à la fois en mode économe
+LIGNES_PAR_BLOC = 256
+
+# Région candidate orientée renvoyée par segmentation_candidats
+Candidat = namedtuple('Candidat', ['coins', 'angle', 'coherence', 'aire', 'bbox'])
+Candidat.__doc__ = """
+Région candidate orientée.
+
+Attributs:
+    coins (tuple): Coins (C1, C2, C3, C4) du rectangle orienté, en (x, y) ;
+        C1 -> C2 suit l'axe du code-barres (perpendiculaire aux barres)
+    angle (float): Angle dominant des barres, en radians dans [0, pi)
+    coherence (float): Valeur moyenne de la carte D1 sur la région
+    aire (int): Nombre de pixels de la région
+    bbox (tuple): Boîte englobante (min_row, min_col, max_row, max_col)
+"""
 
-def segmentation(image_path):
+def segmentation(image, methode='auto', facteur_pyramide=1, econome=False, reduction=1):
     """
     Segmente une image pour identifier la zone contenant un code-barres.
     
     Args:
-        image_path (str): Chemin vers l'image à analyser
+        image (str, np.ndarray ou ImageGrise): Chemin vers l'image à analyser,
+            tableau image ou image déjà décodée
+        methode (str): Méthode de convolution ('auto', 'directe', 'separable'
+            ou 'fft'), voir utils.convolution.convoluer
+        facteur_pyramide (int): Facteur de réduction du niveau grossier. Si > 1,
+            la région est d'abord cherchée sur l'image réduite puis affinée à
+            pleine résolution dans sa seule boîte englobante
+        econome (bool): Mode économe en mémoire : calcul en float32, en place,
+            dans quelques tampons réutilisés (voir tenseur_structure)
+        reduction (int): Si > 1 (2, 4 ou 8), segmente la vue réduite de
+            l'image (un JPEG est alors décodé directement à résolution
+            réduite, voir ImageGrise.reduite) ; la boîte est renvoyée en
+            coordonnées pleine résolution
         
     Returns:
         tuple: (min_row, min_col, max_row, max_col) délimitant la région d'intérêt
     """
-    # Chargement de l'image
-    img = io.imread(image_path)
-    if img.shape[-1] == 4:  # Si l'image a un canal alpha
-        img = img[..., :3]  # Supprimer le canal alpha
-    I = color.rgb2gray(img)
+    # Chargement de l'image (aucun décodage si elle est déjà en mémoire)
+    image = charger_image(image)
     
-    # Paramètres
-    sigma_noise = 0.02
-    sigma_G = 1.8
-    sigma_T = 18
-    seuil_coherence = 0.3
+    if reduction > 1:
+        I, echelles = image.reduite(reduction)
+        bbox = segmentation(I, methode, facteur_pyramide, econome)
+        return _agrandir_bbox(bbox, *echelles, image.shape)
     
+    if facteur_pyramide > 1:
+        I = image.gris
+        return _segmentation_pyramide(I, methode, facteur_pyramide, econome)
+    # En mode économe, les données d'origine (éventuellement projetées en
+    # mémoire) sont converties bloc par bloc
+    I = image.donnees if econome else image.gris
+    return _segmentation_pleine(I, methode, econome)
+
+def _segmentation_pleine(I, methode='auto', econome=False):
+    """
+    Segmentation à pleine résolution d'une image en niveaux de gris.
+    
+    Returns:
+        tuple: (min_row, min_col, max_row, max_col) de la plus grande région
+    """
     # Ajout de bruit
-    bruit = np.random.normal(0, sigma_noise, I.shape)
-    I_bruite = np.clip(I + bruit, 0, 1)
+    I_bruite = _bruiter(I, econome)
     
-    # Calcul des gradients
-    size = int(3 * sigma_G)
-    x, y = np.meshgrid(np.arange(-size, size+1), np.arange(-size, size+1))
-    G_x = -(x / (2 * np.pi * sigma_G**4)) * np.exp(-(x**2 + y**2) / (2*sigma_G**2))
-    G_y = -(y / (2 * np.pi * sigma_G**4)) * np.exp(-(x**2 + y**2) / (2*sigma_G**2))
+    # Calcul de cohérence D1 (en mode économe, I_bruite sert de tampon)
+    if econome:
+        D1 = coherence(*_tenseur_econome(I_bruite, 1.8, 18, methode, ecraser=True), econome=True)
+    else:
+        D1 = carte_coherence(I_bruite, methode=methode)
     
-    I_x = convolve2d(I_bruite, G_x, mode='same', boundary='symm')
-    I_y = convolve2d(I_bruite, G_y, mode='same', boundary='symm')
+    # Segmentation et nettoyage morphologique
+    labels = _etiqueter(D1)
     
-    norme = np.sqrt(I_x**2 + I_y**2) + 1e-8
-    I_x /= norme
-    I_y /= norme
+    # Extraction de la plus grande région
+    if labels.max() > 0:
+        from skimage.measure import regionprops
+        regions = regionprops(labels)
+        largest_region = max(regions, key=lambda r: r.area)
+        return largest_region.bbox  # (min_row, min_col, max_row, max_col)
+    else:
+        raise ValueError("Aucune région cohérente détectée.")
+
+def segmentation_candidats(image, max_candidats=5, methode='auto', econome=False, reduction=1,
+                           facteur_pyramide=1, taille_tuile=None):
+    """
+    Segmente une image et renvoie les régions candidates orientées, classées.
     
-    # Tenseur de structure
-    size_T = int(2 * sigma_T)
-    G = (1 / (2 * np.pi * sigma_T**2)) * np.exp(-(x**2 + y**2) / (2 * sigma_T**2))
+    L'orientation de chaque région est tirée du tenseur de structure moyen
+    (T_xx, T_xy, T_yy) sur ses pixels, trous bouchés (les barres, très
+    cohérentes, sont absentes du masque) ; le rectangle renvoyé est aligné sur
+    l'axe du code-barres, de sorte que lancer_aleatoire(*candidat.coins)
+    tire des rayons perpendiculaires aux barres. Les candidats sont classés
+    par score décroissant (aire x cohérence moyenne).
     
-    T_xx = convolve2d(I_x**2, G, mode='same', boundary='symm')
-    T_xy = convolve2d(I_x * I_y, G, mode='same', boundary='symm')
-    T_yy = convolve2d(I_y**2, G, mode='same', boundary='symm')
+    Args:
+        image (str, np.ndarray ou ImageGrise): Image à analyser
+        max_candidats (int): Nombre maximal de candidats renvoyés
+        methode (str): Méthode de convolution, voir utils.convolution.convoluer
+        econome (bool): Mode économe en mémoire, voir segmentation
+        reduction (int): Segmentation sur la vue réduite, voir segmentation ;
+            les candidats sont renvoyés en coordonnées pleine résolution
+        facteur_pyramide (int): Si > 1, les candidats sont d'abord cherchés
+            sur l'image réduite d'autant puis affinés à pleine résolution
+            dans la seule boîte qui les englobe (voir _candidats_pyramide)
+        taille_tuile (int, optionnel): Si donnée, segmentation tuile par tuile
+            des très grandes images (voir utils.tuiles.candidats_tuiles) ; le
+            bruit de segmentation est alors tiré par blocs (bruit_fenetre)
+        
+    Returns:
+        list: Liste de Candidat, du meilleur au moins bon
+    """
+    image = charger_image(image)
+    if reduction > 1:
+        I, echelles = image.reduite(reduction)
+        candidats = segmentation_candidats(I, max_candidats, methode, econome,
+                                           facteur_pyramide=facteur_pyramide, taille_tuile=taille_tuile)
+        return [agrandir_candidat(c, *echelles, image.shape) for c in candidats]
+    if taille_tuile is not None:
+        if facteur_pyramide > 1:
+            raise ValueError("La segmentation par tuiles et la pyramide ne se combinent pas.")
+        if methode not in ('auto', 'separable'):
+            raise ValueError(f"La segmentation par tuiles n'utilise que la convolution séparable, pas : {methode}")
+        from utils.tuiles import candidats_tuiles
+        return candidats_tuiles(image, max_candidats, taille_tuile, econome=econome)
+    if facteur_pyramide > 1:
+        return _candidats_pyramide(image.gris, max_candidats, methode, facteur_pyramide, econome)
+    return _candidats_pleins(image.donnees if econome else image.gris, max_candidats, methode, econome)
+
+def _candidats_pleins(I, max_candidats=5, methode='auto', econome=False):
+    """
+    Régions candidates orientées d'une image à pleine résolution.
     
-    # Calcul de cohérence D1
-    D1 = 1 - np.sqrt((T_xx - T_yy)**2 + 4*(T_xy**2)) / (T_xx + T_yy + 1e-15)
+    Returns:
+        list: Liste de Candidat, du meilleur au moins bon
+    """
+    return _candidats_bruites(_bruiter(I, econome), max_candidats, methode, econome)
+
+def _candidats_bruites(I_bruite, max_candidats=5, methode='auto', econome=False):
+    """
+    Comme _candidats_pleins, sur une image déjà bruitée (écrasée en mode économe).
     
-    # Segmentation
-    M = (D1 > seuil_coherence).astype(int)
+    Returns:
+        list: Liste de Candidat, du meilleur au moins bon
+    """
+    if econome:
+        T_xx, T_xy, T_yy = _tenseur_econome(I_bruite, 1.8, 18, methode, ecraser=True)
+    else:
+        T_xx, T_xy, T_yy = tenseur_structure(I_bruite, methode=methode)
+    D1 = coherence(T_xx, T_xy, T_yy, econome=econome)
+    labels = _etiqueter(D1)
+    if labels.max() == 0:
+        raise ValueError("Aucune région cohérente détectée.")
+    
+    from skimage.measure import regionprops
+    candidats = [_candidat_region(region, T_xx, T_xy, T_yy, D1) for region in regionprops(labels)]
+    candidats.sort(key=lambda c: c.aire * c.coherence, reverse=True)
+    return candidats[:max_candidats]
+
+def _candidat_region(region, T_xx, T_xy, T_yy, D1):
+    """
+    Candidat orienté d'une région étiquetée.
+    
+    Args:
+        region (RegionProperties): Région de skimage.measure.regionprops
+        T_xx, T_xy, T_yy (np.ndarray): Composantes du tenseur de structure
+        D1 (np.ndarray): Carte de cohérence, dans le même repère que la région
+        
+    Returns:
+        Candidat: Rectangle orienté selon l'axe du code-barres
+    """
+    from scipy.ndimage import binary_fill_holes
+    rows, cols = region.coords[:, 0], region.coords[:, 1]
+    
+    # Direction dominante du gradient = axe du code-barres. Les barres,
+    # très cohérentes, forment des trous dans la région (D1 faible) : le
+    # tenseur est donc moyenné sur la région aux trous bouchés.
+    min_row, min_col = region.bbox[:2]
+    trous_r, trous_c = np.nonzero(binary_fill_holes(region.image))
+    trous_r, trous_c = trous_r + min_row, trous_c + min_col
+    sommes = tuple(T[trous_r, trous_c].sum(dtype=np.float64) for T in (T_xx, T_xy, T_yy))
+    return candidat_oriente(*sommes, rows, cols, float(D1[rows, cols].mean(dtype=np.float64)),
+                            int(region.area), region.bbox)
+
+def candidat_oriente(S_xx, S_xy, S_yy, rows, cols, coherence, aire, bbox):
+    """
+    Candidat orienté à partir des sommes du tenseur de structure sur une région.
+    
+    Args:
+        S_xx, S_xy, S_yy (float): Sommes de T_xx, T_xy et T_yy sur la région aux trous bouchés
+        rows, cols (np.ndarray): Pixels de la région, ou seulement les extrémités
+            de chacune de ses lignes (les projections extrêmes sont les mêmes)
+        coherence (float): Valeur moyenne de D1 sur la région
+        aire (int): Nombre de pixels de la région
+        bbox (tuple): Boîte englobante (min_row, min_col, max_row, max_col)
+        
+    Returns:
+        Candidat: Rectangle orienté selon l'axe du code-barres
+    """
+    theta = 0.5 * np.arctan2(2 * S_xy, S_xx - S_yy)
+    u = np.array([np.cos(theta), np.sin(theta)])
+    v = np.array([-np.sin(theta), np.cos(theta)])
+    
+    # Rectangle orienté : projections extrêmes des pixels sur (u, v)
+    proj_u = cols * u[0] + rows * u[1]
+    proj_v = cols * v[0] + rows * v[1]
+    coins = tuple(
+        tuple(float(c) for c in a * u + b * v)
+        for a, b in ((proj_u.min(), proj_v.min()), (proj_u.max(), proj_v.min()),
+                     (proj_u.max(), proj_v.max()), (proj_u.min(), proj_v.max()))
+    )
+    return Candidat(
+        coins=coins,
+        angle=float((theta + np.pi / 2) % np.pi),
+        coherence=coherence,
+        aire=aire,
+        bbox=bbox,
+    )
+
+def _candidats_pyramide(I, max_candidats, methode, facteur, econome=False):
+    """
+    Recherche des candidats grossière-à-fine, comme _segmentation_pyramide.
+    
+    Les candidats trouvés sur l'image réduite sont ramenés à pleine
+    résolution ; la boîte qui les englobe, élargie d'une marge couvrant le
+    support des noyaux, est ensuite segmentée à pleine résolution. Si cette
+    boîte couvre plus de la moitié de l'image, ou si l'affinage ne trouve
+    rien, les candidats grossiers sont renvoyés tels quels ; si le niveau
+    grossier ne trouve rien, l'image entière est segmentée.
+    
+    Returns:
+        list: Liste de Candidat en coordonnées pleine résolution
+    """
+    I_reduite = reduire(I, facteur)
+    if min(I_reduite.shape) < 2 * len(noyaux_segmentation()['G'][0]):
+        return _candidats_pleins(I, max_candidats, methode, econome)
+    try:
+        grossiers = _candidats_pleins(I_reduite, max_candidats, methode, econome)
+    except ValueError:
+        return _candidats_pleins(I, max_candidats, methode, econome)
+    grossiers = [agrandir_candidat(c, facteur, facteur, I.shape) for c in grossiers]
+    
+    # Boîte englobant tous les candidats grossiers, avec une marge
+    marge = facteur * len(noyaux_segmentation()['G'][0])
+    r0 = max(0, min(c.bbox[0] for c in grossiers) - marge)
+    c0 = max(0, min(c.bbox[1] for c in grossiers) - marge)
+    r1 = min(I.shape[0], max(c.bbox[2] for c in grossiers) + marge)
+    c1 = min(I.shape[1], max(c.bbox[3] for c in grossiers) + marge)
+    if (r1 - r0) * (c1 - c0) > 0.5 * I.size:
+        return grossiers
+    
+    # Affinage à pleine résolution dans la seule boîte des candidats
+    try:
+        fins = _candidats_pleins(I[r0:r1, c0:c1], max_candidats, methode, econome)
+    except ValueError:
+        return grossiers
+    return [decaler_candidat(c, r0, c0) for c in fins]
+
+def decaler_candidat(candidat, r0, c0):
+    """
+    Ramène aux coordonnées de l'image un candidat trouvé dans une fenêtre.
+    
+    Args:
+        candidat (Candidat): Candidat en coordonnées de la fenêtre
+        r0, c0 (int): Ligne et colonne du coin supérieur gauche de la fenêtre
+        
+    Returns:
+        Candidat: Candidat translaté (coins et bbox)
+    """
+    min_row, min_col, max_row, max_col = candidat.bbox
+    return candidat._replace(coins=tuple((x + c0, y + r0) for x, y in candidat.coins),
+                             bbox=(min_row + r0, min_col + c0, max_row + r0, max_col + c0))
+
+def agrandir_candidat(candidat, echelle_y, echelle_x, forme):
+    """
+    Ramène un candidat trouvé sur une vue réduite à pleine résolution.
+    
+    Args:
+        candidat (Candidat): Candidat en coordonnées réduites
+        echelle_y, echelle_x (float): Rapports pleine résolution / réduite
+        forme (tuple): (hauteur, largeur) de l'image pleine résolution
+        
+    Returns:
+        Candidat: Candidat en coordonnées pleine résolution
+    """
+    # Centre du pixel réduit -> centre des pixels qu'il recouvre
+    coins = tuple(((x + 0.5) * echelle_x - 0.5, (y + 0.5) * echelle_y - 0.5) for x, y in candidat.coins)
+    return candidat._replace(coins=coins, aire=int(round(candidat.aire * echelle_x * echelle_y)),
+                             bbox=_agrandir_bbox(candidat.bbox, echelle_y, echelle_x, forme))
+
+def _agrandir_bbox(bbox, echelle_y, echelle_x, forme):
+    """Boîte (min_row, min_col, max_row, max_col) réduite ramenée à pleine résolution."""
+    min_row, min_col, max_row, max_col = bbox
+    return (int(min_row * echelle_y), int(min_col * echelle_x),
+            min(forme[0], int(np.ceil(max_row * echelle_y))), min(forme[1], int(np.ceil(max_col * echelle_x))))
+
+def _bruiter(I, econome=False):
+    """
+    Ajoute le bruit gaussien de la segmentation et recadre dans [0, 1].
+    
+    En mode économe, le bruit est tiré par blocs de lignes (même suite de
+    tirages que d'un seul bloc) et ajouté directement dans l'image float32 ;
+    I peut alors être un tableau entier, converti bloc par bloc.
+    """
+    if not econome:
+        bruit = np.random.normal(0, SIGMA_NOISE, I.shape)
+        return np.clip(I + bruit, 0, 1)
+    I_bruite = np.empty(I.shape, dtype=np.float32)
+    for debut in range(0, I.shape[0], LIGNES_PAR_BLOC):
+        bloc = slice(debut, debut + LIGNES_PAR_BLOC)
+        np.add(vers_niveaux_de_gris(np.asarray(I[bloc])), np.random.normal(0, SIGMA_NOISE, I_bruite[bloc].shape), out=I_bruite[bloc],
+               casting='same_kind')
+    return np.clip(I_bruite, 0, 1, out=I_bruite)
+
+def _etiqueter(D1):
+    """Seuille la carte D1, la nettoie et étiquette ses régions connexes."""
+    from skimage.measure import label
+    from skimage.morphology import closing, opening, square
+    # Masque booléen : mêmes régions qu'un masque entier, 8 fois moins de mémoire
+    M = D1 > SEUIL_COHERENCE
     
     # Nettoyage morphologique
     M_clean = closing(M, square(3))
     M_clean = opening(M_clean, square(2))
+    return label(M_clean)
+
+def _segmentation_pyramide(I, methode, facteur, econome=False):
+    """
+    Segmentation grossière-à-fine.
     
-    # Extraction de la plus grande région
-    labels = label(M_clean)
-    if labels.max() > 0:
-        regions = regionprops(labels)
-        largest_region = max(regions, key=lambda r: r.area)
-        return largest_region.bbox  # (min_row, min_col, max_row, max_col)
+    Le tenseur de structure et la cohérence sont d'abord calculés sur l'image
+    réduite d'un facteur `facteur` ; la plus grande région trouvée est ensuite
+    affinée à pleine résolution dans sa boîte englobante, élargie d'une marge
+    couvrant le support des noyaux. Si le niveau grossier ne trouve rien, la
+    segmentation pleine résolution est utilisée, pour ne pas perdre de
+    détections. Lorsque la boîte couvre déjà plus de la moitié de l'image,
+    l'affinage coûterait autant qu'une segmentation complète : la boîte
+    grossière (précise à `facteur` pixels près) est alors renvoyée telle quelle.
+    
+    Returns:
+        tuple: (min_row, min_col, max_row, max_col) en coordonnées pleine résolution
+    """
+    I_reduite = reduire(I, facteur)
+    if min(I_reduite.shape) < 2 * len(noyaux_segmentation()['G'][0]):
+        return _segmentation_pleine(I, methode, econome)
+    try:
+        min_row, min_col, max_row, max_col = _segmentation_pleine(I_reduite, methode, econome)
+    except ValueError:
+        return _segmentation_pleine(I, methode, econome)
+    
+    # Boîte grossière ramenée à pleine résolution, avec une marge
+    marge = facteur * len(noyaux_segmentation()['G'][0])
+    r0 = max(0, min_row * facteur - marge)
+    c0 = max(0, min_col * facteur - marge)
+    r1 = min(I.shape[0], max_row * facteur + marge)
+    c1 = min(I.shape[1], max_col * facteur + marge)
+    bbox_grossiere = (min(I.shape[0], min_row * facteur), min(I.shape[1], min_col * facteur),
+                      min(I.shape[0], max_row * facteur), min(I.shape[1], max_col * facteur))
+    if (r1 - r0) * (c1 - c0) > 0.5 * I.size:
+        return bbox_grossiere
+    
+    # Affinage à pleine résolution dans la seule région candidate
+    try:
+        fin = _segmentation_pleine(I[r0:r1, c0:c1], methode, econome)
+    except ValueError:
+        return bbox_grossiere
+    return (fin[0] + r0, fin[1] + c0, fin[2] + r0, fin[3] + c0)
+
+def reduire(I, facteur):
+    """
+    Réduit une image d'un facteur entier par moyenne sur des blocs facteur x facteur.
+    
+    Args:
+        I (np.ndarray): Image 2D
+        facteur (int): Facteur de réduction
+        
+    Returns:
+        np.ndarray: Image réduite de forme (H // facteur, W // facteur)
+    """
+    h, w = I.shape[0] // facteur, I.shape[1] // facteur
+    blocs = I[:h * facteur, :w * facteur].reshape(h, facteur, w, facteur)
+    return blocs.mean(axis=(1, 3))
+
+def carte_coherence(I_bruite, sigma_G=1.8, sigma_T=18, methode='auto', econome=False):
+    """
+    Calcule la carte de cohérence D1 issue du tenseur de structure.
+    
+    Args:
+        I_bruite (np.ndarray): Image en niveaux de gris (déjà bruitée)
+        sigma_G (float): Écart-type des dérivées de gaussienne
+        sigma_T (float): Écart-type du lissage du tenseur de structure
+        methode (str): Méthode de convolution, voir utils.convolution.convoluer
+        econome (bool): Calcul en float32 et en place, voir tenseur_structure
+        
+    Returns:
+        np.ndarray: Carte D1, de même forme que l'image
+    """
+    return coherence(*tenseur_structure(I_bruite, sigma_G, sigma_T, methode, econome), econome=econome)
+
+def tenseur_structure(I_bruite, sigma_G=1.8, sigma_T=18, methode='auto', econome=False):
+    """
+    Calcule les composantes lissées du tenseur de structure.
+    
+    Args:
+        I_bruite (np.ndarray): Image en niveaux de gris (déjà bruitée)
+        sigma_G (float): Écart-type des dérivées de gaussienne
+        sigma_T (float): Écart-type du lissage du tenseur de structure
+        methode (str): Méthode de convolution, voir utils.convolution.convoluer
+        econome (bool): Mode économe en mémoire : calcul en float32, produits
+            et normalisation en place et convolutions séparables écrites dans
+            des tampons réutilisés. Environ 6 images float32 sont allouées au
+            lieu d'une douzaine d'images float64 ; seule la méthode séparable
+            est disponible dans ce mode
+        
+    Returns:
+        tuple: (T_xx, T_xy, T_yy), de même forme que l'image
+    """
+    if econome:
+        return _tenseur_econome(I_bruite, sigma_G, sigma_T, methode, ecraser=False)
+    noyaux = noyaux_segmentation(sigma_G, sigma_T)
+    
+    # Calcul des gradients
+    I_x = convoluer(I_bruite, *noyaux['G_x'], methode=methode)
+    I_y = convoluer(I_bruite, *noyaux['G_y'], methode=methode)
+    
+    norme = np.sqrt(I_x**2 + I_y**2) + 1e-8
+    I_x /= norme
+    I_y /= norme
+    
+    # Tenseur de structure
+    T_xx = convoluer(I_x**2, *noyaux['G'], methode=methode)
+    T_xy = convoluer(I_x * I_y, *noyaux['G'], methode=methode)
+    T_yy = convoluer(I_y**2, *noyaux['G'], methode=methode)
+    return T_xx, T_xy, T_yy
+
+def _tenseur_econome(I_bruite, sigma_G, sigma_T, methode, ecraser):
+    """
+    Tenseur de structure en float32 avec deux tampons de travail réutilisés.
+    
+    Si `ecraser` est vrai, l'image I_bruite (float32) sert elle-même de tampon.
+    """
+    if methode not in ('auto', 'separable'):
+        raise ValueError(f"Le mode économe n'utilise que la convolution séparable, pas : {methode}")
+    noyaux = noyaux_segmentation(sigma_G, sigma_T)
+    if ecraser and I_bruite.dtype == np.float32:
+        source = I_bruite
     else:
-        raise ValueError("Aucune région cohérente détectée.")
\ No newline at end of file
+        source = np.asarray(I_bruite, dtype=np.float32).copy()
+    tampon = np.empty_like(source)
+    from scipy.ndimage import convolve1d
+    
+    def lisser(entree, noyau, sortie):
+        # Le mode 'reflect' de scipy.ndimage correspond au bord 'symm' de convolve2d
+        convolve1d(entree, noyau[0], axis=0, mode='reflect', output=tampon)
+        return convolve1d(tampon, noyau[1], axis=1, mode='reflect', output=sortie)
+    
+    # Gradients
+    I_x = lisser(source, noyaux['G_x'], np.empty_like(source))
+    I_y = lisser(source, noyaux['G_y'], np.empty_like(source))
+    
+    # Normalisation en place ; l'image bruitée devient la norme
+    norme = np.multiply(I_x, I_x, out=source)
+    norme += np.multiply(I_y, I_y, out=tampon)
+    np.sqrt(norme, out=norme)
+    norme += 1e-8
+    I_x /= norme
+    I_y /= norme
+    
+    # Produits et lissage, chaque gradient devenant libre au fur et à mesure
+    T_xy = lisser(np.multiply(I_x, I_y, out=norme), noyaux['G'], np.empty_like(source))
+    T_xx = lisser(np.multiply(I_x, I_x, out=norme), noyaux['G'], np.empty_like(source))
+    T_yy = lisser(np.multiply(I_y, I_y, out=norme), noyaux['G'], I_x)
+    return T_xx, T_xy, T_yy
+
+def coherence(T_xx, T_xy, T_yy, econome=False):
+    """
+    Carte de cohérence D1 à partir des composantes du tenseur de structure.
+    
+    En mode économe, le calcul est fait en place dans deux tampons float32.
+    """
+    if not econome:
+        return 1 - np.sqrt((T_xx - T_yy)**2 + 4*(T_xy**2)) / (T_xx + T_yy + 1e-15)
+    D1 = np.subtract(T_xx, T_yy, dtype=np.float32)
+    D1 *= D1
+    tampon = np.multiply(T_xy, T_xy, dtype=np.float32)
+    tampon *= 4
+    D1 += tampon
+    np.sqrt(D1, out=D1)
+    np.add(T_xx, T_yy, out=tampon)
+    tampon += np.float32(1e-15)
+    D1 /= tampon
+    return np.subtract(1, D1, out=D1)
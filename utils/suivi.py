@@ -0,0 +1,119 @@
+"""
+Suivi de la région du code-barres d'une image à la suivante (flux vidéo).
+
+La segmentation complète n'est lancée qu'à l'initialisation ou après une
+perte : tant que le code est retrouvé, la région et son orientation sont
+reportées sur l'image suivante, et seule une fenêtre de recherche autour de
+la région précédente est re-segmentée.
+"""
+
+from utils.consensus import decoder_par_consensus
+from utils.image import charger_image
+from utils.segmentation import decaler_candidat, segmentation_candidats
+
+
+class SuiviCodeBarres:
+    """
+    Décodeur à état pour une suite d'images.
+
+    À chaque image, trois niveaux sont essayés, du moins coûteux au plus
+    coûteux :
+    1. des rayons dans la région suivie, sans aucune segmentation ;
+    2. une segmentation restreinte à la fenêtre de recherche (région
+       précédente élargie de `marge` fois sa taille de chaque côté) ;
+    3. une segmentation complète, seulement si aucune région n'est suivie
+       (initialisation ou perte après `pertes_max` images sans lecture).
+
+    Un code identique au précédent n'est renvoyé à nouveau qu'après
+    `delai_doublon` secondes sans l'avoir vu.
+    """
+
+    def __init__(self, budget=16, taille_lot=4, seuil_confiance=0.75, marge=0.5,
+                 pertes_max=3, delai_doublon=1.0, seed=0):
+        self.budget = budget
+        self.taille_lot = taille_lot
+        self.seuil_confiance = seuil_confiance
+        self.marge = marge
+        self.pertes_max = pertes_max
+        self.delai_doublon = delai_doublon
+        self.seed = seed
+        self.candidat = None
+        self.pertes = 0
+        self.dernier_code = None
+        self.derniere_vue = None
+
+    def traiter_image(self, image, horodatage):
+        """
+        Traite une image du flux.
+
+        Paramètres:
+            image (np.ndarray ou ImageGrise): Image du flux
+            horodatage (float): Instant de l'image, en secondes
+
+        Retourne:
+            dict ou None: {'code', 'horodatage', 'confiance', 'niveau'} pour un
+                nouveau code (niveau = 'suivi', 'fenetre' ou 'complet'), None
+                si aucun code n'est lu ou s'il s'agit d'un doublon
+        """
+        image = charger_image(image)
+        resultat, niveau = None, None
+
+        if self.candidat is not None:
+            # Niveau 1 : région reportée telle quelle
+            resultat = self._decoder(image, [self.candidat])
+            niveau = 'suivi'
+            if resultat.code is None:
+                # Niveau 2 : re-segmentation de la seule fenêtre de recherche
+                candidats = self._segmenter_fenetre(image)
+                if candidats:
+                    resultat = self._decoder(image, candidats)
+                    niveau = 'fenetre'
+                    if resultat.code is not None:
+                        self.candidat = candidats[0]
+        else:
+            # Niveau 3 : segmentation complète
+            try:
+                candidats = segmentation_candidats(image)
+            except ValueError:
+                candidats = []
+            if candidats:
+                resultat = self._decoder(image, candidats)
+                niveau = 'complet'
+                if resultat.code is not None:
+                    self.candidat = candidats[0]
+
+        if resultat is None or resultat.code is None:
+            self.pertes += 1
+            if self.pertes >= self.pertes_max:
+                self.candidat = None
+            return None
+        self.pertes = 0
+
+        # Déduplication des lectures successives du même code
+        doublon = (resultat.code == self.dernier_code and self.derniere_vue is not None
+                   and horodatage - self.derniere_vue < self.delai_doublon)
+        self.dernier_code = resultat.code
+        self.derniere_vue = horodatage
+        if doublon:
+            return None
+        return {'code': resultat.code, 'horodatage': horodatage,
+                'confiance': resultat.confiance, 'niveau': niveau}
+
+    def _decoder(self, image, candidats):
+        return decoder_par_consensus(image, candidats, budget=self.budget, taille_lot=self.taille_lot,
+                                     seuil_confiance=self.seuil_confiance, seed=self.seed)
+
+    def _segmenter_fenetre(self, image):
+        """Segmente la fenêtre de recherche et ramène les candidats dans le repère de l'image."""
+        min_row, min_col, max_row, max_col = self.candidat.bbox
+        hauteur, largeur = image.shape
+        marge_r = int(self.marge * (max_row - min_row))
+        marge_c = int(self.marge * (max_col - min_col))
+        r0, c0 = max(0, min_row - marge_r), max(0, min_col - marge_c)
+        r1, c1 = min(hauteur, max_row + marge_r), min(largeur, max_col + marge_c)
+        try:
+            candidats = segmentation_candidats(image.gris[r0:r1, c0:c1])
+        except ValueError:
+            return []
+        return [decaler_candidat(c, r0, c0) for c in candidats]
+
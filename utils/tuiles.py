@@ -0,0 +1,467 @@
+"""
+Segmentation par tuiles des très grandes images (scans de palettes de 50 à 100 MP).
+
+L'image est lue tuile par tuile (typiquement depuis un fichier .npy ou brut
+projeté en mémoire), chaque tuile étant élargie d'une bordure égale au
+support des noyaux et du nettoyage morphologique : le masque obtenu au cœur
+de la tuile est alors identique à celui de l'image entière. Les régions
+connexes de chaque tuile sont ensuite recollées d'une tuile à l'autre par
+union-find sur les seules lignes et colonnes de bord, si bien que la
+mémoire utilisée ne dépend que de la taille des tuiles.
+"""
+
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from utils.convolution import noyaux_segmentation
+from utils.image import charger_image, vers_niveaux_de_gris
+from utils.segmentation import (SIGMA_NOISE, _etiqueter, _tenseur_econome, candidat_oriente, coherence,
+                                tenseur_structure)
+
+# Taille des blocs de bruit : le bruit d'un pixel ne dépend que de sa position
+BLOC_BRUIT = 256
+
+# Bordure nécessaire au nettoyage morphologique (fermeture 3x3 puis ouverture 2x2)
+BORDURE_MORPHOLOGIE = 4
+
+
+def bordure_tuiles(sigma_G=1.8, sigma_T=18):
+    """
+    Largeur de la bordure de lecture autour de chaque tuile.
+
+    Les gradients puis le lissage du tenseur lisent chacun une demi-fenêtre
+    de part et d'autre du pixel ; le nettoyage morphologique ajoute
+    BORDURE_MORPHOLOGIE pixels.
+
+    Retourne:
+        int: Bordure en pixels
+    """
+    noyaux = noyaux_segmentation(sigma_G, sigma_T)
+    support = len(noyaux['G_x'][0]) // 2 + len(noyaux['G'][0]) // 2
+    return support + BORDURE_MORPHOLOGIE
+
+
+def ouvrir_image(source):
+    """
+    Tableau 2D (ou 3D couleur) lisible par fenêtres, sans tout charger.
+
+    Paramètres:
+        source (str, np.ndarray ou ImageGrise): Fichier .npy ou brut (projeté
+            en mémoire, voir charger_image), tableau ou np.memmap, ou image
+            déjà chargée ; les autres fichiers sont décodés entièrement
+
+    Retourne:
+        np.ndarray: Tableau (éventuellement projeté en mémoire)
+    """
+    return charger_image(source).donnees
+
+
+def bruit_fenetre(r0, r1, c0, c1, graine=0):
+    """
+    Bruit gaussien de la segmentation sur la fenêtre [r0, r1) x [c0, c1).
+
+    Le bruit est tiré par blocs de BLOC_BRUIT pixels, chacun avec un
+    générateur initialisé par (graine, bloc) : deux fenêtres qui se
+    recouvrent voient donc le même bruit sur leur partie commune.
+
+    Retourne:
+        np.ndarray: Bruit float64 de forme (r1 - r0, c1 - c0)
+    """
+    bruit = np.empty((r1 - r0, c1 - c0))
+    for bi in range(r0 // BLOC_BRUIT, (r1 - 1) // BLOC_BRUIT + 1):
+        for bj in range(c0 // BLOC_BRUIT, (c1 - 1) // BLOC_BRUIT + 1):
+            bloc = np.random.default_rng((graine, bi, bj)).normal(0, SIGMA_NOISE, (BLOC_BRUIT, BLOC_BRUIT))
+            br0, bc0 = bi * BLOC_BRUIT, bj * BLOC_BRUIT
+            a0, a1 = max(r0, br0), min(r1, br0 + BLOC_BRUIT)
+            b0, b1 = max(c0, bc0), min(c1, bc0 + BLOC_BRUIT)
+            bruit[a0 - r0:a1 - r0, b0 - c0:b1 - c0] = bloc[a0 - br0:a1 - br0, b0 - bc0:b1 - bc0]
+    return bruit
+
+
+def tenseur_fenetre(image, r0, r1, c0, c1, graine=0, econome=False):
+    """
+    Tenseur de structure et cohérence de la fenêtre [r0, r1) x [c0, c1), bruitée par bruit_fenetre.
+
+    Les valeurs ne sont exactes (égales à celles de l'image entière) qu'à
+    plus de bordure_tuiles() pixels des bords de la fenêtre qui ne sont pas
+    des bords de l'image.
+
+    Retourne:
+        tuple: (T_xx, T_xy, T_yy, D1) de forme (r1 - r0, c1 - c0)
+    """
+    I = vers_niveaux_de_gris(np.asarray(image[r0:r1, c0:c1]))
+    I_bruite = np.clip(I + bruit_fenetre(r0, r1, c0, c1, graine), 0, 1)
+    if econome:
+        T_xx, T_xy, T_yy = _tenseur_econome(I_bruite.astype(np.float32), 1.8, 18, 'separable', ecraser=True)
+    else:
+        T_xx, T_xy, T_yy = tenseur_structure(I_bruite, methode='separable')
+    return T_xx, T_xy, T_yy, coherence(T_xx, T_xy, T_yy, econome=econome)
+
+
+def _elargir(forme, r0, r1, c0, c1, bordure):
+    """Fenêtre élargie de la bordure, limitée à l'image."""
+    return (max(0, r0 - bordure), min(forme[0], r1 + bordure),
+            max(0, c0 - bordure), min(forme[1], c1 + bordure))
+
+
+def _masque_et_tenseur(image, r0, r1, c0, c1, bordure, graine, econome):
+    """Masque nettoyé, tenseur de structure et cohérence D1 d'une fenêtre, calculés avec sa bordure."""
+    lr0, lr1, lc0, lc1 = _elargir(image.shape, r0, r1, c0, c1, bordure)
+    T_xx, T_xy, T_yy, D1 = tenseur_fenetre(image, lr0, lr1, lc0, lc1, graine, econome)
+    M = _etiqueter(D1) > 0
+    coeur = (slice(r0 - lr0, r1 - lr0), slice(c0 - lc0, c1 - lc0))
+    return M[coeur], T_xx[coeur], T_xy[coeur], T_yy[coeur], D1[coeur]
+
+
+def masque_fenetre(image, r0, r1, c0, c1, bordure, graine=0, econome=False):
+    """
+    Masque nettoyé de la segmentation sur une fenêtre, calculé avec sa bordure.
+
+    Retourne:
+        np.ndarray: Masque booléen de forme (r1 - r0, c1 - c0)
+    """
+    return _masque_et_tenseur(image, r0, r1, c0, c1, bordure, graine, econome)[0]
+
+
+# Résumé d'une tuile (voir _traiter_tuile)
+_Resume = namedtuple('_Resume', ['stats', 'sommes', 'bords', 'sommes_fond', 'bords_fond', 'contacts', 'lignes'])
+
+
+def _sommer(etiquettes, valeurs, nombre):
+    """Somme de `valeurs` sur chacune des étiquettes 1..nombre."""
+    return np.bincount(etiquettes.ravel(), weights=valeurs.ravel(), minlength=nombre + 1)[1:]
+
+
+def _bords(etiquettes):
+    """Étiquettes des lignes et colonnes de bord (haut, bas, gauche, droite)."""
+    return etiquettes[0].copy(), etiquettes[-1].copy(), etiquettes[:, 0].copy(), etiquettes[:, -1].copy()
+
+
+def _paires(a, b):
+    """Paires d'étiquettes (a, b) non nulles aux mêmes positions."""
+    contact = (a > 0) & (b > 0)
+    return np.stack([a[contact], b[contact]], axis=1)
+
+
+def _extremites_lignes(etiquettes):
+    """
+    Premier et dernier pixel de chaque région sur chacune de ses lignes.
+
+    Retourne:
+        np.ndarray: Tableau (N, 4) de (étiquette, ligne, colonne min, colonne max)
+    """
+    rows, cols = np.nonzero(etiquettes)
+    cles = etiquettes[rows, cols].astype(np.int64) * etiquettes.shape[0] + rows
+    # Tri stable : les colonnes restent croissantes pour chaque (étiquette, ligne)
+    ordre = np.argsort(cles, kind='stable')
+    cles, cols = cles[ordre], cols[ordre]
+    _, debuts, nombres = np.unique(cles, return_index=True, return_counts=True)
+    return np.stack([cles[debuts] // etiquettes.shape[0], cles[debuts] % etiquettes.shape[0],
+                     cols[debuts], cols[debuts + nombres - 1]], axis=1)
+
+
+def _traiter_tuile(image, r0, r1, c0, c1, bordure, graine, econome, orientation=False):
+    """
+    Étiquette le cœur d'une tuile et résume ses régions.
+
+    Si `orientation` est vrai, le résumé contient aussi de quoi orienter les
+    régions sans revenir à l'image : les sommes du tenseur sur les
+    composantes du fond (4-connexité), qui peuvent former les trous d'une
+    région, leurs contacts avec les régions, et les extrémités des lignes de
+    chaque région.
+
+    Retourne:
+        _Resume: stats, tableau (K, 7) des régions (aire, min_row, min_col,
+            max_row, max_col, ligne et colonne du premier pixel) en
+            coordonnées globales ; sommes, tableau (K, 4) des sommes de D1,
+            T_xx, T_xy et T_yy sur chaque région ; bords, étiquettes des
+            lignes et colonnes de bord (haut, bas, gauche, droite) ; puis,
+            avec `orientation`, sommes_fond (K', 3) et bords_fond pour les
+            composantes du fond, contacts, paires (région, fond) 4-voisines,
+            et lignes, extrémités des lignes des régions (voir
+            _extremites_lignes) en coordonnées globales
+    """
+    from skimage.measure import label, regionprops
+    M, T_xx, T_xy, T_yy, D1 = _masque_et_tenseur(image, r0, r1, c0, c1, bordure, graine, econome)
+    etiquettes = label(M, connectivity=2)
+    stats = np.zeros((etiquettes.max(), 7), dtype=np.int64)
+    for region in regionprops(etiquettes):
+        premier = region.coords[0]  # ordre de balayage : premier pixel de la région
+        stats[region.label - 1] = (region.area,
+                                   region.bbox[0] + r0, region.bbox[1] + c0,
+                                   region.bbox[2] + r0, region.bbox[3] + c0,
+                                   premier[0] + r0, premier[1] + c0)
+    sommes = np.stack([_sommer(etiquettes, T, len(stats)) for T in (D1, T_xx, T_xy, T_yy)], axis=1)
+    if not orientation:
+        return _Resume(stats, sommes, _bords(etiquettes), None, None, None, None)
+
+    fond = label(~M, connectivity=1)
+    sommes_fond = np.stack([_sommer(fond, T, fond.max()) for T in (T_xx, T_xy, T_yy)], axis=1)
+    contacts = np.concatenate([_paires(etiquettes[:, :-1], fond[:, 1:]), _paires(etiquettes[:, 1:], fond[:, :-1]),
+                               _paires(etiquettes[:-1], fond[1:]), _paires(etiquettes[1:], fond[:-1])])
+    lignes = _extremites_lignes(etiquettes) + (0, r0, c0, c0)
+    return _Resume(stats, sommes, _bords(etiquettes), sommes_fond, _bords(fond),
+                   np.unique(contacts, axis=0), lignes)
+
+
+def _racine(parents, i):
+    while parents[i] != i:
+        parents[i] = parents[parents[i]]
+        i = parents[i]
+    return i
+
+
+def _unir_bords(parents, a, b, decalages):
+    """
+    Unit les régions qui se touchent (8-connexité) de part et d'autre d'un bord.
+
+    a et b sont les étiquettes globales (0 = fond) de deux lignes adjacentes.
+    """
+    for decalage in decalages:
+        if decalage < 0:
+            x, y = a[-decalage:], b[:decalage]
+        elif decalage > 0:
+            x, y = a[:-decalage], b[decalage:]
+        else:
+            x, y = a, b
+        paires = np.unique(np.stack([x, y], axis=1)[(x > 0) & (y > 0)], axis=0)
+        for i, j in paires:
+            ri, rj = _racine(parents, i), _racine(parents, j)
+            if ri != rj:
+                parents[max(ri, rj)] = min(ri, rj)
+
+
+def segmentation_tuiles(source, taille_tuile=1024, nb_threads=1, graine=0, econome=False):
+    """
+    Segmentation d'une très grande image, tuile par tuile.
+
+    Donne la même boîte que segmentation() sur l'image entière lorsque le
+    bruit de segmentation est le même (voir bruit_fenetre) ; seules une
+    tuile par thread et les lignes de bord des tuiles sont en mémoire.
+
+    Paramètres:
+        source (str, np.ndarray ou ImageGrise): Image, de préférence un .npy
+            ou un np.memmap en niveaux de gris
+        taille_tuile (int): Côté des tuiles (hors bordure), en pixels
+        nb_threads (int): Nombre de tuiles traitées en parallèle
+        graine (int): Graine du bruit de segmentation
+        econome (bool): Calcul des tuiles en float32, voir segmentation
+
+    Retourne:
+        tuple: (min_row, min_col, max_row, max_col) de la plus grande région
+    """
+    regions = regions_tuiles(source, taille_tuile, nb_threads, graine, econome)
+    if not regions:
+        raise ValueError("Aucune région cohérente détectée.")
+    # Plus grande région ; à aire égale, la première dans l'ordre de balayage
+    # (comme max() sur regionprops de l'image entière)
+    return max(regions, key=lambda r: r[0])[1]
+
+
+def regions_tuiles(source, taille_tuile=1024, nb_threads=1, graine=0, econome=False):
+    """
+    Régions connexes du masque de segmentation, recollées entre tuiles.
+
+    Paramètres: voir segmentation_tuiles
+
+    Retourne:
+        list: Tuples (aire, bbox, premier_pixel, coherence) dans l'ordre de
+            balayage de l'image entière (ordre des étiquettes de
+            skimage.measure.label), coherence étant la moyenne de D1 sur la région
+    """
+    image = ouvrir_image(source)
+    regions, _, _ = _recoller_tuiles(image, taille_tuile, nb_threads, graine, econome)
+    return [region[:4] for region in regions]
+
+
+def _recoller_tuiles(image, taille_tuile, nb_threads, graine, econome, orientation=False):
+    """
+    Résume chaque tuile puis recolle ses régions avec celles des tuiles voisines.
+
+    Retourne:
+        tuple: (regions, racines, recollement) où regions liste les tuples
+            (aire, bbox, premier_pixel, coherence, racine) dans l'ordre de
+            balayage, racines donne la racine de chaque étiquette globale
+            (0 = fond) et recollement, None sans `orientation`, est le tuple
+            (resumes, sommes, nb_lignes, nb_colonnes) utilisé par
+            _graphe_complement
+    """
+    hauteur, largeur = image.shape[:2]
+    bordure = bordure_tuiles()
+    lignes = list(range(0, hauteur, taille_tuile))
+    colonnes = list(range(0, largeur, taille_tuile))
+    fenetres = [(r0, min(r0 + taille_tuile, hauteur), c0, min(c0 + taille_tuile, largeur))
+                for r0 in lignes for c0 in colonnes]
+
+    def traiter(fenetre):
+        return _traiter_tuile(image, *fenetre, bordure, graine, econome, orientation)
+
+    if nb_threads > 1:
+        with ThreadPoolExecutor(max_workers=nb_threads) as executor:
+            resumes = list(executor.map(traiter, fenetres))
+    else:
+        resumes = [traiter(fenetre) for fenetre in fenetres]
+
+    # Étiquettes globales : décalage cumulé des étiquettes de chaque tuile
+    decalages = np.cumsum([0] + [len(resume.stats) for resume in resumes])
+    bords = _globaliser([resume.bords for resume in resumes], decalages)
+    racines = _recoller(bords, decalages[-1], len(lignes), len(colonnes), diagonales=True)
+
+    # Agrégation des statistiques par région recollée
+    stats = np.concatenate([resume.stats for resume in resumes])
+    sommes = np.zeros((len(racines), 4))
+    np.add.at(sommes, racines[1:], np.concatenate([resume.sommes for resume in resumes]))
+    aires = np.zeros(len(racines), dtype=np.int64)
+    np.add.at(aires, racines[1:], stats[:, 0])
+    boites = np.tile(np.array([hauteur, largeur, 0, 0], dtype=np.int64), (len(racines), 1))
+    for k, ufunc in enumerate((np.minimum, np.minimum, np.maximum, np.maximum)):
+        ufunc.at(boites[:, k], racines[1:], stats[:, k + 1])
+    # Premier pixel dans l'ordre de balayage, codé par sa position linéaire
+    premiers = np.full(len(racines), hauteur * largeur, dtype=np.int64)
+    np.minimum.at(premiers, racines[1:], stats[:, 5] * largeur + stats[:, 6])
+
+    regions = sorted(((int(aires[r]), tuple(int(v) for v in boites[r]), divmod(int(premiers[r]), largeur),
+                       float(sommes[r, 0] / aires[r]), int(r))
+                      for r in np.unique(racines[1:])), key=lambda region: region[2])
+    recollement = (resumes, sommes, len(lignes), len(colonnes)) if orientation else None
+    return regions, racines, recollement
+
+
+def _globaliser(bords, decalages):
+    """Étiquettes de bord de chaque tuile décalées en étiquettes globales (0 = fond)."""
+    return [tuple(np.where(e > 0, e + decalage, 0) for e in bords_tuile)
+            for bords_tuile, decalage in zip(bords, decalages)]
+
+
+def _recoller(bords, nb_etiquettes, nb_lignes, nb_colonnes, diagonales):
+    """
+    Racine de chaque étiquette globale après recollement le long des bords de tuiles.
+
+    Avec `diagonales`, les régions sont recollées en 8-connexité (masque),
+    sinon en 4-connexité (fond).
+
+    Retourne:
+        np.ndarray: Racine de chaque étiquette 0..nb_etiquettes
+    """
+    parents = np.arange(nb_etiquettes + 1)
+    decalages = (-1, 0, 1) if diagonales else (0,)
+    for k in range(nb_lignes * nb_colonnes):
+        i, j = divmod(k, nb_colonnes)
+        if j + 1 < nb_colonnes:
+            _unir_bords(parents, bords[k][3], bords[k + 1][2], decalages)
+        if i + 1 < nb_lignes:
+            _unir_bords(parents, bords[k][1], bords[k + nb_colonnes][0], decalages)
+            # Contacts en diagonale aux coins des tuiles
+            if diagonales and j + 1 < nb_colonnes:
+                _unir_bords(parents, bords[k][1][-1:], bords[k + nb_colonnes + 1][0][:1], (0,))
+            if diagonales and j > 0:
+                _unir_bords(parents, bords[k][1][:1], bords[k + nb_colonnes - 1][0][-1:], (0,))
+    return np.array([_racine(parents, i) for i in range(len(parents))])
+
+
+def _graphe_complement(racines, recollement):
+    """
+    Graphe du complément des régions recollées, pour en boucher les trous.
+
+    Les nœuds sont les régions (étiquettes 0..len(racines) - 1), puis les
+    composantes 4-connexes du fond recollées ; deux nœuds sont reliés
+    lorsqu'ils sont 4-voisins quelque part dans l'image.
+
+    Retourne:
+        tuple: (aretes, exterieurs, sommes_noeuds) où aretes est un tableau
+            (E, 2) de nœuds, exterieurs les nœuds qui touchent le bord de
+            l'image et sommes_noeuds les sommes de T_xx, T_xy et T_yy de
+            chaque nœud (nulles pour une étiquette qui n'est pas une racine)
+    """
+    resumes, sommes, nb_lignes, nb_colonnes = recollement
+    decalages = np.cumsum([0] + [len(resume.stats) for resume in resumes])
+    decalages_fond = np.cumsum([0] + [len(resume.sommes_fond) for resume in resumes])
+    bords = _globaliser([resume.bords for resume in resumes], decalages)
+    bords_fond = _globaliser([resume.bords_fond for resume in resumes], decalages_fond)
+    racines_fond = _recoller(bords_fond, decalages_fond[-1], nb_lignes, nb_colonnes, diagonales=False)
+    sommes_fond = np.zeros((len(racines_fond), 3))
+    np.add.at(sommes_fond, racines_fond[1:], np.concatenate([resume.sommes_fond for resume in resumes]))
+
+    # Contacts région / fond dans chaque tuile, puis de part et d'autre des bords
+    contacts = [resume.contacts + (decalage, decalage_fond)
+                for resume, decalage, decalage_fond in zip(resumes, decalages, decalages_fond)]
+    exterieurs = []
+    for k in range(nb_lignes * nb_colonnes):
+        i, j = divmod(k, nb_colonnes)
+        if j + 1 < nb_colonnes:
+            contacts += [_paires(bords[k][3], bords_fond[k + 1][2]), _paires(bords[k + 1][2], bords_fond[k][3])]
+        if i + 1 < nb_lignes:
+            contacts += [_paires(bords[k][1], bords_fond[k + nb_colonnes][0]),
+                         _paires(bords[k + nb_colonnes][0], bords_fond[k][1])]
+        # Bords de la tuile qui sont des bords de l'image
+        for cote, au_bord in enumerate((i == 0, i + 1 == nb_lignes, j == 0, j + 1 == nb_colonnes)):
+            if au_bord:
+                exterieurs += [racines[bords[k][cote]], len(racines) + racines_fond[bords_fond[k][cote]]]
+    contacts = np.concatenate(contacts)
+    aretes = np.stack([racines[contacts[:, 0]], len(racines) + racines_fond[contacts[:, 1]]], axis=1)
+    return np.unique(aretes, axis=0), np.unique(np.concatenate(exterieurs)), np.concatenate([sommes[:, 1:], sommes_fond])
+
+
+def _sommes_trous_bouches(racine, graphe):
+    """
+    Sommes de T_xx, T_xy et T_yy sur une région recollée, trous bouchés.
+
+    Les trous de la région sont les composantes de son complément qui ne
+    touchent pas le bord de l'image, comme pour binary_fill_holes sur
+    l'image entière : ce sont les composantes du graphe privé de la région
+    qui ne contiennent aucun nœud extérieur.
+
+    Retourne:
+        np.ndarray: (S_xx, S_xy, S_yy)
+    """
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+    aretes, exterieurs, sommes_noeuds = graphe
+    aretes = aretes[aretes[:, 0] != racine]
+    nb_noeuds = len(sommes_noeuds)
+    _, composantes = connected_components(coo_matrix((np.ones(len(aretes)), (aretes[:, 0], aretes[:, 1])),
+                                                     shape=(nb_noeuds, nb_noeuds)), directed=False)
+    trous = ~np.isin(composantes, composantes[exterieurs])
+    trous[racine] = False
+    return sommes_noeuds[racine] + sommes_noeuds[trous].sum(axis=0)
+
+
+def candidats_tuiles(source, max_candidats=5, taille_tuile=1024, nb_threads=1, graine=0, econome=False):
+    """
+    Régions candidates orientées d'une très grande image, tuile par tuile.
+
+    Les régions recollées sont classées comme dans segmentation_candidats
+    (aire x cohérence moyenne). Leur orientation est tirée des sommes du
+    tenseur de structure accumulées dans chaque tuile, sur la région et sur
+    les composantes du fond qui forment ses trous, et leur rectangle des
+    extrémités de leurs lignes : l'image n'est lue qu'une fois, tuile par
+    tuile. Avec le même bruit de segmentation (voir bruit_fenetre), les
+    candidats sont ceux de l'image entière.
+
+    Paramètres: voir segmentation_tuiles
+
+    Retourne:
+        list: Liste de Candidat, du meilleur au moins bon
+    """
+    image = ouvrir_image(source)
+    regions, racines, recollement = _recoller_tuiles(image, taille_tuile, nb_threads, graine, econome,
+                                                     orientation=True)
+    if not regions:
+        raise ValueError("Aucune région cohérente détectée.")
+    meilleures = sorted(regions, key=lambda r: r[0] * r[3], reverse=True)[:max_candidats]
+    resumes = recollement[0]
+    decalages = np.cumsum([0] + [len(resume.stats) for resume in resumes])
+    lignes = np.concatenate([resume.lignes + (decalage, 0, 0, 0) for resume, decalage in zip(resumes, decalages)])
+    racines_lignes = racines[lignes[:, 0]]
+    graphe = _graphe_complement(racines, recollement)
+    candidats = []
+    for aire, bbox, _, coherence_moyenne, racine in meilleures:
+        extremites = lignes[racines_lignes == racine]
+        rows = np.concatenate([extremites[:, 1], extremites[:, 1]])
+        cols = np.concatenate([extremites[:, 2], extremites[:, 3]])
+        candidats.append(candidat_oriente(*_sommes_trous_bouches(racine, graphe), rows, cols,
+                                          coherence_moyenne, aire, bbox))
+    candidats.sort(key=lambda c: c.aire * c.coherence, reverse=True)
+    return candidats
@@ -0,0 +1,77 @@
+"""
+Lecture de codes-barres EAN-13 dans un fichier vidéo.
+
+La région du code-barres est suivie d'une image à l'autre (voir
+utils.suivi.SuiviCodeBarres) ; chaque nouveau code est écrit sous forme
+d'une ligne JSON avec l'horodatage de l'image.
+
+Utilisation:
+    python video.py convoyeur.mp4 [-o codes.jsonl] [--pas 2]
+"""
+
+import argparse
+import json
+import sys
+
+
+def lire_video(chemin, pas=1, **options):
+    """
+    Décode les codes-barres d'une vidéo.
+
+    Paramètres:
+        chemin (str): Chemin du fichier vidéo
+        pas (int): Traite une image sur `pas`
+        **options: Paramètres de SuiviCodeBarres
+
+    Retourne:
+        générateur: Dictionnaires {'code', 'horodatage', 'image', 'confiance', 'niveau'}
+    """
+    import cv2
+    from utils.suivi import SuiviCodeBarres
+
+    capture = cv2.VideoCapture(chemin)
+    if not capture.isOpened():
+        raise ValueError(f"Impossible d'ouvrir la vidéo : {chemin}")
+    suivi = SuiviCodeBarres(**options)
+    indice = 0
+    try:
+        while True:
+            ok, image = capture.read()
+            if not ok:
+                break
+            if indice % pas == 0:
+                horodatage = capture.get(cv2.CAP_PROP_POS_MSEC) / 1000
+                gris = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+                resultat = suivi.traiter_image(gris, horodatage)
+                if resultat is not None:
+                    resultat['image'] = indice
+                    yield resultat
+            indice += 1
+    finally:
+        capture.release()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Lecture de codes-barres EAN-13 dans une vidéo.")
+    parser.add_argument('video', help="Fichier vidéo")
+    parser.add_argument('-o', '--sortie', default='-',
+                        help="Fichier JSONL de sortie (défaut : sortie standard)")
+    parser.add_argument('--pas', type=int, default=1, help="Traite une image sur PAS")
+    parser.add_argument('--budget', type=int, default=16, help="Nombre maximal de rayons par image")
+    parser.add_argument('--doublon', type=float, default=1.0,
+                        help="Délai (s) avant de signaler à nouveau le même code")
+    args = parser.parse_args(argv)
+
+    sortie = sys.stdout if args.sortie == '-' else open(args.sortie, 'w')
+    try:
+        for resultat in lire_video(args.video, pas=args.pas, budget=args.budget,
+                                   delai_doublon=args.doublon):
+            sortie.write(json.dumps(resultat, ensure_ascii=False) + '\n')
+            sortie.flush()
+    finally:
+        if sortie is not sys.stdout:
+            sortie.close()
+
+
+if __name__ == "__main__":
+    main()